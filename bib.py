@@ -59,6 +59,8 @@ def processar_visualizacao_formatada(df: pd.DataFrame) -> str:
         df_exp = expandir_linhas_por_quebra(df, coluna='Ref', separador='\n\n')
 
         df_sel = df_exp[['Num', 'Num de Ref', 'Ref']]
+        # Valores ausentes das colunas numéricas viram null no JSON
+        df_sel = df_sel.astype(object).where(df_sel.notna(), None)
         texto_formatado = json.dumps(df_sel.to_dict(orient='records'), indent=4, ensure_ascii=False)
         return texto_formatado
     except Exception as e:
@@ -12,9 +12,10 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QStandardPaths
 from bibtexmetrics import BibtexViewer
-from processador_referencias import extrair_campos_apa, extrair_autores_completos
+from processador_referencias import juntar_referencias, separar_referencias, gerar_bibtex
 import importlib
 import config
+from cache_planilha import ler_planilha
 
 class APA2BibtexWidget(QWidget):
     def __init__(self):
@@ -93,14 +94,11 @@ class APA2BibtexWidget(QWidget):
         url_csv = config.sheet_csv_url
 
         try:
-            df = pd.read_csv(url_csv)
+            df = ler_planilha(url_csv)
             if "Ref" not in df.columns:
                 QMessageBox.critical(self, "Erro", "A coluna 'Ref' não foi encontrada na planilha.")
                 return
-            referencias = "\n\n".join(
-                str(ref).strip() for ref in df["Ref"]
-                if pd.notna(ref) and not str(ref).strip().startswith(".")
-            )
+            referencias = juntar_referencias(df["Ref"])
 
             self.input_edit.setPlainText(referencias)
             self.converter()
@@ -152,13 +150,7 @@ class APA2BibtexWidget(QWidget):
         if not entrada:
             QMessageBox.warning(self, "Aviso", "Não há referências para converter.")
             return
-        entradas = re.split(r'\n{2,}', entrada)
-        entradas = [e for e in entradas if not e.strip().startswith(".")]
-
-        referencias_separadas = []
-        for entrada in entradas:
-            partes = [r.strip() for r in entrada.split('\n\n') if r.strip()]
-            referencias_separadas.extend(partes)
+        referencias_separadas = separar_referencias(entrada)
 
         self.tabela_apa.setRowCount(len(referencias_separadas))
         for i, ref in enumerate(referencias_separadas):
@@ -189,22 +181,11 @@ class APA2BibtexWidget(QWidget):
         self.tabela_apa.resizeColumnsToContents()
         self.tabela_apa.resizeRowsToContents()
 
-        bibtex_total = ""
-        lista_campos = []
-        for idx, entrada_individual in enumerate(referencias_separadas, 1):
-            campos = extrair_campos_apa(entrada_individual)
-            lista_campos.append(campos)
-
-            bibtex = f"@article{{ref{idx},\n"
-            for campo, valor in campos.items():
-                if valor:
-                    bibtex += f"  {campo} = {{{valor}}},\n"
-            bibtex += f"  note = {{{entrada_individual.strip()}}}\n}}\n\n"
-            bibtex_total += bibtex
+        bibtex_total, lista_campos = gerar_bibtex(referencias_separadas)
 
         self.df_bibtex = pd.DataFrame(lista_campos)
 
-        self.output_edit.setPlainText(bibtex_total.strip())
+        self.output_edit.setPlainText(bibtex_total)
         # self.tabs.setCurrentWidget(self.tab_bibtex)
 
         shared_data.df_bibtex = self.output_edit
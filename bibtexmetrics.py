@@ -5,15 +5,8 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 from pathlib import Path
-import bibtexparser
 from collections import defaultdict
-import statistics
 import sys
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import numpy as np
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 import re
 from processador_referencias import extrair_campos_apa, extrair_autores_completos
 
@@ -27,6 +20,8 @@ def analyze_bibtex():
     if not bibtex_path.exists():
         raise FileNotFoundError(f"Arquivo {bibtex_path} não encontrado.")
 
+    import bibtexparser
+
     with open(bibtex_path, encoding="utf-8") as bibtex_file:
         bib_database = bibtexparser.load(bibtex_file)
 
@@ -133,6 +128,12 @@ class BibtexViewer(QMainWindow):
 
     
     def create_plots_tab_with_subtabs(self, metrics):
+        # Importados só aqui: matplotlib e wordcloud atrasam bastante a abertura do programa
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+        import numpy as np
+        from wordcloud import WordCloud
+
         # Widget principal que contém os gráficos
         widget = QWidget()
         layout = QVBoxLayout(widget)
@@ -0,0 +1,196 @@
+# busca.py
+
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Colunas cujo texto entra na busca
+COLUNAS_BUSCA = ("Ref", "Titulo", "Abstract", "IA keywords")
+
+_PALAVRA = re.compile(r"\w+")
+_CLAUSULA = re.compile(r'"([^"]*)"|(\S+)')
+_ACENTOS = re.compile(r"[\u0300-\u036f]")
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos, para que "Música" e "musica" sejam o mesmo termo."""
+    texto = texto.lower()
+    if texto.isascii():
+        return texto
+    return _ACENTOS.sub("", unicodedata.normalize("NFKD", texto))
+
+
+def tokenizar(texto):
+    return tuple(_PALAVRA.findall(normalizar(texto)))
+
+
+def interpretar_consulta(consulta):
+    """Separa a consulta em cláusulas (termos, tipo); todas precisam ser atendidas.
+
+    "duas palavras" entre aspas é uma frase; palavra* é um prefixo; o resto são termos.
+    Termos que viram mais de uma palavra (ex.: music-therapy) são tratados como frase.
+    """
+    clausulas = []
+    for frase, termo in _CLAUSULA.findall(consulta):
+        if frase:
+            termos = tokenizar(frase)
+            tipo = "frase"
+        elif termo.endswith("*"):
+            termos = tokenizar(termo[:-1])
+            tipo = "prefixo" if len(termos) == 1 else "frase"
+        else:
+            termos = tokenizar(termo)
+            tipo = "termo" if len(termos) == 1 else "frase"
+        if termos:
+            clausulas.append((termos, tipo))
+    return clausulas
+
+
+def _agrupar_por_palavra(tokens_por_numero):
+    """{número: tokens} → {palavra: números (ordenados) dos textos que a contêm}."""
+    palavras, numeros = [], []
+    for numero, tokens in tokens_por_numero.items():
+        distintas = set(tokens)
+        palavras.extend(distintas)
+        numeros.extend([numero] * len(distintas))
+    if not palavras:
+        return {}
+    codigos, unicas = pd.factorize(np.array(palavras, dtype=object))
+    numeros = np.array(numeros, dtype=np.int64)
+    ordem = np.lexsort((numeros, codigos))
+    limites = np.flatnonzero(np.diff(codigos[ordem])) + 1
+    return dict(zip(unicas[codigos[ordem[np.r_[0, limites]]]], np.split(numeros[ordem], limites)))
+
+
+class IndiceTexto:
+    """Índice invertido palavra → textos, imutável depois de montado.
+
+    Cada texto distinto recebe um número fixo. atualizado() devolve um novo
+    índice para outro conjunto de textos, tokenizando apenas os textos novos;
+    o índice anterior continua válido para quem ainda o usa.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._tokens = {}
+        self._postagens = {}
+        self._vocabulario = []
+        self.capacidade = 0
+
+    def __len__(self):
+        return len(self._ids)
+
+    def id_de(self, texto):
+        return self._ids.get(texto, -1)
+
+    def atualizado(self, textos):
+        textos = set(textos)
+        removidos = self._ids.keys() - textos
+        novos = textos - self._ids.keys()
+        if not removidos and not novos:
+            return self
+
+        indice = IndiceTexto()
+        indice._ids = dict(self._ids)
+        indice._tokens = dict(self._tokens)
+        indice.capacidade = self.capacidade + len(novos)
+        saem = {numero: indice._tokens.pop(numero) for numero in map(indice._ids.pop, removidos)}
+        entram = {}
+        for numero, texto in enumerate(novos, self.capacidade):
+            indice._ids[texto] = numero
+            entram[numero] = indice._tokens[numero] = tokenizar(texto)
+
+        # Só as palavras afetadas ganham um novo array de textos
+        indice._postagens = dict(self._postagens)
+        saem, entram = _agrupar_por_palavra(saem), _agrupar_por_palavra(entram)
+        for palavra in saem.keys() | entram.keys():
+            atuais = indice._postagens.get(palavra, np.zeros(0, dtype=np.int64))
+            if palavra in saem:
+                atuais = np.setdiff1d(atuais, saem[palavra], assume_unique=True)
+            if palavra in entram:
+                # Números novos são sempre maiores que os existentes: basta concatenar
+                atuais = np.concatenate((atuais, entram[palavra]))
+            if len(atuais):
+                indice._postagens[palavra] = atuais
+            else:
+                indice._postagens.pop(palavra, None)
+        if indice._postagens.keys() != self._postagens.keys():
+            indice._vocabulario = sorted(indice._postagens)
+        else:
+            indice._vocabulario = self._vocabulario
+        return indice
+
+    def _com_prefixo(self, prefixo):
+        inicio = bisect.bisect_left(self._vocabulario, prefixo)
+        fim = bisect.bisect_left(self._vocabulario, prefixo + "\U0010ffff")
+        palavras = self._vocabulario[inicio:fim]
+        if not palavras:
+            return np.zeros(0, dtype=np.int64)
+        # Pode repetir números; quem usa só marca as posições
+        return np.concatenate([self._postagens[p] for p in palavras])
+
+    def _com_frase(self, termos):
+        candidatos = sorted((self._com_termo(t) for t in set(termos)), key=len)
+        encontrados = candidatos[0]
+        for outro in candidatos[1:]:
+            encontrados = np.intersect1d(encontrados, outro, assume_unique=True)
+        n = len(termos)
+        return np.array([
+            numero for numero in encontrados.tolist()
+            if any(self._tokens[numero][i:i + n] == termos
+                   for i in range(len(self._tokens[numero]) - n + 1))], dtype=np.int64)
+
+    def _com_termo(self, termo):
+        return self._postagens.get(termo, np.zeros(0, dtype=np.int64))
+
+    def numeros(self, termos, tipo):
+        """Números dos textos que atendem a uma cláusula de interpretar_consulta (podem repetir)."""
+        if tipo == "prefixo":
+            return self._com_prefixo(termos[0])
+        if tipo == "frase":
+            return self._com_frase(termos)
+        return self._com_termo(termos[0])
+
+
+class BuscaTextual:
+    """Busca de texto completo sobre as linhas de um dataframe expandido."""
+
+    def __init__(self, indice, df):
+        self.indice = indice
+        self.total = len(df)
+        # Por coluna, o número do texto de cada linha no índice (-1 se vazio)
+        self._numeros = []
+        for coluna in COLUNAS_BUSCA:
+            if coluna not in df.columns:
+                continue
+            codigos, unicos = pd.factorize(df[coluna].astype(object))
+            numeros = np.array([indice.id_de(t) if isinstance(t, str) else -1 for t in unicos] + [-1])
+            self._numeros.append(numeros[codigos])
+
+    def linhas(self, consulta):
+        """Posições das linhas em que cada cláusula aparece em alguma das colunas, ou None."""
+        clausulas = interpretar_consulta(consulta)
+        if not clausulas:
+            return None
+        resultado = np.ones(self.total, dtype=bool)
+        for termos, tipo in clausulas:
+            # A última posição fica False e atende às linhas vazias (-1)
+            tabela = np.zeros(self.indice.capacidade + 1, dtype=bool)
+            tabela[self.indice.numeros(termos, tipo)] = True
+            encontradas = np.zeros(self.total, dtype=bool)
+            for numeros in self._numeros:
+                encontradas |= tabela[numeros]
+            resultado &= encontradas
+        return np.flatnonzero(resultado)
+
+
+def textos_para_busca(df):
+    """Textos distintos das colunas pesquisáveis."""
+    textos = set()
+    for coluna in COLUNAS_BUSCA:
+        if coluna in df.columns:
+            textos.update(t for t in df[coluna].dropna().unique() if isinstance(t, str))
+    return textos
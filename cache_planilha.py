@@ -0,0 +1,266 @@
+# cache_planilha.py
+
+import hashlib
+import io
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pandas as pd
+
+# Pasta do cache local (pode ser trocada pela variável de ambiente SHEETEX_CACHE)
+PASTA_CACHE = Path(os.environ.get("SHEETEX_CACHE", Path.home() / ".sheetex" / "cache"))
+TIMEOUT = 30
+
+# Conteúdo da última busca de cada URL nesta sessão
+_memoria = {}
+# URLs lidas em blocos nesta sessão: apenas o hash do blob já validado em disco
+_sessao = {}
+
+
+def _sha256(dados):
+    return hashlib.sha256(dados).hexdigest()
+
+
+def _hash_arquivo(caminho):
+    digest = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for pedaco in iter(lambda: f.read(1 << 20), b""):
+            digest.update(pedaco)
+    return digest.hexdigest()
+
+
+def _caminho_meta(url):
+    return PASTA_CACHE / "meta" / f"{_sha256(url.encode('utf-8'))}.json"
+
+
+def _caminho_blob(digest):
+    return PASTA_CACHE / "blobs" / digest
+
+
+def _gravar_atomico(caminho, dados):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(caminho.name + ".tmp")
+    with open(temporario, "wb") as f:
+        f.write(dados)
+    os.replace(temporario, caminho)
+
+
+def _ler_meta(url):
+    try:
+        with open(_caminho_meta(url), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_meta(url, meta):
+    try:
+        _gravar_atomico(_caminho_meta(url), json.dumps(meta, indent=2).encode("utf-8"))
+    except OSError as e:
+        print(f"[⚠️ Aviso] Não foi possível gravar o cache da planilha: {e}")
+
+
+def _ler_blob(meta):
+    if not meta or not meta.get("sha256"):
+        return None
+    try:
+        with open(_caminho_blob(meta["sha256"]), "rb") as f:
+            dados = f.read()
+    except OSError:
+        return None
+    # Descarta blobs corrompidos
+    return dados if _sha256(dados) == meta["sha256"] else None
+
+
+def _gravar_blob(dados):
+    digest = _sha256(dados)
+    caminho = _caminho_blob(digest)
+    if not caminho.exists():
+        try:
+            _gravar_atomico(caminho, dados)
+        except OSError as e:
+            print(f"[⚠️ Aviso] Não foi possível gravar o cache da planilha: {e}")
+    return digest
+
+
+def _cabecalhos_condicionais(meta):
+    cabecalhos = {}
+    if meta.get("etag"):
+        cabecalhos["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        cabecalhos["If-Modified-Since"] = meta["last_modified"]
+    return cabecalhos
+
+
+def buscar_planilha(url, timeout=TIMEOUT):
+    """Baixa a planilha uma vez, revalidando o cache local com GET condicional.
+
+    Se o servidor responder 304, ou se a rede falhar, usa a última cópia em disco.
+    """
+    if os.path.exists(url):
+        with open(url, "rb") as f:
+            conteudo = f.read()
+        _memoria[url] = conteudo
+        return conteudo
+
+    meta = _ler_meta(url)
+    em_cache = _ler_blob(meta)
+
+    cabecalhos = _cabecalhos_condicionais(meta) if em_cache is not None else {}
+    try:
+        requisicao = urllib.request.Request(url, headers=cabecalhos)
+        with urllib.request.urlopen(requisicao, timeout=timeout) as resposta:
+            conteudo = resposta.read()
+            meta = {
+                "url": url,
+                "sha256": _gravar_blob(conteudo),
+                "etag": resposta.headers.get("ETag"),
+                "last_modified": resposta.headers.get("Last-Modified"),
+                "baixado_em": time.time(),
+            }
+    except urllib.error.HTTPError as e:
+        if e.code != 304 or em_cache is None:
+            raise
+        conteudo = em_cache
+    except (urllib.error.URLError, OSError) as e:
+        if em_cache is None:
+            raise
+        print(f"[⚠️ Aviso] Sem conexão ({e}); usando cópia local de {time.ctime(meta['baixado_em'])}.")
+        conteudo = em_cache
+        _memoria[url] = conteudo
+        return conteudo
+
+    meta["verificado_em"] = time.time()
+    _gravar_meta(url, meta)
+    _memoria[url] = conteudo
+    return conteudo
+
+
+def conteudo_planilha(url):
+    """Retorna os bytes da última busca da URL, baixando apenas se ainda não houver."""
+    if url in _memoria:
+        return _memoria[url]
+    if url in _sessao:
+        try:
+            with open(_caminho_blob(_sessao[url]), "rb") as f:
+                return f.read()
+        except OSError:
+            pass
+    return buscar_planilha(url)
+
+
+def impressao_planilha(url):
+    """Hash do conteúdo da última versão lida da planilha, ou None se ainda não foi lida."""
+    if url in _memoria:
+        return _sha256(_memoria[url])
+    if url in _sessao:
+        return _sessao[url]
+    if os.path.exists(url):
+        return _hash_arquivo(url)
+    return None
+
+
+def ler_planilha(url, **kwargs):
+    """Equivalente a pd.read_csv(url), mas compartilhando o download entre os consumidores."""
+    return pd.read_csv(io.BytesIO(conteudo_planilha(url)), **kwargs)
+
+
+class _CopiaParaCache(io.RawIOBase):
+    """Repassa a resposta HTTP ao leitor de CSV gravando uma cópia para o cache."""
+
+    def __init__(self, resposta, destino):
+        self._resposta = resposta
+        self._destino = destino
+        self.hash = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        dados = self._resposta.read(len(buffer))
+        if self._destino is not None:
+            self._destino.write(dados)
+        self.hash.update(dados)
+        buffer[:len(dados)] = dados
+        return len(dados)
+
+
+def ler_planilha_em_blocos(url, tamanho_bloco=5000, timeout=TIMEOUT, ja_lido=None, **kwargs):
+    """Lê a planilha em blocos de linhas enquanto o download avança.
+
+    Usa o mesmo cache e a mesma revalidação de buscar_planilha, mas grava o
+    conteúdo em disco durante a leitura em vez de mantê-lo inteiro na memória.
+    Ao terminar, conteudo_planilha passa a ler esta versão do disco.
+    Se o conteúdo ainda for o de hash ja_lido, nenhum bloco é gerado.
+    """
+    if os.path.exists(url):
+        _memoria.pop(url, None)
+        if ja_lido is not None and _hash_arquivo(url) == ja_lido:
+            return
+        yield from pd.read_csv(url, chunksize=tamanho_bloco, **kwargs)
+        return
+
+    meta = _ler_meta(url)
+    em_cache = bool(meta and meta.get("sha256") and _caminho_blob(meta["sha256"]).exists())
+    cabecalhos = _cabecalhos_condicionais(meta) if em_cache else {}
+    try:
+        requisicao = urllib.request.Request(url, headers=cabecalhos)
+        resposta = urllib.request.urlopen(requisicao, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code != 304 or not em_cache:
+            raise
+        meta["verificado_em"] = time.time()
+        _gravar_meta(url, meta)
+        resposta = None
+    except (urllib.error.URLError, OSError) as e:
+        if not em_cache:
+            raise
+        print(f"[⚠️ Aviso] Sem conexão ({e}); usando cópia local de {time.ctime(meta['baixado_em'])}.")
+        resposta = None
+
+    if resposta is None:
+        _memoria.pop(url, None)
+        _sessao[url] = meta["sha256"]
+        if meta["sha256"] == ja_lido:
+            return
+        yield from pd.read_csv(_caminho_blob(meta["sha256"]), chunksize=tamanho_bloco, **kwargs)
+        return
+
+    temporario = PASTA_CACHE / "blobs" / f"{_sha256(url.encode('utf-8'))}.parcial"
+    try:
+        temporario.parent.mkdir(parents=True, exist_ok=True)
+        destino = open(temporario, "wb")
+    except OSError as e:
+        print(f"[⚠️ Aviso] Não foi possível gravar o cache da planilha: {e}")
+        destino = None
+
+    try:
+        with resposta:
+            copia = _CopiaParaCache(resposta, destino)
+            yield from pd.read_csv(io.BufferedReader(copia), chunksize=tamanho_bloco, **kwargs)
+            # Garante que o restante da resposta também chegue ao cache
+            while copia.readinto(bytearray(65536)):
+                pass
+        if destino is not None:
+            destino.close()
+            digest = copia.hash.hexdigest()
+            os.replace(temporario, _caminho_blob(digest))
+            _gravar_meta(url, {
+                "url": url,
+                "sha256": digest,
+                "etag": resposta.headers.get("ETag"),
+                "last_modified": resposta.headers.get("Last-Modified"),
+                "baixado_em": time.time(),
+                "verificado_em": time.time(),
+            })
+            _memoria.pop(url, None)
+            _sessao[url] = digest
+    finally:
+        if destino is not None:
+            destino.close()
+            if temporario.exists():
+                temporario.unlink()
@@ -0,0 +1,93 @@
+# cache_relatorios.py
+
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def chave_filtro(selecoes, texto_busca=""):
+    """Chave normalizada do estado dos filtros: a ordem em que os autores foram marcados não importa."""
+    chave = []
+    for coluna in sorted(selecoes):
+        valores = selecoes[coluna]
+        if valores:
+            chave.append((coluna, tuple(sorted(valores, key=str))))
+    if texto_busca:
+        chave.append(("Busca", " ".join(texto_busca.split())))
+    return tuple(chave)
+
+
+def tamanho_estimado(valor):
+    """Bytes ocupados por um relatório (tabelas pandas, textos e objetos que os contêm)."""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamanho_estimado(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(tamanho_estimado(v) for v in valor)
+    if hasattr(valor, "__dict__"):
+        return sys.getsizeof(valor) + tamanho_estimado(vars(valor))
+    return sys.getsizeof(valor)
+
+
+class CacheRelatorios:
+    """Relatórios de métricas mais recentes por (versão dos dados, filtro), com limite de itens e de memória.
+
+    Quando um dos limites é ultrapassado, sai o relatório usado há mais tempo.
+    Pode ser consultado da thread da interface e das threads de cálculo.
+    """
+
+    def __init__(self, max_itens=32, max_bytes=128 * 1024 * 1024):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    def obter(self, chave, calcular):
+        """Relatório guardado para a chave; se não houver, calcular() e guarda o resultado."""
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave][0]
+            self.falhas += 1
+        # O cálculo fica fora da trava: a interface pode consultar as estatísticas enquanto isso
+        valor = calcular()
+        tamanho = tamanho_estimado(valor)
+        with self._trava:
+            if chave in self._itens:
+                self._bytes -= self._itens.pop(chave)[1]
+            self._itens[chave] = (valor, tamanho)
+            self._bytes += tamanho
+            while len(self._itens) > 1 and (len(self._itens) > self.max_itens or self._bytes > self.max_bytes):
+                _, (_, removido) = self._itens.popitem(last=False)
+                self._bytes -= removido
+                self.descartes += 1
+        return valor
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                "itens": len(self._itens),
+                "max_itens": self.max_itens,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "descartes": self.descartes,
+                "taxa_acertos": self.acertos / consultas if consultas else 0.0,
+            }
@@ -0,0 +1,246 @@
+# carregamento.py
+
+import threading
+import time
+import traceback
+
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from cache_planilha import impressao_planilha, ler_planilha_em_blocos
+from pipeline_dados import concatenar
+from metricas import TotaisParciais, calcular_metricas, calcular_metricas_detalhadas, resumo_metricas
+from bib import processar_entrada_bibtex, processar_visualizacao_formatada, processar_estatisticas_bibtex
+from processador_referencias import extrair_campos_apa, juntar_referencias, separar_referencias
+from snapshot import ler_meta, salvar_snapshot
+from orquestrador import GrafoEtapas
+from indices import IndicesFiltro
+from busca import IndiceTexto, BuscaTextual, textos_para_busca
+from cubo import CuboMetricas
+from cache_relatorios import CacheRelatorios, chave_filtro
+
+
+class CarregamentoCancelado(Exception):
+    pass
+
+
+# Linhas da planilha lidas e expandidas de cada vez
+TAMANHO_BLOCO = 2000
+
+
+def _etapa_dados(carregador):
+    """Baixa e expande a planilha; a versão é o hash do conteúdo."""
+    carregador._etapa(0, "Baixando planilha...")
+    url = carregador.url
+    guardada = carregador.grafo.versao("dados")
+    ja_lido = guardada[1] if guardada is not None and guardada[0] == url else None
+
+    # Cada bloco é expandido assim que chega, enquanto o restante ainda é baixado
+    totais = TotaisParciais()
+    partes = []
+    for bloco in carregador.expansao.preparar_em_blocos(carregador._blocos(ja_lido)):
+        totais.adicionar(bloco)
+        carregador.parcial.emit(None if partes else bloco, totais.texto())
+        partes.append(bloco)
+    if not partes and ja_lido is not None:
+        # Mesmo conteúdo da versão já expandida: nada foi lido de novo
+        carregador.alteracoes = {"adicionadas": 0, "alteradas": 0, "removidas": 0}
+        return carregador.grafo.valor("dados"), guardada
+
+    df = concatenar(partes)
+    carregador.alteracoes = dict(carregador.expansao.alteracoes)
+    carregador._etapa(50, "Gravando snapshot...")
+    sha256 = carregador._salvar_snapshot()
+    if sha256 is None:
+        # Sem cache gravado não há como comparar versões: trata como nova
+        return df, (url, time.time())
+    return df, (url, sha256)
+
+
+def _etapa_indices(contexto, df):
+    """Índices invertidos usados pelos filtros da tabela.
+
+    Também roda na thread da interface ao abrir um snapshot, por isso não informa progresso.
+    """
+    return IndicesFiltro(df)
+
+
+def _etapa_referencias(carregador, df):
+    """Separa as referências e analisa os campos APA de cada uma."""
+    carregador._etapa(55, "Analisando referências...")
+    if "Ref" not in df.columns:
+        return {}
+    refs = separar_referencias(juntar_referencias(df["Ref"]))
+    return {ref: extrair_campos_apa(ref) for ref in dict.fromkeys(refs)}
+
+
+def _etapa_bibtex(carregador, df, campos):
+    carregador._etapa(80, "Processando BibTeX...")
+    return {
+        "entrada_bibtex": processar_entrada_bibtex(df),
+        "visualizacao_bibtex": processar_visualizacao_formatada(df),
+        "estatisticas_bibtex": processar_estatisticas_bibtex(df),
+    }
+
+
+def _etapa_resumo(contexto, df):
+    """Totais mostrados abaixo da tabela; rápido, roda a cada atualização."""
+    return resumo_metricas(df)
+
+
+def _etapa_metricas(carregador, df):
+    """Objetos Metricas e MetricasDetalhadas; se um cálculo falha, o texto do erro no lugar."""
+    return _calcular_relatorios(carregador, df)
+
+
+def _calcular_relatorios(carregador, df):
+    carregador._etapa(60, "Calculando métricas...")
+    try:
+        metricas = calcular_metricas(df)
+    except Exception as e:
+        metricas = f"Erro ao calcular métricas:\n{e}"
+    carregador._etapa(70, "Calculando métricas detalhadas...")
+    try:
+        detalhes = calcular_metricas_detalhadas(df)
+    except Exception as e:
+        detalhes = f"Erro ao calcular métricas detalhadas:\n{e}"
+    return {"metricas": metricas, "detalhes": detalhes}
+
+
+def _etapa_filtro(carregador):
+    """Filtros da tabela: a janela os registra com grafo.definir; aqui só repete o último."""
+    return carregador.grafo.valor("filtro"), carregador.grafo.versao("filtro")
+
+
+def _etapa_relatorio_filtro(carregador, df, indices, busca, filtro):
+    """Métricas completas das linhas do filtro atual; None sem filtro (são as da etapa metricas)."""
+    selecoes, texto_busca = filtro
+    chave = chave_filtro(selecoes, texto_busca)
+    if not chave:
+        return None
+
+    def calcular():
+        linhas = indices.filtrar(selecoes)
+        encontradas = busca.linhas(texto_busca) if texto_busca else None
+        if encontradas is not None:
+            linhas = encontradas if linhas is None else np.intersect1d(linhas, encontradas, assume_unique=True)
+        return _calcular_relatorios(carregador, df if linhas is None else df.iloc[linhas])
+
+    # Voltar a um filtro já visto nesta versão dos dados não recalcula nada
+    return relatorios_filtro.obter((carregador.grafo.versao("dados"), chave), calcular)
+
+
+def _etapa_cubo(contexto, df):
+    """Contagens por região, país, ano, publicação e delineamento para as métricas do filtro atual."""
+    return CuboMetricas(df)
+
+
+def _etapa_busca(carregador, df):
+    """Índice de texto completo; só os textos que mudaram desde a versão anterior são tokenizados."""
+    carregador._etapa(90, "Indexando texto para a busca...")
+    anterior = carregador.grafo.valor("busca")
+    indice = anterior.indice if anterior is not None else IndiceTexto()
+    return BuscaTextual(indice.atualizado(textos_para_busca(df)), df)
+
+
+# Relatórios dos filtros recentes, compartilhados entre carregamentos
+relatorios_filtro = CacheRelatorios()
+
+# Etapas executadas fora da thread da interface, a cada atualização; as de
+# métricas e BibTeX só rodam quando a aba que as mostra está visível
+ETAPAS_FUNDO = ("dados", "indices", "resumo", "cubo", "busca")
+
+
+def criar_grafo():
+    """Grafo das etapas de carregamento: dados → referências → BibTeX, dados → métricas e índices."""
+    grafo = GrafoEtapas()
+    grafo.adicionar("dados", _etapa_dados)
+    grafo.adicionar("indices", _etapa_indices, depende=("dados",))
+    grafo.adicionar("resumo", _etapa_resumo, depende=("dados",))
+    grafo.adicionar("referencias", _etapa_referencias, depende=("dados",))
+    grafo.adicionar("metricas", _etapa_metricas, depende=("dados",))
+    grafo.adicionar("bibtex", _etapa_bibtex, depende=("dados", "referencias"))
+    grafo.adicionar("busca", _etapa_busca, depende=("dados",))
+    grafo.adicionar("cubo", _etapa_cubo, depende=("dados",))
+    grafo.adicionar("filtro", _etapa_filtro)
+    grafo.definir("filtro", ({}, ""), chave_filtro({}))
+    grafo.adicionar(
+        "relatorio_filtro", _etapa_relatorio_filtro, depende=("dados", "indices", "busca", "filtro"))
+    return grafo
+
+
+class CarregadorDados(QThread):
+    """Executa download, expansões e métricas fora da thread da interface.
+
+    As etapas ficam no grafo compartilhado com a janela, então só é refeito o
+    que depende de uma versão da planilha ainda não processada.
+    """
+
+    # Um carregamento cancelado termina a etapa atual antes que o próximo comece
+    _em_execucao = threading.Lock()
+
+    progresso = pyqtSignal(int, str)
+    # Nome de cada etapa do grafo assim que ela fica em dia
+    etapa_pronta = pyqtSignal(str)
+    # Primeiro bloco já expandido (None nos seguintes) e totais acumulados até agora
+    parcial = pyqtSignal(object, str)
+    concluido = pyqtSignal(dict)
+    falhou = pyqtSignal(str)
+    cancelado = pyqtSignal()
+
+    def __init__(self, url, expansao, grafo, parent=None, alvos=ETAPAS_FUNDO, atualizar_origens=True):
+        super().__init__(parent)
+        self.url = url
+        self.expansao = expansao
+        self.grafo = grafo
+        self.alvos = tuple(alvos)
+        # False: só calcula etapas derivadas da versão já carregada (ex.: ao abrir uma aba)
+        self.atualizar_origens = atualizar_origens
+        self.alteracoes = {"adicionadas": 0, "alteradas": 0, "removidas": 0}
+        self._cancelar = False
+
+    def cancelar(self):
+        self._cancelar = True
+
+    def _verificar_cancelamento(self, nome=None):
+        if self._cancelar:
+            raise CarregamentoCancelado()
+
+    def _etapa(self, percentual, mensagem):
+        self._verificar_cancelamento()
+        self.progresso.emit(percentual, mensagem)
+
+    def _blocos(self, ja_lido=None):
+        lidas = 0
+        for bloco in ler_planilha_em_blocos(self.url, TAMANHO_BLOCO, ja_lido=ja_lido):
+            lidas += len(bloco)
+            self._etapa(10, f"Lendo planilha... {lidas} linhas")
+            yield bloco
+
+    def _salvar_snapshot(self):
+        # Só regrava quando o conteúdo da planilha mudou desde o último snapshot
+        sha256 = impressao_planilha(self.url)
+        meta = ler_meta(self.url)
+        if meta is not None and sha256 is not None and meta["sha256"] == sha256:
+            return sha256
+        try:
+            salvar_snapshot(self.url, sha256, self.expansao)
+        except Exception as e:
+            print(f"[⚠️ Aviso] Não foi possível gravar o snapshot: {e}")
+        return sha256
+
+    def run(self):
+        try:
+            with CarregadorDados._em_execucao:
+                self.grafo.executar(
+                    self.alvos, self, atualizar_origens=self.atualizar_origens,
+                    ao_concluir=self.etapa_pronta.emit,
+                    # Um carregamento cancelado não troca os resultados que a janela está usando
+                    antes_de_gravar=self._verificar_cancelamento)
+            self._etapa(100, "Dados carregados.")
+            self.concluido.emit({"alteracoes": self.alteracoes})
+        except CarregamentoCancelado:
+            self.cancelado.emit()
+        except Exception as e:
+            traceback.print_exc()
+            self.falhou.emit(str(e))
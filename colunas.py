@@ -0,0 +1,18 @@
+# colunas.py
+
+import pandas as pd
+
+
+def listas_por_linha(serie, separar, distintos=False):
+    """Lista de partes de cada linha, com o mesmo índice da série ([] se ausente).
+
+    separar(valor) é chamado uma só vez por valor distinto da coluna. Com
+    distintos=True, uma parte repetida no mesmo valor aparece uma vez.
+    """
+    codigos, unicos = pd.factorize(serie)
+    listas = []
+    for valor in unicos:
+        partes = separar(valor)
+        listas.append(list(dict.fromkeys(partes)) if distintos else list(partes))
+    # A última lista (vazia) atende às linhas ausentes, de código -1
+    return pd.Series(listas + [[]], dtype=object).iloc[codigos].set_axis(serie.index)
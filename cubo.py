@@ -0,0 +1,138 @@
+# cubo.py
+
+import numpy as np
+import pandas as pd
+
+from colunas import listas_por_linha
+from paises import normalizar_paises
+
+
+def _separar_virgulas(texto):
+    return [parte.strip() for parte in str(texto).split(",")]
+
+
+# Dimensões do cubo e, para as de vários valores por célula, como separá-los
+DIMENSOES = {
+    "Region": None,
+    "country": normalizar_paises,
+    "Ano": None,
+    "Public": _separar_virgulas,
+    "Design": None,
+}
+
+TITULOS = {
+    "Region": "🗺️ Regiões",
+    "country": "🌍 Países",
+    "Ano": "📅 Anos",
+    "Public": "📚 Tipos de publicação",
+    "Design": "🧪 Delineamentos",
+}
+
+
+def _incidencia(serie, separar=None):
+    """(linhas, códigos, valores): uma entrada por linha e valor não vazio da coluna."""
+    def partes(valor):
+        return [parte for parte in (separar(valor) if separar is not None else [valor]) if str(parte).strip() != ""]
+
+    explodido = listas_por_linha(serie.reset_index(drop=True), partes, distintos=True).explode().dropna()
+    codigos, valores = pd.factorize(explodido)
+    return explodido.index.to_numpy(dtype=np.intp), codigos.astype(np.intp), list(valores)
+
+
+class _Dimensao:
+    """Pares distintos (Num, valor) de uma dimensão e as linhas em que cada um aparece."""
+
+    def __init__(self, linhas, codigos, valores, num_da_linha):
+        self.valores = valores
+        nums = num_da_linha[linhas]
+        validas = nums >= 0
+        self.linhas = linhas[validas]
+        # Cada par (Num, valor) vira um número; filtrar só marca os pares presentes
+        pares, unicos = pd.factorize(nums[validas].astype(np.int64) * max(len(valores), 1) + codigos[validas])
+        self.par = pares
+        self.valor_do_par = (unicos % max(len(valores), 1)).astype(np.intp)
+        self.total = np.bincount(self.valor_do_par, minlength=len(valores))
+
+    def contagens(self, marcadas):
+        """Referências únicas por valor entre as linhas marcadas (None: todas)."""
+        if marcadas is None:
+            return self.total
+        presentes = np.zeros(len(self.valor_do_par), dtype=bool)
+        presentes[self.par[marcadas[self.linhas]]] = True
+        return np.bincount(self.valor_do_par[presentes], minlength=len(self.valores))
+
+
+class CuboMetricas:
+    """Contagens de referências únicas (Num) por região, país, ano, publicação e delineamento.
+
+    Montado uma vez por versão dos dados a partir das linhas expandidas. Como
+    uma referência aparece em várias linhas, as contagens não podem ser somadas
+    entre células; por isso cada dimensão guarda seus pares (Num, valor)
+    distintos em arrays, e um filtro (posições de linhas) só marca os pares
+    presentes e conta por valor, sem voltar ao dataframe.
+    """
+
+    def __init__(self, df):
+        self.total_linhas = len(df)
+        if "Num" in df.columns:
+            self._num_da_linha, numeros = pd.factorize(df["Num"])
+            self._quantidade_num = len(numeros)
+        else:
+            # Sem a coluna Num cada linha é uma referência
+            self._num_da_linha = np.arange(len(df))
+            self._quantidade_num = len(df)
+        self.dimensoes = {}
+        for coluna, separar in DIMENSOES.items():
+            if coluna in df.columns:
+                linhas, codigos, valores = _incidencia(df[coluna], separar)
+                self.dimensoes[coluna] = _Dimensao(linhas, codigos, valores, self._num_da_linha)
+
+    def _marcadas(self, linhas):
+        if linhas is None:
+            return None
+        marcadas = np.zeros(self.total_linhas, dtype=bool)
+        marcadas[linhas] = True
+        return marcadas
+
+    def referencias(self, linhas=None):
+        """Quantidade de referências únicas (Num) entre as linhas (None: todas)."""
+        if linhas is None:
+            return self._quantidade_num
+        nums = self._num_da_linha[linhas]
+        presentes = np.zeros(self._quantidade_num, dtype=bool)
+        presentes[nums[nums >= 0]] = True
+        return int(presentes.sum())
+
+    def contagens(self, linhas=None):
+        """{dimensão: Series valor → referências únicas}, da maior contagem para a menor."""
+        marcadas = self._marcadas(linhas)
+        resultado = {}
+        for coluna, dimensao in self.dimensoes.items():
+            contagem = dimensao.contagens(marcadas)
+            serie = pd.Series(contagem, index=pd.Index(dimensao.valores, dtype=object), name=coluna)
+            serie = serie[serie > 0]
+            if coluna == "Ano":
+                resultado[coluna] = serie.sort_index(key=lambda i: i.map(str))
+            else:
+                resultado[coluna] = serie.sort_values(ascending=False, kind="stable")
+        return resultado
+
+    def texto(self, linhas=None, limite=15):
+        """Relatório das contagens para as linhas filtradas."""
+        total = self.referencias(linhas)
+        if linhas is None:
+            partes = [f"📊 {total} referências únicas (Num)"]
+        else:
+            partes = [f"📊 {total} de {self._quantidade_num} referências únicas (Num) no filtro atual"]
+        for coluna, serie in self.contagens(linhas).items():
+            partes.extend(["", f"{TITULOS[coluna]}:"])
+            if serie.empty:
+                partes.append(" - (nenhum)")
+                continue
+            exibidos = serie if coluna == "Ano" else serie.head(limite)
+            partes.extend(
+                f" - {valor}: {quantidade} ({100 * quantidade / total:.1f}%)"
+                for valor, quantidade in exibidos.items())
+            if len(exibidos) < len(serie):
+                partes.append(f" - ... e mais {len(serie) - len(exibidos)}")
+        return "\n".join(partes) + "\n"
@@ -0,0 +1,85 @@
+# indices.py
+
+import numpy as np
+import pandas as pd
+
+from colunas import listas_por_linha
+from paises import normalizar_paises
+
+# Colunas com filtro na interface e, para as de vários valores por célula, como separá-los
+COLUNAS_FILTRO = {
+    "Region": None,
+    "Autores": None,
+    "country": normalizar_paises,
+    "Ano": None,
+}
+
+
+class IndiceInvertido:
+    """Para cada valor de uma coluna, as posições (ordenadas) das linhas que o contêm."""
+
+    def __init__(self, serie, separar=None):
+        if separar is None:
+            linhas, (codigos, unicos) = np.arange(len(serie)), pd.factorize(serie)
+        else:
+            # Cada valor distinto é separado uma só vez; a linha entra em todas as partes
+            explodido = listas_por_linha(serie.reset_index(drop=True), separar, distintos=True).explode().dropna()
+            linhas, (codigos, unicos) = explodido.index.to_numpy(dtype=np.intp), pd.factorize(explodido)
+        ordem = np.argsort(codigos, kind="stable")
+        contagem = np.bincount(codigos[codigos >= 0], minlength=len(unicos))
+        # Ausentes (código -1) ficam no começo da ordem e não entram no índice
+        inicio = len(codigos) - contagem.sum()
+        grupos = np.split(linhas[ordem[inicio:]], np.cumsum(contagem)[:-1])
+        self._linhas = dict(zip(unicos, grupos))
+
+    def __contains__(self, valor):
+        return valor in self._linhas
+
+    def valores(self):
+        return list(self._linhas)
+
+    def contagens(self):
+        return {valor: len(linhas) for valor, linhas in self._linhas.items()}
+
+    def linhas(self, valores):
+        """Posições das linhas com qualquer um dos valores."""
+        grupos = [self._linhas[v] for v in valores if v in self._linhas]
+        if not grupos:
+            return np.zeros(0, dtype=np.intp)
+        if len(grupos) == 1:
+            return grupos[0]
+        return np.unique(np.concatenate(grupos))
+
+
+class IndicesFiltro:
+    """Índices invertidos das colunas filtráveis, montados uma vez por versão dos dados."""
+
+    def __init__(self, df):
+        self.indices = {
+            coluna: IndiceInvertido(df[coluna], separar)
+            for coluna, separar in COLUNAS_FILTRO.items() if coluna in df.columns}
+
+    def __getitem__(self, coluna):
+        return self.indices[coluna]
+
+    def __contains__(self, coluna):
+        return coluna in self.indices
+
+    def filtrar(self, selecoes):
+        """Linhas que atendem a todos os filtros (qualquer valor dentro de cada coluna).
+
+        selecoes: {coluna: valores}. Retorna None quando nenhum filtro está ativo.
+        """
+        conjuntos = [
+            self.indices[coluna].linhas(valores) if coluna in self.indices else np.zeros(0, dtype=np.intp)
+            for coluna, valores in selecoes.items() if valores]
+        if not conjuntos:
+            return None
+        # Começa pelo menor conjunto para que cada interseção seja a mais barata possível
+        conjuntos.sort(key=len)
+        resultado = conjuntos[0]
+        for outro in conjuntos[1:]:
+            if not len(resultado):
+                break
+            resultado = np.intersect1d(resultado, outro, assume_unique=True)
+        return resultado
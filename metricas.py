@@ -1,364 +1,356 @@
-from collections import Counter, defaultdict
+from collections import Counter
+import importlib.util
+import numpy as np
 import pandas as pd
-import re
 import os
-from PyQt5.QtCore import QStandardPaths
-
-
-# Mapeamento para normalizar nomes de países
-mapa_paises = {
-    "Brazi": "Brazil",
-    "U.S": "USA",
-    "U.S.A": "USA",
-    "United States": "USA",
-    "United States of America": "USA",
-    "South Korea": "Republic of Korea",
-    "Korea": "Republic of Korea",
-    "UK": "United Kingdom",
-    "United Kingdom": "United Kingdom",
-    "Canada/Bermuda": "Canada",
-    "Argentina and Spain": "Argentina",
-    "Argentina and USA": "Argentina",
-    "USA and South Korea": "USA",
-    "USA and Taiwan": "USA",
-    "USA/Puerto Rico": "USA",
-}
-
-def normalizar_paises(pais):
-    if pd.isna(pais):
-        return []
+import sys
+
+# normalizar_paises e mapa_paises continuam disponíveis por aqui
+from paises import mapa_paises, normalizar_paises, paises_por_linha, explodir_paises
+
+
+class TotaisParciais:
+    """Acumula os totais de calcular_metricas bloco a bloco, durante a leitura."""
+
+    COLUNAS = ("Num", "Autores", "country", "Region", "Ano")
+
+    def __init__(self):
+        self.linhas = 0
+        self.presentes = set()
+        self.unicos = {coluna: set() for coluna in self.COLUNAS}
+
+    def adicionar(self, bloco: pd.DataFrame):
+        self.linhas += len(bloco)
+        for coluna, valores in self.unicos.items():
+            if coluna in bloco.columns:
+                self.presentes.add(coluna)
+                if coluna == "country":
+                    # Países contados já separados e normalizados, como em totais_metricas
+                    valores.update(p for texto in bloco[coluna].dropna().unique() for p in normalizar_paises(texto))
+                else:
+                    valores.update(bloco[coluna].dropna().unique())
+
+    def texto(self) -> str:
+        total_refs = len(self.unicos["Num"]) if "Num" in self.presentes else self.linhas
+        return _formatar_resumo({
+            "referencias": total_refs,
+            "autores": len(self.unicos["Autores"]),
+            "paises": len(self.unicos["country"]),
+            "regioes": len(self.unicos["Region"]),
+            "anos": len(self.unicos["Ano"]),
+        })
 
-    pais = pais.strip()
 
-    # Expressão regular para dividir corretamente os países
-    pattern = re.compile(
-        r'((?:St\s+[^\s,;/]+(?:\s+[^\s,;/]+)*)|(?:[^,;/&]+(?:\s*&\s*[^,;/&]+)+)|[^,;/&]+)', 
-        re.IGNORECASE
+def _formatar_resumo(totais: dict) -> str:
+    return (
+        f"📊 {totais['referencias']} referências únicas (Num) | "
+        f"{totais['autores']} autores únicos | "
+        f"{totais['paises']} países | "
+        f"{totais['regioes']} regiões | "
+        f"{totais['anos']} anos distintos"
     )
 
-    matches = pattern.findall(pais)
-    paises_normalizados = []
 
-    for match in matches:
-        p = match.strip()
-        if not p:
-            continue
-        p = re.sub(r'\s*&\s*', ' & ', p)  # Padroniza espaços ao redor de &
-        p = mapa_paises.get(p, p)  # Normaliza nome se estiver no dicionário
-        paises_normalizados.append(p)
+def totais_metricas(dataframe: pd.DataFrame) -> dict:
+    """Totais principais: referências (Num), autores, países, regiões e anos distintos."""
+    return {
+        "referencias": dataframe["Num"].nunique() if "Num" in dataframe.columns else len(dataframe),
+        "autores": dataframe["Autores"].nunique() if "Autores" in dataframe.columns else 0,
+        "paises": explodir_paises(dataframe["country"]).nunique() if "country" in dataframe.columns else 0,
+        "regioes": dataframe["Region"].nunique() if "Region" in dataframe.columns else 0,
+        "anos": dataframe["Ano"].nunique() if "Ano" in dataframe.columns else 0,
+    }
 
-    return paises_normalizados
 
-def calcular_metricas(dataframe: pd.DataFrame) -> str:
-    """Calcula métricas descritivas e contagens únicas por país e região."""
+def resumo_metricas(dataframe: pd.DataFrame) -> str:
+    """Primeira linha de calcular_metricas: os totais principais."""
 
     if dataframe.empty:
         return "Nenhum dado carregado."
+    return _formatar_resumo(totais_metricas(dataframe))
+
+
+def _contar_em_ordem(valores: pd.Series) -> list:
+    """(valor, ocorrências) do mais frequente ao menos; empates na ordem de aparição."""
+    codigos, unicos = pd.factorize(valores)
+    if not len(unicos):
+        return []
+    contagens = np.bincount(codigos[codigos >= 0], minlength=len(unicos))
+    ordem = np.argsort(-contagens, kind="stable")
+    return list(zip(unicos[ordem].tolist(), contagens[ordem].tolist()))
+
+
+def _tabela(linhas, colunas) -> pd.DataFrame:
+    return pd.DataFrame(list(linhas), columns=list(colunas))
+
+
+def _linhas_exportacao(*blocos):
+    """Junta blocos (nome, tabela) lado a lado, completando os menores com células vazias."""
+    total = max((len(tabela) for _, tabela in blocos), default=0)
+    nomes, colunas = [], []
+    for nomes_bloco, tabela in blocos:
+        for nome, posicao in zip(nomes_bloco, range(tabela.shape[1])):
+            valores = [str(v) for v in tabela.iloc[:, posicao].tolist()]
+            nomes.append(nome)
+            colunas.append(valores + [""] * (total - len(valores)))
+    # Os nomes podem se repetir (ex.: "Valor" em cada bloco)
+    tabela = pd.DataFrame(dict(enumerate(colunas)), index=range(total))
+    tabela.columns = nomes
+    return tabela
+
+
+class Metricas:
+    """Resultado de calcular_metricas: os totais e uma tabela por bloco do relatório.
+
+    texto() monta o relatório exibido na aba Métricas; tabela_exportacao() é o
+    que vai para metricas.csv. Ambos partem das mesmas tabelas.
+    """
+
+    def __init__(self, totais=None, autores=None, paises=None, regioes=None):
+        # totais None: nenhum dado carregado
+        self.totais = totais
+        self.autores = autores if autores is not None else _tabela([], ("Autor", "Aparições"))
+        self.paises = paises if paises is not None else _tabela([], ("País", "Trabalhos"))
+        # None quando a planilha não tem as colunas Num e Region
+        self.regioes = regioes
+
+    @property
+    def resumo(self) -> str:
+        return "Nenhum dado carregado." if self.totais is None else _formatar_resumo(self.totais)
+
+    def tabelas(self) -> dict:
+        tabelas = {"Autores": self.autores, "Países": self.paises, "Regiões": self.regioes}
+        return {nome: tabela for nome, tabela in tabelas.items() if tabela is not None}
+
+    def texto(self) -> str:
+        if self.totais is None:
+            return self.resumo
+        linhas = [self.resumo, ""]
+
+        linhas.append("👤 Autores:" if len(self.autores) else "👤 Nenhum autor.")
+        linhas.extend(f" - {autor}: {freq}" for autor, freq in self.autores.itertuples(index=False))
+
+        if len(self.paises):
+            linhas.extend(["", "🌍 Contagem de trabalhos únicos por país:"])
+            linhas.extend(f" - {pais}: {freq}" for pais, freq in self.paises.itertuples(index=False))
+        else:
+            linhas.extend(["", "🌍 Nenhum dado de país disponível."])
+
+        if self.regioes is not None:
+            linhas.extend(["", "🗺️ Contagem de trabalhos únicos por região:"])
+            linhas.extend(f" - {regiao}: {freq}" for regiao, freq in self.regioes.itertuples(index=False))
+        else:
+            linhas.extend(["", "🗺️ Nenhum dado de região disponível."])
+
+        return "\n".join(linhas) + "\n"
+
+    def __str__(self):
+        return self.texto()
+
+    def tabela_exportacao(self) -> pd.DataFrame:
+        """Regiões, países e autores lado a lado, no formato de metricas.csv."""
+        regioes = self.regioes if self.regioes is not None else _tabela([], ("Região", "Trabalhos"))
+        return _linhas_exportacao(
+            (("Região", "Num1"), regioes),
+            (("País", "Num2"), self.paises),
+            (("Autor", "Num3"), self.autores))
+
+
+def calcular_metricas(dataframe: pd.DataFrame) -> Metricas:
+    """Calcula métricas descritivas e contagens únicas por país e região."""
 
-    # Totais principais
-    total_refs = dataframe["Num"].nunique() if "Num" in dataframe.columns else len(dataframe)
-    total_autores = dataframe["Autores"].nunique() if "Autores" in dataframe.columns else 0
-    total_paises = dataframe["country"].nunique() if "country" in dataframe.columns else 0
-    total_regioes = dataframe["Region"].nunique() if "Region" in dataframe.columns else 0
-    total_anos = dataframe["Ano"].nunique() if "Ano" in dataframe.columns else 0
+    if dataframe.empty:
+        return Metricas()
 
-    # 📌 Autores com 2+ aparições
+    # 📌 Autores (cada nome separado por vírgula conta uma aparição)
     autores_frequentes = []
     if "Autores" in dataframe.columns:
-        lista_autores = dataframe["Autores"].dropna().apply(lambda x: [a.strip() for a in x.split(",")])
-        todos_autores = [autor for sublist in lista_autores for autor in sublist if autor]
-        contagem_autores = Counter(todos_autores)
-        autores_frequentes = [(a, f) for a, f in contagem_autores.items()]
-    #    autores_frequentes = [(a, f) for a, f in contagem_autores.items() if f >= 2]
+        autores = dataframe["Autores"].dropna().astype(str).str.split(",").explode().str.strip()
+        autores_frequentes = _contar_em_ordem(autores[autores != ""])
 
-    # 📌 Contagem por país (único por Num)
-    contagem_paises = defaultdict(int)
+    # 📌 Contagem por país (uma vez por par Num/country em que o país aparece)
+    contagem_paises = []
     if {"Num", "country"}.issubset(dataframe.columns):
         df_pais = dataframe[["Num", "country"]].dropna().drop_duplicates()
         df_pais = df_pais[df_pais["country"].str.strip() != ""]
-        for _, row in df_pais.iterrows():
-            for pais in set(normalizar_paises(row["country"])):
-                contagem_paises[pais] += 1
+        contagem_paises = _contar_em_ordem(explodir_paises(df_pais["country"], distintos=True))
 
     # 📌 Contagem por região (único por Num)
-    contagem_regioes = []
+    contagem_regioes = None
     if {"Num", "Region"}.issubset(dataframe.columns):
         df_regiao = dataframe[["Num", "Region"]].dropna().drop_duplicates()
         df_regiao = df_regiao[df_regiao["Region"].str.strip() != ""]
-        contagem_regioes = df_regiao.groupby("Region")["Num"].nunique().items()
-
-    # 🔎 Montagem do relatório
-    texto = (
-        f"📊 {total_refs} referências únicas (Num) | "
-        f"{total_autores} autores únicos | "
-        f"{total_paises} países | "
-        f"{total_regioes} regiões | "
-        f"{total_anos} anos distintos\n"
-    )
-
-    texto += "\n👤 Autores:\n" if autores_frequentes else "\n👤 Nenhum autor.\n"
-    for autor, freq in sorted(autores_frequentes, key=lambda x: x[1], reverse=True):
-        texto += f" - {autor}: {freq}\n"
-
-    if contagem_paises:
-        texto += "\n🌍 Contagem de trabalhos únicos por país:\n"
-        for pais, freq in sorted(contagem_paises.items(), key=lambda x: x[1], reverse=True):
-            texto += f" - {pais}: {freq}\n"
-    else:
-        texto += "\n🌍 Nenhum dado de país disponível.\n"
-
-    if contagem_regioes:
-        texto += "\n🗺️ Contagem de trabalhos únicos por região:\n"
-        regioes_ordenadas = sorted(contagem_regioes, key=lambda x: x[1], reverse=True)
-        for regiao, freq in regioes_ordenadas:
-            texto += f" - {regiao}: {freq}\n"
-    else:
-        texto += "\n🗺️ Nenhum dado de região disponível.\n"
-
-    return texto
-
-
-def exportar_metricas_texto_para_csv(texto: str):
-        """Recebe o texto das métricas formatado e salva como CSV na pasta principal."""
-
-        blocos = {
-            "🗺️ Contagem de trabalhos únicos por região:": [],
-            "🌍 Contagem de trabalhos únicos por país:": [],
-            "👤 Autores:": []  # Corrigido para corresponder ao texto gerado
+        contagem_regioes = df_regiao.groupby("Region", observed=True)["Num"].nunique().items()
+        contagem_regioes = sorted(contagem_regioes, key=lambda x: x[1], reverse=True)
+
+    return Metricas(
+        totais_metricas(dataframe),
+        _tabela(autores_frequentes, ("Autor", "Aparições")),
+        _tabela(contagem_paises, ("País", "Trabalhos")),
+        None if contagem_regioes is None else _tabela(contagem_regioes, ("Região", "Trabalhos")))
+
+
+class MetricasDetalhadas:
+    """Resultado de calcular_metricas_detalhadas: uma tabela por bloco (None se falta a coluna)."""
+
+    def __init__(self, publicacoes=None, delineamentos=None, paises=None, regioes=None,
+                 autores=None, media_autores=None, anos=None, combinacoes=None, vazio=False):
+        self.vazio = vazio
+        self.publicacoes = publicacoes
+        self.delineamentos = delineamentos
+        self.paises = paises
+        self.regioes = regioes
+        self.autores = autores
+        self.media_autores = media_autores
+        self.anos = anos
+        self.combinacoes = combinacoes
+
+    def tabelas(self) -> dict:
+        tabelas = {
+            "Publicações": self.publicacoes,
+            "Delineamentos": self.delineamentos,
+            "Países": self.paises,
+            "Regiões": self.regioes,
+            "Autores": self.autores,
+            "Anos": self.anos,
+            "Combinações país-autor": self.combinacoes,
         }
-
-        bloco_atual = None
-        for linha in texto.strip().splitlines():
-            linha = linha.strip()
-            if linha in blocos:
-                bloco_atual = linha
-            elif linha and bloco_atual and linha != "👤 Nenhum autor.":
-                blocos[bloco_atual].append(linha)
-
-        def separar_nome_valor(lista):
-            nomes, valores = [], []
-            for item in lista:
-                if ':' in item:
-                    nome, valor = item.split(':', 1)
-                    nomes.append(nome.strip(' -'))
-                    valores.append(valor.strip())
-                else:
-                    nomes.append(item.strip(' -'))
-                    valores.append("")
-            return nomes, valores
-
-        # Corrigido para usar as chaves corretas
-        regioes, qtd_regioes = separar_nome_valor(blocos["🗺️ Contagem de trabalhos únicos por região:"])
-        paises, qtd_paises = separar_nome_valor(blocos["🌍 Contagem de trabalhos únicos por país:"])
-        autores, qtd_autores = separar_nome_valor(blocos["👤 Autores:"])
-
-        max_linhas = max(len(regioes), len(paises), len(autores))
-        while len(regioes) < max_linhas:
-            regioes.append("")
-            qtd_regioes.append("")
-        while len(paises) < max_linhas:
-            paises.append("")
-            qtd_paises.append("")
-        while len(autores) < max_linhas:
-            autores.append("")
-            qtd_autores.append("")
-
-        df = pd.DataFrame({
-            "Região": regioes,
-            "Num1": qtd_regioes,
-            "País": paises,
-            "Num2": qtd_paises,
-            "Autor": autores,
-            "Num3": qtd_autores
-        })
-        desktop = QStandardPaths.writableLocation(QStandardPaths.DesktopLocation)
-
-        # Caminho para a pasta PYMT dentro da área de trabalho
-        pasta_pymt = os.path.join(desktop, "PYMT")
-
-        # Cria a pasta se ela não existir
-        os.makedirs(pasta_pymt, exist_ok=True)
-
-        # Caminho completo do arquivo a ser salvo
-        file_path = os.path.join(pasta_pymt, "metricas.csv")
-
-
-        try:
-            df.to_csv(file_path, index=False)
-            print(f"Arquivo salvo com sucesso em: {file_path}")
-        except Exception as e:
-            print(f"Erro ao salvar arquivo: {e}")
-
-
-def exportar_metricas_texto_para_csv(texto: str):
-        """Recebe o texto das métricas formatado e salva como CSV na pasta principal."""
-
-        blocos = {
-            "🗺️ Contagem de trabalhos únicos por região:": [],
-            "🌍 Contagem de trabalhos únicos por país:": [],
-            "👤 Autores:": []  # Corrigido para corresponder ao texto gerado
-        }
-
-        bloco_atual = None
-        for linha in texto.strip().splitlines():
-            linha = linha.strip()
-            if linha in blocos:
-                bloco_atual = linha
-            elif linha and bloco_atual and linha != "👤 Nenhum autor.":
-                blocos[bloco_atual].append(linha)
-
-        def separar_nome_valor(lista):
-            nomes, valores = [], []
-            for item in lista:
-                if ':' in item:
-                    nome, valor = item.split(':', 1)
-                    nomes.append(nome.strip(' -'))
-                    valores.append(valor.strip())
-                else:
-                    nomes.append(item.strip(' -'))
-                    valores.append("")
-            return nomes, valores
-
-        # Corrigido para usar as chaves corretas
-        regioes, qtd_regioes = separar_nome_valor(blocos["🗺️ Contagem de trabalhos únicos por região:"])
-        paises, qtd_paises = separar_nome_valor(blocos["🌍 Contagem de trabalhos únicos por país:"])
-        autores, qtd_autores = separar_nome_valor(blocos["👤 Autores:"])
-
-        max_linhas = max(len(regioes), len(paises), len(autores))
-        while len(regioes) < max_linhas:
-            regioes.append("")
-            qtd_regioes.append("")
-        while len(paises) < max_linhas:
-            paises.append("")
-            qtd_paises.append("")
-        while len(autores) < max_linhas:
-            autores.append("")
-            qtd_autores.append("")
-
-        df = pd.DataFrame({
-            "Região": regioes,
-            "Num1": qtd_regioes,
-            "País": paises,
-            "Num2": qtd_paises,
-            "Autor": autores,
-            "Num3": qtd_autores
-        })
+        return {nome: tabela for nome, tabela in tabelas.items() if tabela is not None}
+
+    def texto(self) -> str:
+        if self.vazio:
+            return "⚠️ Nenhum dado carregado."
+
+        linhas = ["📌 MÉTRICAS DETALHADAS"]
+
+        def bloco(tabela, cabecalho, ausente, formato):
+            linhas.append("")
+            if tabela is None:
+                linhas.append(ausente)
+                return
+            linhas.append(cabecalho)
+            linhas.extend(formato(*linha) for linha in tabela.itertuples(index=False))
+
+        bloco(self.publicacoes, "📚 Tipos de publicação mais frequentes (contagem única por Num):",
+              "📚 Coluna 'Public' não encontrada.", lambda v, c, p: f" - {v}: {c} ({p:.1f}%)")
+        bloco(self.delineamentos, "🧪 Tipos de delineamento mais frequentes:",
+              "🧪 Coluna 'Design' não encontrada.", lambda v, c, p: f" - {v}: {c} ({p:.1f}%)")
+        bloco(self.paises, "🌍 Países mais frequentes:",
+              "🌍 Coluna 'country' não encontrada.", lambda v, c, p: f" - {v}: {c} referências ({p:.1f}%)")
+        bloco(self.regioes, "🗺️ Regiões mais frequentes:",
+              "🗺️ Coluna 'Region' não encontrada.", lambda v, c, p: f" - {v}: {c} ({p:.1f}%)")
+        bloco(self.autores, "👤 Autores mais frequentes:",
+              "👤 Coluna 'Autores' não encontrada.", lambda v, c: f" - {v}: {c} aparições")
+        if self.autores is not None:
+            linhas.extend(["", f"👥 Média de autores por referência: {self.media_autores:.2f}"])
+        bloco(self.anos, "📅 Distribuição por ano:",
+              "📅 Coluna 'Ano' não encontrada.", lambda v, c: f" - {v}: {c} referência(s)")
+        if self.combinacoes is not None:
+            linhas.extend(["", "🌐 Combinações país-autor mais frequentes:"])
+            linhas.extend(
+                f" - {autor} ({pais}): {vezes} vezes"
+                for autor, pais, vezes in self.combinacoes.itertuples(index=False))
+
+        return "\n".join(linhas) + "\n"
+
+    def __str__(self):
+        return self.texto()
+
+    def tabela_exportacao(self) -> pd.DataFrame:
+        """Publicações, delineamentos, países, regiões e autores lado a lado, com % do total."""
+        def com_percentual(tabela, percentuais=None):
+            if tabela is None:
+                return _tabela([], ("Nome", "Valor", "% do total"))
+            if percentuais is None:
+                percentuais = tabela.iloc[:, 2]
+            # Uma casa decimal, como no relatório; sem percentual fica vazio
+            textos = [f"{float(f'{p:.1f}')}%" if p > 0 else "" for p in percentuais]
+            return pd.DataFrame({"Nome": tabela.iloc[:, 0], "Valor": tabela.iloc[:, 1], "%": textos})
+
+        regioes = self.regioes
+        if regioes is not None and len(regioes):
+            # Nas regiões o percentual é sobre as regiões listadas
+            percentuais_regioes = 100 * regioes.iloc[:, 1] / regioes.iloc[:, 1].sum()
+        else:
+            percentuais_regioes = None
+        autores = self.autores
+        return _linhas_exportacao(
+            (("Tipos de publicação", "Valor", "% do total"), com_percentual(self.publicacoes)),
+            (("Tipos de delineamento", "Valor", "% do total"), com_percentual(self.delineamentos)),
+            (("Países mais frequentes", "Valor", "% do total"), com_percentual(self.paises)),
+            (("Regiões mais frequentes", "Valor", "% do total"), com_percentual(regioes, percentuais_regioes)),
+            (("Autores mais frequentes", "Valor", "% do total"),
+             com_percentual(autores, [0] * len(autores) if autores is not None else None)))
+
+
+def pasta_exportacao():
+    """Pasta PYMT na área de trabalho, onde as exportações são salvas por padrão."""
+    if "PyQt5.QtCore" in sys.modules:
+        # Na interface, usa a área de trabalho indicada pelo sistema
+        from PyQt5.QtCore import QStandardPaths
         desktop = QStandardPaths.writableLocation(QStandardPaths.DesktopLocation)
+    else:
+        desktop = os.path.join(os.path.expanduser("~"), "Desktop")
+    return os.path.join(desktop, "PYMT")
 
-        # Caminho para a pasta PYMT dentro da área de trabalho
-        pasta_pymt = os.path.join(desktop, "PYMT")
 
-        # Cria a pasta se ela não existir
-        os.makedirs(pasta_pymt, exist_ok=True)
+# A exportação para Excel é opcional: o pandas precisa do openpyxl para gravar .xlsx
+XLSX_DISPONIVEL = importlib.util.find_spec("openpyxl") is not None
 
-        # Caminho completo do arquivo a ser salvo
-        file_path = os.path.join(pasta_pymt, "metricas.csv")
 
+def _caminho_exportacao(pasta, nome):
+    pasta_pymt = pasta or pasta_exportacao()
+    os.makedirs(pasta_pymt, exist_ok=True)
+    return os.path.join(pasta_pymt, nome)
 
-        try:
-            df.to_csv(file_path, index=False)
-            print(f"Arquivo salvo com sucesso em: {file_path}")
-        except Exception as e:
-            print(f"Erro ao salvar arquivo: {e}")
-            
-def exportar_metricas_detalhe_para_csv(texto: str):
-        """Recebe o texto das métricas formatado e salva como CSV na pasta principal."""
 
-        blocos = {
-            "🗺️ Contagem de trabalhos únicos por região:": [],
-            "🌍 Contagem de trabalhos únicos por país:": [],
-            "👤 Autores:": []  # Corrigido para corresponder ao texto gerado
-        }
+def exportar_metricas_para_csv(metricas: Metricas, pasta=None, nome="metricas.csv") -> str:
+    """Salva regiões, países e autores de calcular_metricas em CSV; retorna o caminho."""
+    caminho = _caminho_exportacao(pasta, nome)
+    metricas.tabela_exportacao().to_csv(caminho, index=False)
+    return caminho
 
-        bloco_atual = None
-        for linha in texto.strip().splitlines():
-            linha = linha.strip()
-            if linha in blocos:
-                bloco_atual = linha
-            elif linha and bloco_atual and linha != "👤 Nenhum autor.":
-                blocos[bloco_atual].append(linha)
-
-        def separar_nome_valor(lista):
-            nomes, valores = [], []
-            for item in lista:
-                if ':' in item:
-                    nome, valor = item.split(':', 1)
-                    nomes.append(nome.strip(' -'))
-                    valores.append(valor.strip())
-                else:
-                    nomes.append(item.strip(' -'))
-                    valores.append("")
-            return nomes, valores
-
-        # Corrigido para usar as chaves corretas
-        regioes, qtd_regioes = separar_nome_valor(blocos["🗺️ Contagem de trabalhos únicos por região:"])
-        paises, qtd_paises = separar_nome_valor(blocos["🌍 Contagem de trabalhos únicos por país:"])
-        autores, qtd_autores = separar_nome_valor(blocos["👤 Autores:"])
-
-        max_linhas = max(len(regioes), len(paises), len(autores))
-        while len(regioes) < max_linhas:
-            regioes.append("")
-            qtd_regioes.append("")
-        while len(paises) < max_linhas:
-            paises.append("")
-            qtd_paises.append("")
-        while len(autores) < max_linhas:
-            autores.append("")
-            qtd_autores.append("")
-
-        df = pd.DataFrame({
-            "Região": regioes,
-            "Num1": qtd_regioes,
-            "País": paises,
-            "Num2": qtd_paises,
-            "Autor": autores,
-            "Num3": qtd_autores
-        })
-        desktop = QStandardPaths.writableLocation(QStandardPaths.DesktopLocation)
 
-        # Caminho para a pasta PYMT dentro da área de trabalho
-        pasta_pymt = os.path.join(desktop, "PYMT")
+def exportar_metricas_detalhe_para_csv(detalhes: MetricasDetalhadas, pasta=None,
+                                       nome="metricas_detalhe.csv") -> str:
+    """Salva os blocos de calcular_metricas_detalhadas em CSV; retorna o caminho."""
+    caminho = _caminho_exportacao(pasta, nome)
+    detalhes.tabela_exportacao().to_csv(caminho, index=False)
+    return caminho
 
-        # Cria a pasta se ela não existir
-        os.makedirs(pasta_pymt, exist_ok=True)
 
-        # Caminho completo do arquivo a ser salvo
-        file_path = os.path.join(pasta_pymt, "metricas_detalhe.csv")
+def exportar_metricas_para_xlsx(metricas: Metricas, detalhes: MetricasDetalhadas, pasta=None,
+                                nome="metricas.xlsx") -> str:
+    """Salva cada tabela das métricas em uma planilha de um arquivo Excel (requer openpyxl)."""
+    caminho = _caminho_exportacao(pasta, nome)
+    with pd.ExcelWriter(caminho) as arquivo:
+        for prefixo, resultado in (("", metricas), ("Detalhe - ", detalhes)):
+            for nome_tabela, tabela in resultado.tabelas().items():
+                # O Excel limita o nome da planilha a 31 caracteres
+                tabela.to_excel(arquivo, sheet_name=f"{prefixo}{nome_tabela}"[:31], index=False)
+    return caminho
 
 
-        try:
-            df.to_csv(file_path, index=False)
-            print(f"Arquivo salvo com sucesso em: {file_path}")
-        except Exception as e:
-            print(f"Erro ao salvar arquivo: {e}")
-
-
-
-def calcular_metricas_detalhadas(dataframe: pd.DataFrame) -> str:
+def calcular_metricas_detalhadas(dataframe: pd.DataFrame) -> MetricasDetalhadas:
     if dataframe.empty:
-        return "⚠️ Nenhum dado carregado."
+        return MetricasDetalhadas(vazio=True)
 
-    texto = "📌 MÉTRICAS DETALHADAS\n"
+    resultado = MetricasDetalhadas()
 
-    def contar_percentual(series, titulo, emoji, n_total=None):
+    def contar_percentual(series, coluna, n_total=None):
         series = series.dropna()
-        contagem = series.value_counts()
+        # Só os valores presentes (colunas categóricas listam todas as categorias),
+        # com empates na ordem em que aparecem
+        contagem = series.value_counts(sort=False).reindex(series.unique())
+        contagem = contagem.sort_values(ascending=False, kind="stable")
         total = n_total if n_total else len(series)
-
-        bloco = f"\n{emoji} {titulo}:\n"
-        for valor, count in contagem.items():
-            perc = 100 * count / total
-            bloco += f" - {valor}: {count} ({perc:.1f}%)\n"
-        return bloco
+        return _tabela(
+            ((valor, int(count), 100 * count / total) for valor, count in contagem.items()),
+            (coluna, "Contagem", "Percentual"))
 
     def expandir_multiplos(valores):
         return [item.strip() for v in valores.dropna() for item in v.split(",") if item.strip()]
 
-    def normalizar_paises(texto):
-        texto = texto.strip().lower()
-        paises = [p.strip().capitalize() for p in texto.split(",") if p]
-        return paises
-
     def agrupar_termos(lista):
         mapa_equivalencias = {
          
@@ -401,77 +393,52 @@ def calcular_metricas_detalhadas(dataframe: pd.DataFrame) -> str:
 
         contagem = Counter(termos_agrupados)
         total = len(df_public_unicos["Num"].unique())
-
-        texto += "\n📚 Tipos de publicação mais frequentes (contagem única por Num):\n"
-        for termo, count in contagem.most_common(20):
-            perc = 100 * count / total
-            texto += f" - {termo}: {count} ({perc:.1f}%)\n"
-    else:
-        texto += "\n📚 Coluna 'Public' não encontrada.\n"
+        resultado.publicacoes = _tabela(
+            ((termo, count, 100 * count / total) for termo, count in contagem.most_common(20)),
+            ("Tipo", "Contagem", "Percentual"))
 
     # Tipos de delineamento
     if "Design" in dataframe.columns:
-        texto += contar_percentual(dataframe["Design"], "Tipos de delineamento mais frequentes", "🧪")
-    else:
-        texto += "\n🧪 Coluna 'Design' não encontrada.\n"
+        resultado.delineamentos = contar_percentual(dataframe["Design"], "Delineamento")
 
     # Países
     if "country" in dataframe.columns:
-        paises_normalizados = dataframe["country"].dropna().apply(normalizar_paises)
-        todos_paises = [pais for lista in paises_normalizados for pais in lista]
-        contagem_paises = Counter(todos_paises)
+        contagem_paises = Counter(explodir_paises(dataframe["country"]).tolist())
         total_refs = len(dataframe["Num"].unique()) if "Num" in dataframe.columns else len(dataframe)
-
-        texto += "\n🌍 Países mais frequentes:\n"
-        for pais, count in contagem_paises.most_common(10):
-            perc = 100 * count / total_refs
-            texto += f" - {pais}: {count} referências ({perc:.1f}%)\n"
-    else:
-        texto += "\n🌍 Coluna 'country' não encontrada.\n"
+        resultado.paises = _tabela(
+            ((pais, count, 100 * count / total_refs) for pais, count in contagem_paises.most_common(10)),
+            ("País", "Referências", "Percentual"))
 
     # Regiões
     if "Region" in dataframe.columns:
-        texto += contar_percentual(dataframe["Region"], "Regiões mais frequentes", "🗺️")
-    else:
-        texto += "\n🗺️ Coluna 'Region' não encontrada.\n"
+        resultado.regioes = contar_percentual(dataframe["Region"], "Região")
 
     # Autores
     if "Autores" in dataframe.columns:
-        lista_autores = dataframe["Autores"].dropna().apply(lambda x: [a.strip() for a in x.split(",")])
+        lista_autores = dataframe["Autores"].dropna().astype(str).str.split(",").apply(
+            lambda partes: [a.strip() for a in partes])
         todos_autores = [autor for sublist in lista_autores for autor in sublist if autor]
         contagem_autores = Counter(todos_autores)
         num_refs = len(lista_autores)
         total_autores = sum(len(sublist) for sublist in lista_autores)
-        media_autores = total_autores / num_refs if num_refs > 0 else 0
-
-        texto += "\n👤 Autores mais frequentes:\n"
-        for autor, count in contagem_autores.most_common(10):
-            texto += f" - {autor}: {count} aparições\n"
-
-        texto += f"\n👥 Média de autores por referência: {media_autores:.2f}\n"
-    else:
-        texto += "\n👤 Coluna 'Autores' não encontrada.\n"
+        resultado.media_autores = total_autores / num_refs if num_refs > 0 else 0
+        resultado.autores = _tabela(contagem_autores.most_common(10), ("Autor", "Aparições"))
 
     # Anos
     if "Ano" in dataframe.columns:
         contagem_anos = dataframe["Ano"].dropna().value_counts().sort_index()
-        texto += "\n📅 Distribuição por ano:\n"
-        for ano, count in contagem_anos.items():
-            texto += f" - {ano}: {count} referência(s)\n"
-    else:
-        texto += "\n📅 Coluna 'Ano' não encontrada.\n"
+        resultado.anos = _tabela(contagem_anos.items(), ("Ano", "Referências"))
 
     # Combinação país-autor
     if "country" in dataframe.columns and "Autores" in dataframe.columns:
-        texto += "\n🌐 Combinações país-autor mais frequentes:\n"
-        combinacoes = []
-        for _, row in dataframe.dropna(subset=["country", "Autores"]).iterrows():
-            paises = normalizar_paises(row["country"])
-            autores = [a.strip() for a in row["Autores"].split(",") if a.strip()]
-            combinacoes.extend([(pais, autor) for pais in paises for autor in autores])
-
-        contagem_combinacoes = Counter(combinacoes)
-        for (pais, autor), count in contagem_combinacoes.most_common(10):
-            texto += f" - {autor} ({pais}): {count} vezes\n"
-
-    return texto
+        linhas = dataframe.dropna(subset=["country", "Autores"])
+        autores_por_linha = linhas["Autores"].astype(str).str.split(",")
+        contagem_combinacoes = Counter(
+            (pais, autor.strip())
+            for paises, autores in zip(paises_por_linha(linhas["country"]), autores_por_linha)
+            for pais in paises for autor in autores if autor.strip())
+        resultado.combinacoes = _tabela(
+            ((autor, pais, count) for (pais, autor), count in contagem_combinacoes.most_common(10)),
+            ("Autor", "País", "Vezes"))
+
+    return resultado
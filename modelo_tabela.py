@@ -0,0 +1,204 @@
+# modelo_tabela.py
+
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QBrush, QColor, QFont
+
+CORES_REGIAO = {
+    "Africa": QColor(240, 230, 140),
+    "Asia": QColor(173, 216, 230),
+    "Australia and New Zeland": QColor(255, 235, 205),
+    "Canada and EUA": QColor(200, 200, 255),
+    "Europe": QColor(221, 160, 221),
+    "Latin America": QColor(152, 251, 152),
+    "Eastern Mediterranean": QColor(255, 182, 193),
+}
+COR_PADRAO = QColor(255, 255, 255)
+COR_VAZIA = QColor(220, 220, 220)
+# Blocos de mesma região se alternam entre estas duas cores (o primeiro é branco)
+CORES_BLOCO = (QColor(245, 245, 245), QColor(255, 255, 255))
+
+# Colunas em que valores repetidos em linhas seguidas são ocultados e mesclados
+COLUNAS_AGRUPADAS = [
+    "Num", "Region", "country", "Autores", "Titulo", "Ref", "Afiliation",
+    "Abstract", "Num de Ref", "IA abstract 100 palavras", "IA keywords"]
+
+
+def _texto(valor):
+    # Ausentes das colunas Int64 aparecem como nas demais colunas
+    return "nan" if valor is pd.NA else str(valor)
+
+
+def codificar_coluna(valores):
+    """Códigos inteiros do texto exibido (sem espaços nas pontas) de cada linha; -1 para vazio."""
+    # Converte para texto só os valores distintos; ausentes (NaN, None, NA) um a um
+    brutos, unicos = pd.factorize(valores)
+    textos = np.array([_texto(v).strip() for v in unicos] + [""], dtype=object)[brutos]
+    ausentes = np.flatnonzero(brutos == -1)
+    if len(ausentes):
+        textos[ausentes] = [_texto(v).strip() for v in valores[ausentes]]
+    codigos, categorias = pd.factorize(textos)
+    vazio = np.flatnonzero(categorias == "")
+    if len(vazio):
+        codigos[codigos == vazio[0]] = -1
+    return codigos
+
+
+def calcular_layout(codigos, linhas, coluna_regiao=None):
+    """Layout da tabela para as linhas na ordem dada, por codificação de sequências.
+
+    codigos: {coluna: códigos de codificar_coluna} das colunas agrupadas.
+    Retorna (repetidas, spans, blocos): por coluna, as células que repetem a
+    linha anterior e ficam vazias; os spans (linha, coluna, quantidade) de cada
+    valor com as vazias seguintes; e a paridade do bloco de região de cada linha.
+    """
+    total = len(linhas)
+    repetidas, spans = {}, []
+    for coluna, codigos_coluna in codigos.items():
+        atuais = codigos_coluna[linhas]
+        repetida = np.zeros(total, dtype=bool)
+        repetida[1:] = atuais[1:] == atuais[:-1]
+        repetidas[coluna] = repetida
+
+        # Cada célula com texto inicia uma sequência que engole as vazias seguintes
+        inicios = np.flatnonzero(~repetida & (atuais != -1))
+        tamanhos = np.diff(np.append(inicios, total))
+        for inicio, tamanho in zip(inicios[tamanhos > 1].tolist(), tamanhos[tamanhos > 1].tolist()):
+            spans.append((inicio, coluna, tamanho))
+
+    blocos = np.zeros(total, dtype=np.int8)
+    if coluna_regiao is not None and total:
+        # Blocos seguem o texto exibido na coluna Region, em que repetições aparecem vazias
+        exibidos = np.where(repetidas[coluna_regiao], -1, codigos[coluna_regiao][linhas])
+        mudou = np.ones(total, dtype=bool)
+        mudou[1:] = exibidos[1:] != exibidos[:-1]
+        blocos = (np.cumsum(mudou) % 2).astype(np.int8)
+    return repetidas, spans, blocos
+
+
+def _misturar(cor, bloco):
+    return QColor(
+        (cor.red() + bloco.red()) // 2,
+        (cor.green() + bloco.green()) // 2,
+        (cor.blue() + bloco.blue()) // 2)
+
+
+class ModeloPlanilha(QAbstractTableModel):
+    """Mostra o dataframe expandido sem criar um item por célula.
+
+    Os textos são gerados só para as células visíveis, e os filtros apenas
+    trocam o array de posições das linhas exibidas.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._df = pd.DataFrame()
+        self._valores = []
+        self._linhas = np.arange(0)
+        self._num = []
+        self._regiao = None
+        self._codigos = {}
+        self._vazias = {}
+        self._blocos = np.zeros(0, dtype=np.int8)
+        self.spans = []
+
+        self._fonte_num = QFont()
+        self._fonte_num.setBold(True)
+        self._frente = QBrush(QColor(0, 0, 0))
+        # Um pincel por combinação de cor de fundo e bloco, compartilhado entre as células
+        self._pinceis = {}
+
+    @property
+    def dataframe(self):
+        return self._df
+
+    def definir_dados(self, df, linhas=None):
+        self.beginResetModel()
+        self._df = df
+        self._valores = [df[coluna].to_numpy(dtype=object) for coluna in df.columns]
+        self._num = [i for i, c in enumerate(df.columns) if c.lower() == "num"]
+        self._regiao = df.columns.get_loc("Region") if "Region" in df.columns else None
+        # Codificados uma vez por dataframe; filtros só recalculam o layout da nova ordem
+        self._codigos = {
+            i: codificar_coluna(self._valores[i])
+            for i, c in enumerate(df.columns) if c in COLUNAS_AGRUPADAS}
+        self._linhas = np.arange(len(df)) if linhas is None else np.asarray(linhas)
+        self._calcular_layout()
+        self.endResetModel()
+
+    def filtrar(self, linhas):
+        """Exibe apenas as linhas nas posições indicadas (None para todas)."""
+        self.beginResetModel()
+        self._linhas = np.arange(len(self._df)) if linhas is None else np.asarray(linhas)
+        self._calcular_layout()
+        self.endResetModel()
+
+    def _calcular_layout(self):
+        regiao = self._regiao if self._regiao in self._codigos else None
+        self._vazias, self.spans, self._blocos = calcular_layout(self._codigos, self._linhas, regiao)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._linhas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._df.columns)
+
+    def headerData(self, secao, orientacao, papel=Qt.DisplayRole):
+        if papel != Qt.DisplayRole:
+            return None
+        if orientacao == Qt.Horizontal:
+            return str(self._df.columns[secao])
+        return str(secao + 1)
+
+    def flags(self, indice):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def texto(self, linha, coluna):
+        """Texto exibido na célula (vazio onde repete a linha anterior)."""
+        vazias = self._vazias.get(coluna)
+        if vazias is not None and vazias[linha]:
+            return ""
+        return _texto(self._valores[coluna][self._linhas[linha]])
+
+    def _pincel(self, linha, coluna):
+        original = _texto(self._valores[coluna][self._linhas[linha]])
+        if original.strip() == "":
+            chave = None
+        elif self._regiao is not None:
+            chave = _texto(self._valores[self._regiao][self._linhas[linha]]).strip()
+        else:
+            chave = ""
+        bloco = self._blocos[linha] if self._regiao is not None else None
+        pincel = self._pinceis.get((chave, bloco))
+        if pincel is None:
+            cor = COR_VAZIA if chave is None else CORES_REGIAO.get(chave, COR_PADRAO)
+            if bloco is not None:
+                cor = _misturar(cor, CORES_BLOCO[bloco])
+            pincel = self._pinceis[(chave, bloco)] = QBrush(cor)
+        return pincel
+
+    def data(self, indice, papel=Qt.DisplayRole):
+        if not indice.isValid():
+            return None
+        linha, coluna = indice.row(), indice.column()
+        if papel == Qt.DisplayRole:
+            return self.texto(linha, coluna)
+        if papel == Qt.BackgroundRole:
+            return self._pincel(linha, coluna)
+        if papel == Qt.ForegroundRole:
+            return self._frente
+        if papel == Qt.FontRole and coluna in self._num:
+            return self._fonte_num
+        if papel == Qt.TextAlignmentRole:
+            if coluna in self._num or _texto(self._valores[coluna][self._linhas[linha]]).strip() == "":
+                return Qt.AlignCenter
+        return None
+
+    def tabela_exibida(self):
+        """DataFrame com os textos exibidos, na ordem da tabela."""
+        colunas = [str(c) for c in self._df.columns]
+        return pd.DataFrame(
+            [[self.texto(linha, coluna) for coluna in range(len(colunas))]
+             for linha in range(len(self._linhas))],
+            columns=colunas)
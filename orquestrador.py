@@ -0,0 +1,113 @@
+# orquestrador.py
+
+
+class GrafoEtapas:
+    """Executa etapas dependentes entre si no máximo uma vez por versão dos dados.
+
+    Etapas de origem (sem dependências) sempre rodam e retornam (valor, versao).
+    As demais recebem os valores das dependências e só rodam de novo quando a
+    versão de alguma delas mudou; caso contrário o resultado guardado é reaproveitado.
+    Cada etapa deve ser executada por uma thread de cada vez; etapas diferentes
+    (as da interface e as de carregamento) podem rodar em threads diferentes.
+    """
+
+    def __init__(self):
+        self._etapas = {}
+        # nome -> (versao, valor) da última execução
+        self._resultados = {}
+        self.execucoes = {}
+
+    def adicionar(self, nome, funcao, depende=()):
+        for dependencia in depende:
+            if dependencia not in self._etapas:
+                raise ValueError(f"Etapa '{nome}' depende de '{dependencia}', que não existe.")
+        self._etapas[nome] = (funcao, tuple(depende))
+        self.execucoes.setdefault(nome, 0)
+
+    def dependencias(self, nome):
+        return self._etapas[nome][1]
+
+    def versao(self, nome):
+        resultado = self._resultados.get(nome)
+        return resultado[0] if resultado is not None else None
+
+    def valor(self, nome, padrao=None):
+        resultado = self._resultados.get(nome)
+        return resultado[1] if resultado is not None else padrao
+
+    def _versao_entrada(self, nome):
+        _, depende = self._etapas[nome]
+        return (nome,) + tuple(self.versao(d) for d in depende)
+
+    def definir(self, nome, valor, versao):
+        """Registra o resultado de uma etapa de origem obtido por outro caminho (ex.: snapshot)."""
+        self._resultados[nome] = (versao, valor)
+
+    def marcar(self, nome, valor=None):
+        """Registra que a etapa já foi feita para as versões atuais das dependências."""
+        self._resultados[nome] = (self._versao_entrada(nome), valor)
+
+    def _ordem(self, alvos):
+        ordem, vistos = [], set()
+
+        def visitar(nome):
+            if nome in vistos:
+                return
+            vistos.add(nome)
+            for dependencia in self._etapas[nome][1]:
+                visitar(dependencia)
+            ordem.append(nome)
+
+        for alvo in alvos:
+            visitar(alvo)
+        return ordem
+
+    def desatualizadas(self, alvos):
+        """Etapas derivadas que executar(alvos, atualizar_origens=False) rodaria, em ordem."""
+        mudam = []
+        for nome in self._ordem(alvos):
+            _, depende = self._etapas[nome]
+            if not depende:
+                continue
+            anterior = self._resultados.get(nome)
+            if (anterior is None or anterior[0] != self._versao_entrada(nome)
+                    or any(d in mudam for d in depende)):
+                mudam.append(nome)
+        return mudam
+
+    def executar(self, alvos, contexto, atualizar_origens=True, ao_concluir=None, antes_de_gravar=None):
+        """Roda o necessário para os alvos, em ordem de dependência, e retorna seus valores.
+
+        Cada função recebe o contexto seguido dos valores das dependências.
+        Com atualizar_origens=False as etapas de origem não rodam: usam o último valor.
+        ao_concluir(nome) é chamado quando cada etapa fica em dia, rodando ou não.
+        antes_de_gravar(nome) é chamado antes de guardar cada resultado novo; uma
+        exceção lançada ali descarta o resultado (ex.: carregamento cancelado).
+        """
+        for nome in self._ordem(alvos):
+            funcao, depende = self._etapas[nome]
+            anterior = self._resultados.get(nome)
+            if not depende:
+                if not atualizar_origens:
+                    if anterior is None:
+                        raise ValueError(f"Etapa '{nome}' ainda não foi executada.")
+                    continue
+                valor, versao = funcao(contexto)
+                if anterior is not None and anterior[0] == versao:
+                    # Mesmo conteúdo: mantém o valor já usado pelas etapas seguintes
+                    valor = anterior[1]
+                if antes_de_gravar is not None:
+                    antes_de_gravar(nome)
+                self._resultados[nome] = (versao, valor)
+                self.execucoes[nome] += 1
+            else:
+                versao = self._versao_entrada(nome)
+                if anterior is None or anterior[0] != versao:
+                    valor = funcao(contexto, *(self._resultados[d][1] for d in depende))
+                    if antes_de_gravar is not None:
+                        antes_de_gravar(nome)
+                    self._resultados[nome] = (versao, valor)
+                    self.execucoes[nome] += 1
+            if ao_concluir is not None:
+                ao_concluir(nome)
+        return {alvo: self._resultados[alvo][1] for alvo in alvos}
@@ -0,0 +1,563 @@
+# paises.py
+
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from colunas import listas_por_linha
+
+
+# Mapeamento para normalizar nomes de países
+mapa_paises = {
+    "Brazi": "Brazil",
+    "U.S": "USA",
+    "US": "USA",
+    "U.S.A": "USA",
+    "United States": "USA",
+    "United States of America": "USA",
+    "South Korea": "Republic of Korea",
+    "Korea": "Republic of Korea",
+    "UK": "United Kingdom",
+    "United Kingdom": "United Kingdom",
+    "Canada/Bermuda": "Canada",
+    "Argentina and Spain": "Argentina",
+    "Argentina and USA": "Argentina",
+    "USA and South Korea": "USA",
+    "USA and Taiwan": "USA",
+    "USA/Puerto Rico": "USA",
+}
+
+# ISO 3166-1: alfa-2, alfa-3, nome usado nas métricas e outros nomes do mesmo país
+ISO_3166 = (
+    ("AD", "AND", "Andorra"),
+    ("AE", "ARE", "United Arab Emirates", "UAE"),
+    ("AF", "AFG", "Afghanistan"),
+    ("AG", "ATG", "Antigua and Barbuda", "Antigua & Barbuda"),
+    ("AI", "AIA", "Anguilla"),
+    ("AL", "ALB", "Albania"),
+    ("AM", "ARM", "Armenia"),
+    ("AO", "AGO", "Angola"),
+    ("AQ", "ATA", "Antarctica"),
+    ("AR", "ARG", "Argentina"),
+    ("AS", "ASM", "American Samoa"),
+    ("AT", "AUT", "Austria", "Österreich"),
+    ("AU", "AUS", "Australia"),
+    ("AW", "ABW", "Aruba"),
+    ("AX", "ALA", "Åland Islands", "Aland Islands"),
+    ("AZ", "AZE", "Azerbaijan"),
+    ("BA", "BIH", "Bosnia and Herzegovina", "Bosnia & Herzegovina", "Bosnia"),
+    ("BB", "BRB", "Barbados"),
+    ("BD", "BGD", "Bangladesh"),
+    ("BE", "BEL", "Belgium", "België", "Belgique"),
+    ("BF", "BFA", "Burkina Faso"),
+    ("BG", "BGR", "Bulgaria"),
+    ("BH", "BHR", "Bahrain"),
+    ("BI", "BDI", "Burundi"),
+    ("BJ", "BEN", "Benin"),
+    ("BL", "BLM", "Saint Barthélemy", "Saint Barthelemy"),
+    ("BM", "BMU", "Bermuda"),
+    ("BN", "BRN", "Brunei", "Brunei Darussalam"),
+    ("BO", "BOL", "Bolivia", "Bolivia, Plurinational State of", "Plurinational State of Bolivia"),
+    ("BQ", "BES", "Caribbean Netherlands", "Bonaire, Sint Eustatius and Saba"),
+    ("BR", "BRA", "Brazil", "Brasil"),
+    ("BS", "BHS", "Bahamas", "The Bahamas"),
+    ("BT", "BTN", "Bhutan"),
+    ("BV", "BVT", "Bouvet Island"),
+    ("BW", "BWA", "Botswana"),
+    ("BY", "BLR", "Belarus"),
+    ("BZ", "BLZ", "Belize"),
+    ("CA", "CAN", "Canada"),
+    ("CC", "CCK", "Cocos (Keeling) Islands", "Cocos Islands"),
+    ("CD", "COD", "Democratic Republic of the Congo", "Congo, The Democratic Republic of the", "DR Congo"),
+    ("CF", "CAF", "Central African Republic"),
+    ("CG", "COG", "Republic of the Congo", "Congo"),
+    ("CH", "CHE", "Switzerland", "Schweiz", "Suisse"),
+    ("CI", "CIV", "Côte d'Ivoire", "Cote d'Ivoire", "Ivory Coast"),
+    ("CK", "COK", "Cook Islands"),
+    ("CL", "CHL", "Chile"),
+    ("CM", "CMR", "Cameroon"),
+    ("CN", "CHN", "China", "People's Republic of China", "PR China", "P.R. China"),
+    ("CO", "COL", "Colombia"),
+    ("CR", "CRI", "Costa Rica"),
+    ("CU", "CUB", "Cuba"),
+    ("CV", "CPV", "Cabo Verde", "Cape Verde"),
+    ("CW", "CUW", "Curaçao", "Curacao"),
+    ("CX", "CXR", "Christmas Island"),
+    ("CY", "CYP", "Cyprus"),
+    ("CZ", "CZE", "Czechia", "Czech Republic"),
+    ("DE", "DEU", "Germany", "Deutschland", "Alemanha"),
+    ("DJ", "DJI", "Djibouti"),
+    ("DK", "DNK", "Denmark", "Danmark"),
+    ("DM", "DMA", "Dominica"),
+    ("DO", "DOM", "Dominican Republic"),
+    ("DZ", "DZA", "Algeria"),
+    ("EC", "ECU", "Ecuador"),
+    ("EE", "EST", "Estonia"),
+    ("EG", "EGY", "Egypt"),
+    ("EH", "ESH", "Western Sahara"),
+    ("ER", "ERI", "Eritrea"),
+    ("ES", "ESP", "Spain", "España", "Espanha"),
+    ("ET", "ETH", "Ethiopia"),
+    ("FI", "FIN", "Finland", "Suomi"),
+    ("FJ", "FJI", "Fiji"),
+    ("FK", "FLK", "Falkland Islands", "Falkland Islands (Malvinas)"),
+    ("FM", "FSM", "Micronesia", "Micronesia, Federated States of"),
+    ("FO", "FRO", "Faroe Islands"),
+    ("FR", "FRA", "France", "França"),
+    ("GA", "GAB", "Gabon"),
+    ("GB", "GBR", "United Kingdom", "Great Britain", "England", "Scotland", "Wales", "Northern Ireland",
+     "United Kingdom of Great Britain and Northern Ireland"),
+    ("GD", "GRD", "Grenada"),
+    ("GE", "GEO", "Georgia"),
+    ("GF", "GUF", "French Guiana"),
+    ("GG", "GGY", "Guernsey"),
+    ("GH", "GHA", "Ghana"),
+    ("GI", "GIB", "Gibraltar"),
+    ("GL", "GRL", "Greenland"),
+    ("GM", "GMB", "Gambia", "The Gambia"),
+    ("GN", "GIN", "Guinea"),
+    ("GP", "GLP", "Guadeloupe"),
+    ("GQ", "GNQ", "Equatorial Guinea"),
+    ("GR", "GRC", "Greece", "Grécia"),
+    ("GS", "SGS", "South Georgia and the South Sandwich Islands"),
+    ("GT", "GTM", "Guatemala"),
+    ("GU", "GUM", "Guam"),
+    ("GW", "GNB", "Guinea-Bissau"),
+    ("GY", "GUY", "Guyana"),
+    ("HK", "HKG", "Hong Kong", "Hong Kong SAR"),
+    ("HM", "HMD", "Heard Island and McDonald Islands"),
+    ("HN", "HND", "Honduras"),
+    ("HR", "HRV", "Croatia", "Hrvatska"),
+    ("HT", "HTI", "Haiti"),
+    ("HU", "HUN", "Hungary"),
+    ("ID", "IDN", "Indonesia"),
+    ("IE", "IRL", "Ireland", "Republic of Ireland"),
+    ("IL", "ISR", "Israel"),
+    ("IM", "IMN", "Isle of Man"),
+    ("IN", "IND", "India"),
+    ("IO", "IOT", "British Indian Ocean Territory"),
+    ("IQ", "IRQ", "Iraq"),
+    ("IR", "IRN", "Iran", "Iran, Islamic Republic of", "Islamic Republic of Iran"),
+    ("IS", "ISL", "Iceland"),
+    ("IT", "ITA", "Italy", "Italia", "Itália"),
+    ("JE", "JEY", "Jersey"),
+    ("JM", "JAM", "Jamaica"),
+    ("JO", "JOR", "Jordan"),
+    ("JP", "JPN", "Japan", "Japão"),
+    ("KE", "KEN", "Kenya"),
+    ("KG", "KGZ", "Kyrgyzstan"),
+    ("KH", "KHM", "Cambodia"),
+    ("KI", "KIR", "Kiribati"),
+    ("KM", "COM", "Comoros"),
+    ("KN", "KNA", "Saint Kitts and Nevis", "St Kitts and Nevis", "St Kitts & Nevis"),
+    ("KP", "PRK", "North Korea", "Korea, Democratic People's Republic of",
+     "Democratic People's Republic of Korea"),
+    ("KR", "KOR", "Republic of Korea", "Korea, Republic of", "South Korea", "Korea"),
+    ("KW", "KWT", "Kuwait"),
+    ("KY", "CYM", "Cayman Islands"),
+    ("KZ", "KAZ", "Kazakhstan"),
+    ("LA", "LAO", "Laos", "Lao People's Democratic Republic"),
+    ("LB", "LBN", "Lebanon"),
+    ("LC", "LCA", "Saint Lucia", "St Lucia"),
+    ("LI", "LIE", "Liechtenstein"),
+    ("LK", "LKA", "Sri Lanka"),
+    ("LR", "LBR", "Liberia"),
+    ("LS", "LSO", "Lesotho"),
+    ("LT", "LTU", "Lithuania"),
+    ("LU", "LUX", "Luxembourg"),
+    ("LV", "LVA", "Latvia"),
+    ("LY", "LBY", "Libya"),
+    ("MA", "MAR", "Morocco"),
+    ("MC", "MCO", "Monaco"),
+    ("MD", "MDA", "Moldova", "Moldova, Republic of", "Republic of Moldova"),
+    ("ME", "MNE", "Montenegro"),
+    ("MF", "MAF", "Saint Martin", "Saint Martin (French part)"),
+    ("MG", "MDG", "Madagascar"),
+    ("MH", "MHL", "Marshall Islands"),
+    ("MK", "MKD", "North Macedonia", "Macedonia"),
+    ("ML", "MLI", "Mali"),
+    ("MM", "MMR", "Myanmar", "Burma"),
+    ("MN", "MNG", "Mongolia"),
+    ("MO", "MAC", "Macao", "Macau"),
+    ("MP", "MNP", "Northern Mariana Islands"),
+    ("MQ", "MTQ", "Martinique"),
+    ("MR", "MRT", "Mauritania"),
+    ("MS", "MSR", "Montserrat"),
+    ("MT", "MLT", "Malta"),
+    ("MU", "MUS", "Mauritius"),
+    ("MV", "MDV", "Maldives"),
+    ("MW", "MWI", "Malawi"),
+    ("MX", "MEX", "Mexico", "México"),
+    ("MY", "MYS", "Malaysia"),
+    ("MZ", "MOZ", "Mozambique", "Moçambique"),
+    ("NA", "NAM", "Namibia"),
+    ("NC", "NCL", "New Caledonia"),
+    ("NE", "NER", "Niger"),
+    ("NF", "NFK", "Norfolk Island"),
+    ("NG", "NGA", "Nigeria"),
+    ("NI", "NIC", "Nicaragua"),
+    ("NL", "NLD", "Netherlands", "The Netherlands", "Holland", "Nederland"),
+    ("NO", "NOR", "Norway", "Norge"),
+    ("NP", "NPL", "Nepal"),
+    ("NR", "NRU", "Nauru"),
+    ("NU", "NIU", "Niue"),
+    ("NZ", "NZL", "New Zealand", "New Zeland", "Aotearoa"),
+    ("OM", "OMN", "Oman"),
+    ("PA", "PAN", "Panama", "Panamá"),
+    ("PE", "PER", "Peru", "Perú"),
+    ("PF", "PYF", "French Polynesia"),
+    ("PG", "PNG", "Papua New Guinea"),
+    ("PH", "PHL", "Philippines"),
+    ("PK", "PAK", "Pakistan"),
+    ("PL", "POL", "Poland", "Polska"),
+    ("PM", "SPM", "Saint Pierre and Miquelon"),
+    ("PN", "PCN", "Pitcairn"),
+    ("PR", "PRI", "Puerto Rico"),
+    ("PS", "PSE", "Palestine", "Palestine, State of", "State of Palestine"),
+    ("PT", "PRT", "Portugal"),
+    ("PW", "PLW", "Palau"),
+    ("PY", "PRY", "Paraguay", "Paraguai"),
+    ("QA", "QAT", "Qatar"),
+    ("RE", "REU", "Réunion", "Reunion"),
+    ("RO", "ROU", "Romania"),
+    ("RS", "SRB", "Serbia"),
+    ("RU", "RUS", "Russia", "Russian Federation"),
+    ("RW", "RWA", "Rwanda"),
+    ("SA", "SAU", "Saudi Arabia"),
+    ("SB", "SLB", "Solomon Islands"),
+    ("SC", "SYC", "Seychelles"),
+    ("SD", "SDN", "Sudan"),
+    ("SE", "SWE", "Sweden", "Sverige", "Suécia"),
+    ("SG", "SGP", "Singapore"),
+    ("SH", "SHN", "Saint Helena", "Saint Helena, Ascension and Tristan da Cunha"),
+    ("SI", "SVN", "Slovenia"),
+    ("SJ", "SJM", "Svalbard and Jan Mayen"),
+    ("SK", "SVK", "Slovakia"),
+    ("SL", "SLE", "Sierra Leone"),
+    ("SM", "SMR", "San Marino"),
+    ("SN", "SEN", "Senegal"),
+    ("SO", "SOM", "Somalia"),
+    ("SR", "SUR", "Suriname"),
+    ("SS", "SSD", "South Sudan"),
+    ("ST", "STP", "Sao Tome and Principe", "São Tomé and Príncipe"),
+    ("SV", "SLV", "El Salvador"),
+    ("SX", "SXM", "Sint Maarten", "Sint Maarten (Dutch part)"),
+    ("SY", "SYR", "Syria", "Syrian Arab Republic"),
+    ("SZ", "SWZ", "Eswatini", "Swaziland"),
+    ("TC", "TCA", "Turks and Caicos Islands"),
+    ("TD", "TCD", "Chad"),
+    ("TF", "ATF", "French Southern Territories"),
+    ("TG", "TGO", "Togo"),
+    ("TH", "THA", "Thailand"),
+    ("TJ", "TJK", "Tajikistan"),
+    ("TK", "TKL", "Tokelau"),
+    ("TL", "TLS", "Timor-Leste", "East Timor"),
+    ("TM", "TKM", "Turkmenistan"),
+    ("TN", "TUN", "Tunisia"),
+    ("TO", "TON", "Tonga"),
+    ("TR", "TUR", "Türkiye", "Turkey", "Turkiye"),
+    ("TT", "TTO", "Trinidad and Tobago", "Trinidad & Tobago"),
+    ("TV", "TUV", "Tuvalu"),
+    ("TW", "TWN", "Taiwan", "Taiwan, Province of China", "Republic of China"),
+    ("TZ", "TZA", "Tanzania", "Tanzania, United Republic of", "United Republic of Tanzania"),
+    ("UA", "UKR", "Ukraine"),
+    ("UG", "UGA", "Uganda"),
+    ("UM", "UMI", "United States Minor Outlying Islands"),
+    ("US", "USA", "USA", "United States", "United States of America", "EUA", "Estados Unidos"),
+    ("UY", "URY", "Uruguay", "Uruguai"),
+    ("UZ", "UZB", "Uzbekistan"),
+    ("VA", "VAT", "Holy See", "Vatican City", "Vatican"),
+    ("VC", "VCT", "Saint Vincent and the Grenadines", "St Vincent and the Grenadines"),
+    ("VE", "VEN", "Venezuela", "Venezuela, Bolivarian Republic of", "Bolivarian Republic of Venezuela"),
+    ("VG", "VGB", "British Virgin Islands", "Virgin Islands, British"),
+    ("VI", "VIR", "U.S. Virgin Islands", "Virgin Islands, U.S."),
+    ("VN", "VNM", "Vietnam", "Viet Nam"),
+    ("VU", "VUT", "Vanuatu"),
+    ("WF", "WLF", "Wallis and Futuna"),
+    ("WS", "WSM", "Samoa"),
+    ("YE", "YEM", "Yemen"),
+    ("YT", "MYT", "Mayotte"),
+    ("ZA", "ZAF", "South Africa", "África do Sul"),
+    ("ZM", "ZMB", "Zambia"),
+    ("ZW", "ZWE", "Zimbabwe"),
+)
+
+# Divide "USA, Brazil" e "USA/Brazil", mantendo juntos "St Kitts and Nevis" e "Trinidad & Tobago"
+_SEPARAR = re.compile(
+    r'((?:St\s+[^\s,;/]+(?:\s+[^\s,;/]+)*)|(?:[^,;/&]+(?:\s*&\s*[^,;/&]+)+)|[^,;/&]+)',
+    re.IGNORECASE
+)
+_E_COMERCIAL = re.compile(r'\s*&\s*')
+
+
+def _chave(nome):
+    """Forma usada na comparação: sem maiúsculas, espaços repetidos nem pontos nas pontas."""
+    return " ".join(nome.split()).strip(".").casefold()
+
+
+def _montar_apelidos():
+    apelidos, codigos = {}, {}
+    # Só alfa-3: os códigos alfa-2 coincidem com siglas de estados americanos (CA, PA, GA, IN...)
+    for _, alfa3, nome, *outros in ISO_3166:
+        codigos[alfa3] = nome
+        for apelido in (nome, *outros):
+            apelidos[_chave(apelido)] = nome
+    # As grafias da planilha têm a palavra final
+    for grafia, nome in mapa_paises.items():
+        apelidos[_chave(grafia)] = nome
+    return apelidos, codigos
+
+
+# Nome (na forma de _chave) → nome usado nas métricas; código alfa-3 → nome usado nas métricas
+_APELIDOS, _CODIGOS = _montar_apelidos()
+
+
+def canonico(nome):
+    """Nome usado nas métricas para um país escrito de qualquer forma conhecida, ou None."""
+    nome = nome.strip()
+    # Códigos só em maiúsculas, para não confundir "CAN" ou "AND" com palavras
+    if nome.isupper() and nome.isalpha() and len(nome) == 3 and nome in _CODIGOS:
+        return _CODIGOS[nome]
+    return _APELIDOS.get(_chave(nome))
+
+
+@lru_cache(maxsize=65536)
+def _normalizar(pais):
+    normalizados = []
+    for parte in _SEPARAR.findall(pais.strip()):
+        parte = parte.strip()
+        if not parte:
+            continue
+        parte = _E_COMERCIAL.sub(' & ', parte)  # Padroniza espaços ao redor de &
+        normalizados.append(canonico(parte) or parte)
+    return tuple(normalizados)
+
+
+def normalizar_paises(pais):
+    """Países de um texto da coluna country, separados e com o nome usado nas métricas."""
+    if pd.isna(pais):
+        return []
+    # Cada texto distinto é normalizado uma só vez por sessão
+    return list(_normalizar(pais))
+
+
+def _paises_do_valor(valor):
+    return _normalizar(valor) if isinstance(valor, str) else ()
+
+
+def paises_por_linha(serie, distintos=False):
+    """Lista de países normalizados de cada linha (mesmo índice da série; [] se vazia).
+
+    Cada valor distinto da coluna é normalizado uma só vez. Com distintos=True,
+    um país repetido no mesmo texto aparece uma vez.
+    """
+    return listas_por_linha(serie, _paises_do_valor, distintos)
+
+
+def explodir_paises(serie, distintos=False):
+    """Um país normalizado por linha do resultado, com o índice da linha de origem."""
+    return paises_por_linha(serie, distintos).explode().dropna()
+
+
+# Cidades frequentes em afiliações → país; só decidem quando a afiliação não cita o país.
+# Nomes ambíguos (Cambridge, London, Paris, Santiago, Valencia, Perth, Athens...) ficam de fora.
+CIDADES = {
+    "New York": "USA", "Boston": "USA", "Chicago": "USA", "Los Angeles": "USA",
+    "San Francisco": "USA", "Philadelphia": "USA", "Seattle": "USA", "Houston": "USA",
+    "Atlanta": "USA", "Miami": "USA", "Baltimore": "USA", "Pittsburgh": "USA",
+    "Denver": "USA", "Minneapolis": "USA", "Nashville": "USA", "Ann Arbor": "USA",
+    "Tallahassee": "USA", "Gainesville": "USA", "Washington, DC": "USA", "Washington DC": "USA",
+    "Toronto": "Canada", "Montreal": "Canada", "Montréal": "Canada", "Vancouver": "Canada",
+    "Ottawa": "Canada", "Calgary": "Canada", "Edmonton": "Canada", "Winnipeg": "Canada",
+    "Québec City": "Canada", "Halifax": "Canada",
+    "São Paulo": "Brazil", "Sao Paulo": "Brazil", "Rio de Janeiro": "Brazil",
+    "Belo Horizonte": "Brazil", "Porto Alegre": "Brazil", "Curitiba": "Brazil",
+    "Brasília": "Brazil", "Brasilia": "Brazil", "Salvador": "Brazil", "Recife": "Brazil",
+    "Florianópolis": "Brazil", "Florianopolis": "Brazil", "Goiânia": "Brazil", "Campinas": "Brazil",
+    "Buenos Aires": "Argentina", "Mexico City": "Mexico", "Ciudad de México": "Mexico",
+    "Guadalajara": "Mexico", "Monterrey": "Mexico", "Bogotá": "Colombia", "Bogota": "Colombia",
+    "Medellín": "Colombia", "Medellin": "Colombia", "Lima": "Peru", "Montevideo": "Uruguay",
+    "Caracas": "Venezuela", "Quito": "Ecuador", "La Paz": "Bolivia", "Asunción": "Paraguay",
+    "Valparaíso": "Chile", "Valparaiso": "Chile", "Havana": "Cuba", "San Juan": "Puerto Rico",
+    "Edinburgh": "United Kingdom", "Glasgow": "United Kingdom", "Manchester": "United Kingdom",
+    "Oxford": "United Kingdom", "Liverpool": "United Kingdom", "Bristol": "United Kingdom",
+    "Leeds": "United Kingdom", "Sheffield": "United Kingdom", "Cardiff": "United Kingdom",
+    "Belfast": "United Kingdom", "Nottingham": "United Kingdom", "Dublin": "Ireland",
+    "Cork": "Ireland", "Limerick": "Ireland",
+    "Berlin": "Germany", "Munich": "Germany", "München": "Germany", "Hamburg": "Germany",
+    "Cologne": "Germany", "Köln": "Germany", "Frankfurt": "Germany", "Heidelberg": "Germany",
+    "Leipzig": "Germany", "Dresden": "Germany", "Hannover": "Germany", "Würzburg": "Germany",
+    "Vienna": "Austria", "Wien": "Austria", "Graz": "Austria", "Salzburg": "Austria",
+    "Innsbruck": "Austria", "Zurich": "Switzerland", "Zürich": "Switzerland",
+    "Geneva": "Switzerland", "Genève": "Switzerland", "Basel": "Switzerland", "Lausanne": "Switzerland",
+    "Amsterdam": "Netherlands", "Rotterdam": "Netherlands", "Utrecht": "Netherlands",
+    "Leiden": "Netherlands", "Nijmegen": "Netherlands", "Groningen": "Netherlands",
+    "Brussels": "Belgium", "Bruxelles": "Belgium", "Leuven": "Belgium", "Ghent": "Belgium",
+    "Lyon": "France", "Marseille": "France", "Toulouse": "France", "Bordeaux": "France",
+    "Lille": "France", "Strasbourg": "France", "Montpellier": "France",
+    "Madrid": "Spain", "Barcelona": "Spain", "Seville": "Spain", "Sevilla": "Spain",
+    "Granada": "Spain", "Salamanca": "Spain", "Bilbao": "Spain",
+    "Lisbon": "Portugal", "Lisboa": "Portugal", "Porto": "Portugal", "Coimbra": "Portugal",
+    "Rome": "Italy", "Roma": "Italy", "Milan": "Italy", "Milano": "Italy", "Naples": "Italy",
+    "Turin": "Italy", "Torino": "Italy", "Florence": "Italy", "Firenze": "Italy",
+    "Bologna": "Italy", "Padua": "Italy", "Padova": "Italy", "Pisa": "Italy",
+    "Copenhagen": "Denmark", "Aarhus": "Denmark", "Aalborg": "Denmark", "Odense": "Denmark",
+    "Oslo": "Norway", "Bergen": "Norway", "Trondheim": "Norway", "Tromsø": "Norway",
+    "Stockholm": "Sweden", "Gothenburg": "Sweden", "Göteborg": "Sweden", "Uppsala": "Sweden",
+    "Lund": "Sweden", "Malmö": "Sweden", "Helsinki": "Finland", "Jyväskylä": "Finland",
+    "Jyvaskyla": "Finland", "Tampere": "Finland", "Turku": "Finland", "Reykjavik": "Iceland",
+    "Warsaw": "Poland", "Kraków": "Poland", "Krakow": "Poland", "Prague": "Czechia",
+    "Budapest": "Hungary", "Bucharest": "Romania", "Thessaloniki": "Greece", "Tbilisi": "Georgia",
+    "Istanbul": "Türkiye", "Ankara": "Türkiye", "Moscow": "Russia", "Saint Petersburg": "Russia",
+    "Kyiv": "Ukraine", "Kiev": "Ukraine", "Ljubljana": "Slovenia", "Zagreb": "Croatia",
+    "Belgrade": "Serbia", "Tallinn": "Estonia", "Riga": "Latvia", "Vilnius": "Lithuania",
+    "Tel Aviv": "Israel", "Jerusalem": "Israel", "Haifa": "Israel", "Beersheba": "Israel",
+    "Tehran": "Iran", "Riyadh": "Saudi Arabia", "Jeddah": "Saudi Arabia", "Doha": "Qatar",
+    "Dubai": "United Arab Emirates", "Abu Dhabi": "United Arab Emirates", "Amman": "Jordan",
+    "Beirut": "Lebanon", "Cairo": "Egypt", "Alexandria": "Egypt", "Kuwait City": "Kuwait",
+    "Muscat": "Oman", "Manama": "Bahrain",
+    "Tokyo": "Japan", "Osaka": "Japan", "Kyoto": "Japan", "Nagoya": "Japan", "Sapporo": "Japan",
+    "Fukuoka": "Japan", "Seoul": "Republic of Korea", "Busan": "Republic of Korea",
+    "Daegu": "Republic of Korea", "Beijing": "China", "Shanghai": "China", "Guangzhou": "China",
+    "Shenzhen": "China", "Wuhan": "China", "Nanjing": "China", "Chengdu": "China",
+    "Taipei": "Taiwan", "Kaohsiung": "Taiwan", "Tainan": "Taiwan",
+    "Kuala Lumpur": "Malaysia", "Bangkok": "Thailand", "Jakarta": "Indonesia", "Manila": "Philippines",
+    "Hanoi": "Vietnam", "Ho Chi Minh City": "Vietnam", "New Delhi": "India", "Mumbai": "India",
+    "Bangalore": "India", "Bengaluru": "India", "Chennai": "India", "Kolkata": "India",
+    "Hyderabad": "India", "Karachi": "Pakistan", "Lahore": "Pakistan", "Islamabad": "Pakistan",
+    "Dhaka": "Bangladesh", "Kathmandu": "Nepal", "Colombo": "Sri Lanka",
+    "Sydney": "Australia", "Melbourne": "Australia", "Brisbane": "Australia", "Adelaide": "Australia",
+    "Canberra": "Australia", "Auckland": "New Zealand", "Wellington": "New Zealand",
+    "Christchurch": "New Zealand", "Dunedin": "New Zealand",
+    "Johannesburg": "South Africa", "Cape Town": "South Africa", "Pretoria": "South Africa",
+    "Durban": "South Africa", "Nairobi": "Kenya", "Lagos": "Nigeria", "Ibadan": "Nigeria",
+    "Accra": "Ghana", "Addis Ababa": "Ethiopia", "Kampala": "Uganda", "Dar es Salaam": "Tanzania",
+    "Kigali": "Rwanda", "Harare": "Zimbabwe", "Lusaka": "Zambia", "Tunis": "Tunisia",
+    "Casablanca": "Morocco", "Rabat": "Morocco", "Algiers": "Algeria", "Dakar": "Senegal",
+}
+
+# Estados americanos → sigla postal; o nome do estado vale como USA
+ESTADOS_EUA = {
+    "Alabama": "AL", "Alaska": "AK", "Arizona": "AZ", "Arkansas": "AR", "California": "CA",
+    "Colorado": "CO", "Connecticut": "CT", "Delaware": "DE", "Florida": "FL", "Georgia": "GA",
+    "Hawaii": "HI", "Idaho": "ID", "Illinois": "IL", "Indiana": "IN", "Iowa": "IA",
+    "Kansas": "KS", "Kentucky": "KY", "Louisiana": "LA", "Maine": "ME", "Maryland": "MD",
+    "Massachusetts": "MA", "Michigan": "MI", "Minnesota": "MN", "Mississippi": "MS",
+    "Missouri": "MO", "Montana": "MT", "Nebraska": "NE", "Nevada": "NV", "New Hampshire": "NH",
+    "New Jersey": "NJ", "New Mexico": "NM", "New York": "NY", "North Carolina": "NC",
+    "North Dakota": "ND", "Ohio": "OH", "Oklahoma": "OK", "Oregon": "OR", "Pennsylvania": "PA",
+    "Rhode Island": "RI", "South Carolina": "SC", "South Dakota": "SD", "Tennessee": "TN",
+    "Texas": "TX", "Utah": "UT", "Vermont": "VT", "Virginia": "VA", "Washington": "WA",
+    "West Virginia": "WV", "Wisconsin": "WI", "Wyoming": "WY", "District of Columbia": "DC",
+}
+
+# Nomes de países que também são estados, sobrenomes ou nomes próprios: uma cidade conhecida decide antes deles
+PAISES_AMBIGUOS = {"Georgia", "Jordan", "Chad", "Jersey", "Lebanon"}
+
+# Siglas também usadas por estados brasileiros (Belém, PA) e australianos (Perth, WA)
+_SIGLAS_COMPARTILHADAS = {"AL", "MA", "MS", "MT", "PA", "SC", "WA"}
+
+# Força de cada referência: vence a de nível mais alto e, no mesmo nível, a última do texto
+_AMBIGUO, _CIDADE, _PAIS = 1, 2, 3
+
+
+def _regex_da_arvore(nomes):
+    """Expressão regular equivalente a uma árvore de prefixos (trie) dos nomes.
+
+    Em cada posição do texto o motor de regex só segue o ramo da letra lida,
+    sem testar os nomes um a um; o nome mais longo tem preferência.
+    """
+    arvore = {}
+    for nome in nomes:
+        no = arvore
+        for letra in nome:
+            no = no.setdefault(letra, {})
+        no[""] = {}
+
+    def montar(no):
+        ramos = [re.escape(letra) + montar(filho) for letra, filho in sorted(no.items()) if letra]
+        if not ramos:
+            return ""
+        corpo = ramos[0] if len(ramos) == 1 else "(?:" + "|".join(ramos) + ")"
+        # Nome que termina aqui: o restante vira opcional (guloso: tenta o mais longo primeiro)
+        if "" in no:
+            return "(?:" + corpo + ")?"
+        return corpo
+
+    return montar(arvore)
+
+
+def _montar_localizador():
+    # nome em minúsculas → (país, nível, é sigla); países têm prioridade sobre cidades e estados
+    locais = {_chave(cidade): (pais, _CIDADE, False) for cidade, pais in CIDADES.items()}
+    for estado in ESTADOS_EUA:
+        locais[_chave(estado)] = ("USA", _PAIS, False)
+    ambiguos = {_chave(nome) for nome in PAISES_AMBIGUOS}
+    for nome, pais in _APELIDOS.items():
+        # Siglas (USA, UK, UAE, EUA) só valem em maiúsculas
+        locais[nome] = (pais, _AMBIGUO if nome in ambiguos else _PAIS, len(nome) <= 3 and nome.isalpha())
+    # Códigos ISO soltos ficam de fora: em afiliações em maiúsculas, "AND" ou "CAN" são palavras
+    padrao = re.compile(r"\b" + _regex_da_arvore(sorted(locais)) + r"(?!\w)")
+    return padrao, locais
+
+
+_LOCALIZADOR, _LOCAIS = _montar_localizador()
+
+# Sigla de estado depois de vírgula, no fim de um trecho ou antes do CEP: "Lebanon, NH 03766"
+# Sem quebras de linha: as afiliações são varridas juntas, separadas por "\n"
+_SIGLA_ESTADO = re.compile(
+    r",[^\S\n]*([A-Z]{2})(?=(?:[^\S\n]+\d{5}(?:-\d{4})?)?[^\S\n]*(?:[,;.]|$))", re.MULTILINE)
+_SIGLAS_ESTADOS = set(ESTADOS_EUA.values()) - _SIGLAS_COMPARTILHADAS
+
+
+def _localizar(textos):
+    """País de cada texto, numa única varredura do conjunto (ver pais_da_afiliacao)."""
+    junto = "\n".join(textos)
+    # Em minúsculas o texto mantém as posições (o "İ" é o único caractere que cresceria)
+    minusculo = junto.replace("İ", "I").lower()
+    inicios = np.cumsum([0] + [len(t) + 1 for t in textos[:-1]]) if textos else np.zeros(0, dtype=np.int64)
+
+    posicoes, niveis, encontrados = [], [], []
+    for encontrado in _LOCALIZADOR.finditer(minusculo):
+        pais, nivel, sigla = _LOCAIS[encontrado.group()]
+        inicio, fim = encontrado.span()
+        if sigla and not junto[inicio:fim].isupper():
+            continue
+        posicoes.append(inicio)
+        niveis.append(nivel)
+        encontrados.append(pais)
+    for encontrado in _SIGLA_ESTADO.finditer(junto):
+        if encontrado.group(1) in _SIGLAS_ESTADOS:
+            posicoes.append(encontrado.start(1))
+            niveis.append(_AMBIGUO)
+            encontrados.append("USA")
+
+    paises = np.full(len(textos), "", dtype=object)
+    if encontrados:
+        posicoes = np.array(posicoes)
+        linhas = np.searchsorted(inicios, posicoes, side="right") - 1
+        # Por linha, a referência de nível mais alto; no mesmo nível, a última do texto
+        ordem = np.lexsort((posicoes, niveis, linhas))
+        ultimas = np.append(linhas[ordem][1:] != linhas[ordem][:-1], True)
+        paises[linhas[ordem][ultimas]] = np.array(encontrados, dtype=object)[ordem][ultimas]
+    return paises.tolist()
+
+
+def pais_da_afiliacao(afiliacao):
+    """País de uma afiliação, reconhecido pelo nome (ou sigla) do país ou de uma cidade conhecida.
+
+    Prefere o último país ou estado americano citado (o país costuma fechar a
+    afiliação); sem eles, a última cidade conhecida e, por fim, um país de nome
+    ambíguo (Georgia, Jordan...) ou a sigla de um estado americano ("Lebanon, NH").
+    Retorna "" quando nada é reconhecido.
+    """
+    return _localizar([afiliacao])[0]
+
+
+def paises_das_afiliacoes(afiliacoes):
+    """pais_da_afiliacao para uma coluna inteira: cada afiliação distinta é analisada uma só vez."""
+    codigos, unicas = pd.factorize(afiliacoes)
+    paises = np.array(_localizar([str(a) for a in unicas]) + [""], dtype=object)
+    return pd.Series(paises[codigos], index=afiliacoes.index, dtype=object)
@@ -0,0 +1,410 @@
+# pipeline_dados.py
+
+import threading
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+
+from paises import paises_das_afiliacoes
+
+
+def _expandir_refs(df):
+    """Expande a coluna Ref; o índice do resultado é a posição da linha de origem."""
+    partes = df["Ref"].dropna().astype(str).str.split("\n\n")
+    partes = partes[partes.str.len() > 1]
+    if partes.empty:
+        return df
+
+    # Uma entrada por referência, indexada pela posição da linha de origem
+    refs = partes.explode().str.strip()
+    primeiras = ~refs.index.duplicated(keep="first")
+
+    df.loc[refs.index[primeiras], "Ref"] = refs[primeiras]
+    extras = pd.DataFrame("", index=refs.index[~primeiras], columns=df.columns)
+    extras["Ref"] = refs[~primeiras].values
+
+    # Ordenação estável: a linha original vem antes das referências extras
+    return pd.concat([df, extras]).sort_index(kind="stable")
+
+
+def expand_ref_column(df):
+    """Cria uma linha para cada referência separada por linha em branco na coluna Ref.
+
+    A primeira referência mantém as demais colunas da linha; as seguintes ficam
+    com as outras colunas em branco.
+    """
+    if "Ref" not in df.columns:
+        return df
+    return _expandir_refs(df.reset_index(drop=True)).reset_index(drop=True)
+
+
+def _explodir_lista(series, padrao):
+    """Divide a série pelo padrão e retorna um item por linha, sem vazios."""
+    itens = series.str.split(padrao, regex=True).explode().str.strip()
+    return itens[itens != ""]
+
+
+def _agrupar_por_linha(itens):
+    grupos = defaultdict(list)
+    for linha, valor in zip(itens.index, itens.to_numpy()):
+        grupos[linha].append(valor)
+    return grupos
+
+
+def _posicoes(itens):
+    return pd.DataFrame({
+        "linha": itens.index.to_numpy(),
+        "pos": itens.groupby(level=0).cumcount().to_numpy(),
+        "valor": itens.to_numpy(),
+    })
+
+
+def _dividir_afiliacoes(afiliacoes):
+    """Divide cada afiliação por pontos.
+
+    Retorna, para cada linha de saída, a posição de origem na série e o novo valor.
+    Células vazias ou com uma única afiliação mantêm o valor original; células sem
+    nenhuma afiliação deixam de gerar linhas.
+    """
+    valores = afiliacoes.to_numpy()
+    serie = pd.Series(valores, index=np.arange(len(valores)))
+    presentes = serie.notna().to_numpy()
+    itens = _explodir_lista(serie[presentes].astype(str), r'\.\s*')
+    n_itens = np.zeros(len(valores), dtype=np.int64)
+    contagem = itens.groupby(level=0).size()
+    n_itens[contagem.index.to_numpy()] = contagem.to_numpy()
+
+    mantidas = np.flatnonzero(~presentes | (n_itens == 1))
+    divididas = itens[n_itens[itens.index.to_numpy()] > 1]
+    posicoes = np.concatenate([mantidas, divididas.index.to_numpy()])
+    novos = np.concatenate([valores[mantidas], divididas.to_numpy()])
+    ordem = np.argsort(posicoes, kind="stable")
+    return posicoes[ordem], novos[ordem]
+
+
+def _expandir_afiliacoes(df):
+    if "Afiliation" not in df.columns:
+        return df
+    posicoes, novos = _dividir_afiliacoes(df["Afiliation"])
+    resultado = df.iloc[posicoes].copy()
+    resultado["Afiliation"] = novos
+    return resultado
+
+
+def expand_affiliations_column(df):
+    """Cria uma linha para cada afiliação separada por ponto na coluna Afiliation."""
+    if "Afiliation" not in df.columns:
+        return df
+    return _expandir_afiliacoes(df.reset_index(drop=True)).reset_index(drop=True).infer_objects()
+
+
+def _expandir_autores(df, expandir_afiliacoes):
+    """Expande Autores/Afiliation; o índice do resultado é a posição da linha de origem."""
+    if "Autores" not in df.columns or "Afiliation" not in df.columns:
+        return _expandir_afiliacoes(df) if expandir_afiliacoes else df
+    com_autores = df["Autores"].notna()
+    if not com_autores.any():
+        return _expandir_afiliacoes(df) if expandir_afiliacoes else df
+    base = df[com_autores]
+
+    autores = _explodir_lista(base["Autores"].astype(str), r',\s*(?=[A-Z])')
+    afiliacoes = _explodir_lista(
+        base["Afiliation"].astype(str).str.replace("\n", " ", regex=False), r'\.\s+|\.$')
+
+    n_autores = autores.groupby(level=0).size().reindex(base.index, fill_value=0)
+    n_afiliacoes = afiliacoes.groupby(level=0).size().reindex(base.index, fill_value=0)
+
+    # Afiliação única com vários autores: repete a afiliação para cada autor
+    repetir = (n_afiliacoes == 1) & (n_autores > 1)
+    if repetir.any():
+        unicas = afiliacoes[afiliacoes.index.isin(repetir[repetir].index)]
+        afiliacoes = pd.concat([
+            afiliacoes[~afiliacoes.index.isin(unicas.index)],
+            unicas.repeat(n_autores[unicas.index].to_numpy()),
+        ]).sort_index(kind="stable")
+        n_afiliacoes[repetir] = n_autores[repetir]
+
+    divergentes = n_autores.index[n_autores != n_afiliacoes]
+    if len(divergentes):
+        autores_por_linha = _agrupar_por_linha(autores[autores.index.isin(divergentes)])
+        afiliacoes_por_linha = _agrupar_por_linha(afiliacoes[afiliacoes.index.isin(divergentes)])
+    for linha in divergentes:
+        lista_autores = autores_por_linha.get(linha, [])
+        lista_afiliacoes = afiliacoes_por_linha.get(linha, [])
+        print(f"[⚠️ Aviso] {len(lista_autores)} autores e {len(lista_afiliacoes)} afiliações não coincidem.")
+        print("-> Autores:", lista_autores)
+        print("-> Afiliacoes:", lista_afiliacoes)
+
+    # Pareia autor e afiliação pela posição; o lado mais curto fica em branco
+    pares = _posicoes(autores).merge(
+        _posicoes(afiliacoes), on=["linha", "pos"], how="outer", suffixes=("_autor", "_afil"))
+    afil = pares["valor_afil"].fillna("")
+    pares = pd.DataFrame({
+        "linha": pares["linha"],
+        "pos": pares["pos"],
+        "Autores": pares["valor_autor"].fillna(""),
+        "Afiliation": afil,
+        "country": paises_das_afiliacoes(afil),
+    })
+
+    # Linhas sem autores seguem inalteradas
+    sem_autores = df[~com_autores]
+    plano = pd.concat([pares, pd.DataFrame({
+        "linha": sem_autores.index,
+        "pos": 0,
+        "Autores": sem_autores["Autores"],
+        "Afiliation": sem_autores["Afiliation"],
+        "country": sem_autores["country"] if "country" in df.columns else np.nan,
+    })], ignore_index=True).sort_values(["linha", "pos"], kind="stable")
+    if pares.empty:
+        plano = plano.drop(columns="country")
+
+    if expandir_afiliacoes:
+        posicoes, novos = _dividir_afiliacoes(plano["Afiliation"])
+        plano = plano.iloc[posicoes].copy()
+        plano["Afiliation"] = novos
+
+    resultado = df.loc[plano["linha"].to_numpy()].copy()
+    for coluna in plano.columns.drop(["linha", "pos"]):
+        resultado[coluna] = plano[coluna].to_numpy()
+    return resultado
+
+
+def expand_authors_column(df, expandir_afiliacoes=False):
+    """Cria uma linha por autor, pareando cada autor com sua afiliação e país.
+
+    Uma afiliação única é repetida para todos os autores da linha. Com
+    expandir_afiliacoes=True, aplica também expand_affiliations_column no mesmo
+    passo, sem materializar o dataframe intermediário. O país é reconhecido na
+    afiliação por nomes de países e cidades (paises.paises_das_afiliacoes) e
+    fica vazio quando nenhum aparece.
+    """
+    if "Autores" not in df.columns or "Afiliation" not in df.columns:
+        return expand_affiliations_column(df) if expandir_afiliacoes else df
+    resultado = _expandir_autores(df.reset_index(drop=True), expandir_afiliacoes)
+    # Colunas que só tinham texto nas linhas descartadas voltam ao tipo numérico
+    return resultado.reset_index(drop=True).infer_objects()
+
+
+# Tipos das colunas do dataframe expandido: rótulos repetidos em várias linhas
+# ficam categóricos e os números aceitam valores ausentes
+ESQUEMA = {
+    "Num": "Int64",
+    "Num de Ref": "Int64",
+    "Region": "category",
+    "country": "category",
+    "Autores": "category",
+    "Afiliation": "category",
+    "Public": "category",
+    "Design": "category",
+}
+
+
+def _coagir_inteiros(serie):
+    """Converte para Int64 se todos os números forem inteiros exatos; com decimais, mantém a coluna.
+
+    Se houver textos não numéricos, a coluna fica como texto ("12.0" vira "12")
+    e as células vazias continuam ausentes.
+    """
+    if pd.api.types.is_integer_dtype(serie):
+        return serie.astype("Int64")
+    texto = serie.astype("string").str.strip()
+    preenchidos = (texto.fillna("") != "").to_numpy()
+    numeros = pd.to_numeric(texto.mask(~preenchidos), errors="coerce")
+    validos = numeros.notna().to_numpy()
+    if (numeros[validos] != np.trunc(numeros[validos])).any():
+        # Truncar perderia os decimais
+        return serie
+    if (preenchidos & ~validos).any():
+        resultado = serie.astype(object).where(preenchidos, np.nan)
+        resultado[validos] = numeros[validos].astype("int64").astype(str)
+        return resultado
+    return numeros.astype("Int64")
+
+
+def _categorizar(serie):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.cat.remove_unused_categories()
+    else:
+        serie = serie.astype("category")
+    # Coluna toda vazia: categorias de texto, venha ela de números ou de textos ausentes
+    if serie.cat.categories.empty and serie.cat.categories.dtype != object:
+        serie = serie.cat.set_categories(pd.Index([], dtype=object))
+    return serie
+
+
+def aplicar_esquema(df):
+    """Converte as colunas do dataframe expandido para os tipos de ESQUEMA."""
+    for coluna, tipo in ESQUEMA.items():
+        if coluna not in df.columns:
+            continue
+        if tipo == "category":
+            df[coluna] = _categorizar(df[coluna])
+        else:
+            df[coluna] = _coagir_inteiros(df[coluna])
+    return df
+
+
+def concatenar(partes):
+    """Junta partes do dataframe expandido, unificando as categorias de cada coluna."""
+    if not partes:
+        return pd.DataFrame()
+    return aplicar_esquema(pd.concat(partes, ignore_index=True))
+
+
+def _preparar_com_origem(df):
+    """Como preparar_dataframe, mas devolve também a linha de origem de cada linha expandida."""
+    df = df.reset_index(drop=True)
+    if "Ref" in df.columns:
+        df = _expandir_refs(df)
+    origem = df.index.to_numpy()
+    df = _expandir_autores(df.reset_index(drop=True), expandir_afiliacoes=True)
+    origem = origem[df.index.to_numpy()]
+    df = aplicar_esquema(df.reset_index(drop=True).infer_objects())
+    return df, origem
+
+
+def preparar_dataframe(df):
+    """Aplica as expansões de Ref, Autores e Afiliation à planilha crua."""
+    return _preparar_com_origem(df)[0]
+
+
+def preparar_em_blocos(blocos):
+    """Expande cada bloco da planilha assim que ele chega, sem reter os anteriores.
+
+    As expansões só dependem da própria linha, então processar bloco a bloco dá o
+    mesmo resultado que processar a planilha inteira.
+    """
+    for bloco in blocos:
+        yield preparar_dataframe(bloco)
+
+
+class ExpansaoIncremental:
+    """Mantém o último resultado expandido e reprocessa só as linhas cruas que mudaram.
+
+    Cada linha da planilha é identificada pela coluna Num e por uma impressão
+    digital do seu conteúdo. Linhas sem Num, ou com Num repetido, são sempre
+    reprocessadas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._colunas = None
+        self._chaves = pd.Index([])
+        self._impressoes = np.array([], dtype=np.uint64)
+        self._expandido = None
+        self._origem = None
+        self.alteracoes = {"adicionadas": 0, "alteradas": 0, "removidas": 0}
+
+    def preparar(self, df):
+        resultado, = self.preparar_em_blocos([df])
+        return resultado
+
+    def estado(self):
+        """Retorna o estado atual para ser gravado junto com o snapshot."""
+        with self._lock:
+            return {
+                "colunas": self._colunas,
+                "chaves": self._chaves.to_numpy(),
+                "impressoes": self._impressoes,
+                "expandido": self._expandido,
+                "origem": self._origem,
+            }
+
+    def restaurar(self, estado):
+        """Retoma o estado de um snapshot, para que a próxima atualização só reprocesse o que mudou."""
+        with self._lock:
+            self._colunas = estado["colunas"]
+            self._chaves = pd.Index(estado["chaves"])
+            self._impressoes = np.asarray(estado["impressoes"], dtype=np.uint64)
+            self._expandido = estado["expandido"]
+            self._origem = np.asarray(estado["origem"], dtype=object)
+
+    def preparar_em_blocos(self, blocos):
+        """Como preparar_em_blocos, reaproveitando as linhas do carregamento anterior.
+
+        O estado só é atualizado quando todos os blocos foram consumidos; um
+        carregamento interrompido mantém o resultado anterior. Sem nenhum bloco
+        (planilha igual à já lida), o estado anterior também é mantido.
+        """
+        with self._lock:
+            colunas_anteriores = self._colunas
+            chaves_anteriores, impressoes_anteriores = self._chaves, self._impressoes
+            expandido_anterior, origem_anterior = self._expandido, self._origem
+
+        partes, origens, chaves_lidas, impressoes_lidas = [], [], [], []
+        reprocessadas = 0
+        for bloco in blocos:
+            bloco = bloco.reset_index(drop=True)
+            impressoes = pd.util.hash_pandas_object(bloco, index=False).to_numpy()
+            if "Num" in bloco.columns:
+                chaves = bloco["Num"].where(bloco["Num"].notna() & ~bloco["Num"].duplicated(keep=False))
+            else:
+                chaves = pd.Series(np.nan, index=bloco.index)
+            validas = chaves.notna().to_numpy()
+
+            # Linhas com o mesmo Num e o mesmo conteúdo do carregamento anterior
+            reaproveitar = np.zeros(len(bloco), dtype=bool)
+            if expandido_anterior is not None and list(bloco.columns) == colunas_anteriores \
+                    and len(chaves_anteriores):
+                indice = chaves_anteriores.get_indexer(chaves)
+                conhecidas = validas & (indice >= 0)
+                reaproveitar = conhecidas & (
+                    impressoes_anteriores[np.where(conhecidas, indice, 0)] == impressoes)
+
+            pedacos, origem_bloco = [], []
+            if reaproveitar.any():
+                posicoes = np.flatnonzero(reaproveitar)
+                indice_anterior = pd.Index(chaves.to_numpy()[posicoes]).get_indexer(origem_anterior)
+                manter = indice_anterior >= 0
+                pedacos.append(expandido_anterior[manter])
+                origem_bloco.append(posicoes[indice_anterior[manter]])
+
+            novas = np.flatnonzero(~reaproveitar)
+            reprocessadas += len(novas)
+            if len(novas) or not pedacos:
+                expandido, origem = _preparar_com_origem(bloco.iloc[novas])
+                pedacos.append(expandido)
+                origem_bloco.append(novas[origem])
+
+            origem = np.concatenate(origem_bloco)
+            ordem = np.argsort(origem, kind="stable")
+            resultado = aplicar_esquema(pd.concat(pedacos).iloc[ordem].reset_index(drop=True).infer_objects())
+            # Linhas reaproveitadas podem trazer "country" de quando o bloco tinha autores;
+            # a expansão só cria a coluna se alguma linha ainda tem (Autores vazio = sem autores)
+            if "country" in resultado.columns and "country" not in bloco.columns \
+                    and resultado["Autores"].isna().all():
+                resultado = resultado.drop(columns="country")
+
+            partes.append(resultado)
+            origens.append(chaves.to_numpy()[origem[ordem]])
+            chaves_lidas.append(chaves.to_numpy()[validas])
+            impressoes_lidas.append(impressoes[validas])
+            colunas = list(bloco.columns)
+            yield resultado
+
+        if not partes:
+            with self._lock:
+                self.alteracoes = {"adicionadas": 0, "alteradas": 0, "removidas": 0}
+            return
+
+        # Num repetido em blocos diferentes também deixa de servir como chave
+        chaves = pd.Series(np.concatenate(chaves_lidas), dtype=object)
+        unicas = ~chaves.duplicated(keep=False).to_numpy()
+        chaves_atuais = set(chaves[unicas])
+        anteriores = set(chaves_anteriores)
+        adicionadas = len(chaves_atuais - anteriores)
+        origem = pd.Series(np.concatenate(origens), dtype=object)
+        origem = origem.where(origem.isin(chaves_atuais)).to_numpy()
+
+        with self._lock:
+            self._colunas = colunas
+            self._chaves = pd.Index(chaves[unicas].to_numpy())
+            self._impressoes = np.concatenate(impressoes_lidas)[unicas]
+            self._expandido = concatenar(partes)
+            self._origem = origem
+            self.alteracoes = {
+                "adicionadas": adicionadas,
+                "alteradas": reprocessadas - adicionadas,
+                "removidas": len(anteriores - chaves_atuais),
+            }
@@ -1,10 +1,25 @@
 # processador_referencias.py
 
 import re
+from functools import lru_cache
 import pandas as pd
-from PyQt5.QtWidgets import (QMessageBox)
+
+# Campos já analisados em uma sessão anterior (carregados do snapshot)
+_campos_salvos = {}
+
 
 def extrair_campos_apa(texto):
+    # Referências que não mudaram entre atualizações não são analisadas de novo
+    campos = _campos_salvos.get(texto)
+    return dict(campos if campos is not None else _extrair_campos_apa(texto))
+
+
+def registrar_campos_apa(campos_por_texto):
+    _campos_salvos.update(campos_por_texto)
+
+
+@lru_cache(maxsize=65536)
+def _extrair_campos_apa(texto):
     campos = {
         'author': '', 'year': '', 'title': '',
         'journal': '', 'booktitle': '', 'number': '',
@@ -91,28 +106,38 @@ def extrair_autores_completos(campo_autor):
     return autores_extraidos
 
 
-
-def carregar_excel(self):
-        # Tenta usar self.sheet_csv_url se existir e não for vazio
-        url_csv = None
-        if hasattr(self, 'sheet_csv_url') and self.sheet_csv_url:
-            url_csv = self.sheet_csv_url
-        else:
-            # Caso não exista ou seja vazio, usa a url do QLineEdit
-            url = self.url_edit.text().strip()
-            if not url:
-                url = self.url_padrao  # usa padrão se vazio
-            url_csv = self.transformar_link_para_csv(url)
-
-        try:
-            df = pd.read_csv(url_csv)
-            if "Ref" not in df.columns:
-                QMessageBox.critical(self, "Erro", "A coluna 'Ref' não foi encontrada na planilha.")
-                return
-            referencias = "\n\n".join(str(ref).strip() for ref in df["Ref"] if pd.notna(ref))
-            self.input_edit.setPlainText(referencias)
-            self.converter()
-            self.salvar_bibtex()
-            self.bibtex_viewer.reload_data()
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao ler a planilha do Google Sheets:\n{e}")
\ No newline at end of file
+def juntar_referencias(refs):
+    """Junta os textos da coluna Ref, separados por linha em branco, como na aba Bib."""
+    return "\n\n".join(
+        str(ref).strip() for ref in refs
+        if pd.notna(ref) and not str(ref).strip().startswith(".")
+    )
+
+
+def separar_referencias(entrada):
+    """Divide o texto em referências individuais, ignorando as que começam com ponto."""
+    entradas = re.split(r'\n{2,}', entrada.strip())
+    entradas = [e for e in entradas if not e.strip().startswith(".")]
+
+    referencias_separadas = []
+    for entrada in entradas:
+        partes = [r.strip() for r in entrada.split('\n\n') if r.strip()]
+        referencias_separadas.extend(partes)
+    return referencias_separadas
+
+
+def gerar_bibtex(referencias):
+    """Converte referências APA em BibTeX; retorna o texto e os campos extraídos de cada uma."""
+    bibtex_total = ""
+    lista_campos = []
+    for idx, entrada_individual in enumerate(referencias, 1):
+        campos = extrair_campos_apa(entrada_individual)
+        lista_campos.append(campos)
+
+        bibtex = f"@article{{ref{idx},\n"
+        for campo, valor in campos.items():
+            if valor:
+                bibtex += f"  {campo} = {{{valor}}},\n"
+        bibtex += f"  note = {{{entrada_individual.strip()}}}\n}}\n\n"
+        bibtex_total += bibtex
+    return bibtex_total.strip(), lista_campos
@@ -0,0 +1,182 @@
+# seletor_autores.py
+
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QListView, QLabel
+
+
+class ModeloAutores(QAbstractListModel):
+    """Lista de autores com contagem, marcáveis, sem um widget por autor.
+
+    Ordenar e filtrar só trocam o array de posições exibidas; as contagens
+    vêm prontas (do índice da coluna Autores) e não são recalculadas.
+    """
+
+    selecao_alterada = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._autores = np.array([], dtype=object)
+        self._contagens = np.array([], dtype=np.int64)
+        self._minusculos = []
+        self._ordens = {True: np.arange(0), False: np.arange(0)}
+        self._exibidos = np.arange(0)
+        self._marcados = set()
+        self.por_frequencia = True
+        self.texto_filtro = ""
+
+    def definir_contagens(self, contagens):
+        """contagens: {autor: linhas}, na ordem em que os autores aparecem na planilha."""
+        self.beginResetModel()
+        self._autores = np.array(list(contagens), dtype=object)
+        self._contagens = np.fromiter(contagens.values(), dtype=np.int64, count=len(contagens))
+        self._minusculos = [str(a).lower() for a in self._autores]
+        # Empates na ordem em que os autores aparecem na planilha
+        frequencia = np.argsort(-self._contagens, kind="stable")
+        alfabetica = frequencia[np.argsort(
+            np.array(self._minusculos, dtype=object)[frequencia], kind="stable")]
+        self._ordens = {True: frequencia, False: alfabetica}
+        self._marcados = set()
+        self.texto_filtro = ""
+        self._exibidos = self._ordens[self.por_frequencia]
+        self.endResetModel()
+
+    def ordenar(self, por_frequencia):
+        self.beginResetModel()
+        self.por_frequencia = por_frequencia
+        self._exibidos = self._filtrados(self._ordens[por_frequencia], self.texto_filtro)
+        self.endResetModel()
+
+    def filtrar(self, texto):
+        """Mostra só os autores cujo nome contém o texto (sem diferenciar maiúsculas)."""
+        texto = texto.strip().lower()
+        if texto == self.texto_filtro:
+            return
+        # Se o texto só cresceu, basta filtrar o que já estava exibido
+        base = self._exibidos if texto.startswith(self.texto_filtro) else self._ordens[self.por_frequencia]
+        self.beginResetModel()
+        self.texto_filtro = texto
+        self._exibidos = self._filtrados(base, texto)
+        self.endResetModel()
+
+    def _filtrados(self, posicoes, texto):
+        if not texto:
+            return posicoes
+        minusculos = self._minusculos
+        return np.array([p for p in posicoes.tolist() if texto in minusculos[p]], dtype=np.intp)
+
+    def total(self):
+        return len(self._autores)
+
+    def selecionados(self):
+        """Autores marcados, na ordem atual da lista completa."""
+        return [self._autores[p] for p in self._ordens[self.por_frequencia].tolist() if p in self._marcados]
+
+    def limpar_selecao(self):
+        if self._marcados:
+            self._marcados = set()
+            self._avisar_mudanca(0, self.rowCount() - 1)
+
+    def alternar(self, indice):
+        if not indice.isValid():
+            return
+        posicao = int(self._exibidos[indice.row()])
+        if posicao in self._marcados:
+            self._marcados.discard(posicao)
+        else:
+            self._marcados.add(posicao)
+        self._avisar_mudanca(indice.row(), indice.row())
+        self.selecao_alterada.emit()
+
+    def _avisar_mudanca(self, primeira, ultima):
+        if ultima >= primeira:
+            self.dataChanged.emit(self.index(primeira), self.index(ultima), [Qt.CheckStateRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._exibidos)
+
+    def flags(self, indice):
+        # Sem ItemIsUserCheckable: o clique em qualquer ponto da linha é tratado em alternar()
+        return Qt.ItemIsEnabled
+
+    def data(self, indice, papel=Qt.DisplayRole):
+        if not indice.isValid():
+            return None
+        posicao = int(self._exibidos[indice.row()])
+        if papel == Qt.DisplayRole:
+            return f"{self._autores[posicao]} ({self._contagens[posicao]})"
+        if papel == Qt.CheckStateRole:
+            return Qt.Checked if posicao in self._marcados else Qt.Unchecked
+        if papel == Qt.UserRole:
+            return self._autores[posicao]
+        return None
+
+
+class ListaAutores(QListView):
+    """Lista que marca o autor com um clique ou com Espaço/Enter na linha atual."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Só clicked: activated também dispara no clique em estilos de ativação por clique único
+        self.clicked.connect(self._alternar)
+
+    def _alternar(self, indice):
+        self.model().alternar(indice)
+
+    def keyPressEvent(self, evento):
+        if evento.key() in (Qt.Key_Space, Qt.Key_Return, Qt.Key_Enter) and self.currentIndex().isValid():
+            self._alternar(self.currentIndex())
+            evento.accept()
+            return
+        super().keyPressEvent(evento)
+
+
+class SeletorAutores(QWidget):
+    """Campo de busca e lista de autores marcáveis, para ser colocado no menu de autores."""
+
+    def __init__(self, modelo, parent=None):
+        super().__init__(parent)
+        self.modelo = modelo
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 4, 6, 4)
+        layout.setSpacing(4)
+
+        self.campo = QLineEdit()
+        self.campo.setPlaceholderText("Digite para filtrar autores")
+        self.campo.setClearButtonEnabled(True)
+        layout.addWidget(self.campo)
+
+        self.lista = ListaAutores()
+        self.lista.setModel(modelo)
+        # Linhas de mesma altura: a lista não mede cada autor para rolar
+        self.lista.setUniformItemSizes(True)
+        self.lista.setMinimumSize(320, 360)
+        layout.addWidget(self.lista)
+
+        self.rotulo = QLabel()
+        layout.addWidget(self.rotulo)
+
+        # Digitação rápida filtra uma vez só
+        self.temporizador = QTimer(self)
+        self.temporizador.setSingleShot(True)
+        self.temporizador.setInterval(150)
+        self.temporizador.timeout.connect(self._filtrar)
+        self.campo.textChanged.connect(lambda _: self.temporizador.start())
+
+        modelo.modelReset.connect(self._atualizar_rotulo)
+        modelo.selecao_alterada.connect(self._atualizar_rotulo)
+        self._atualizar_rotulo()
+
+    def _filtrar(self):
+        self.modelo.filtrar(self.campo.text())
+
+    def limpar_campo(self):
+        self.temporizador.stop()
+        self.campo.blockSignals(True)
+        self.campo.clear()
+        self.campo.blockSignals(False)
+
+    def _atualizar_rotulo(self):
+        self.rotulo.setText(
+            f"{self.modelo.rowCount()} de {self.modelo.total()} autores; "
+            f"{len(self.modelo.selecionados())} marcados")
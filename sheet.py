@@ -1,27 +1,54 @@
 import sys
 import re
 import time
+# Referência para o modo --tempo-inicio (antes de importar Qt e pandas)
+INICIO = time.perf_counter()
 import os
 import os
-import csv
 from PyQt5.QtWidgets import QPushButton, QMessageBox
 from PyQt5.QtCore import QStandardPaths
 
 from config import sheet_csv_url
+from cache_planilha import impressao_planilha, ler_planilha
+from carregamento import CarregadorDados, ETAPAS_FUNDO, criar_grafo, relatorios_filtro
+from cache_relatorios import chave_filtro
+from snapshot import carregar_snapshot
+from seletor_autores import ModeloAutores, SeletorAutores
+from modelo_tabela import ModeloPlanilha
+from indices import IndicesFiltro
+from pipeline_dados import (
+    expand_ref_column, expand_authors_column, expand_affiliations_column, ExpansaoIncremental)
 import traceback
+import numpy as np
 import pandas as pd
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout,
-    QTableWidget, QTableWidgetItem,QSplashScreen, QPushButton, QMessageBox,
+    QTableView, QSplashScreen, QPushButton, QMessageBox,
     QFileDialog, QHBoxLayout, QMenuBar, QLabel, QAction,QLineEdit,
-    QTextEdit, QSplitter, QTabWidget)
-from PyQt5.QtCore import Qt, QTimer, QStandardPaths
-from PyQt5.QtGui import QColor, QFont, QPixmap, QIcon
+    QTextEdit, QSplitter, QTabWidget, QWidgetAction)
+from PyQt5.QtCore import Qt, QTimer, QStandardPaths, QObject, QEvent
+from PyQt5.QtGui import QPixmap, QIcon
 from processador_referencias import extrair_campos_apa, extrair_autores_completos
-from bibref import APA2BibtexWidget 
-from metricas import calcular_metricas,  exportar_metricas_texto_para_csv, calcular_metricas_detalhadas
-from bibtexmetrics import BibtexViewer
-from bib import     processar_entrada_bibtex, processar_visualizacao_formatada, processar_estatisticas_bibtex
+from metricas import (
+    Metricas, MetricasDetalhadas, exportar_metricas_para_csv, exportar_metricas_detalhe_para_csv)
+class MedidorPrimeiraPintura(QObject):
+    """Mostra quanto tempo a janela levou até ser pintada pela primeira vez e encerra o programa."""
+
+    def __init__(self, janela):
+        super().__init__(janela)
+        self.janela = janela
+        self.construida = time.perf_counter() - INICIO
+        janela.installEventFilter(self)
+
+    def eventFilter(self, objeto, evento):
+        if evento.type() == QEvent.Paint:
+            self.janela.removeEventFilter(self)
+            print(f"Janela construída em {self.construida:.2f}s; "
+                  f"primeira pintura em {time.perf_counter() - INICIO:.2f}s.")
+            QTimer.singleShot(0, self.janela.close)
+        return False
+
+
 class GoogleSheetsViewer(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -35,15 +62,44 @@ class GoogleSheetsViewer(QMainWindow):
 
         self.dataframe = pd.DataFrame()
         self.selected_region = None
+        self.selected_country = None
+        self.selected_year = None
+        self.autores_selecionados = []
+        self.indices = IndicesFiltro(self.dataframe)
+        self.texto_busca = ""
+        self.busca = None
+        self.cubo = None
+        self.linhas_filtradas = None
+        self.filtro_pendente = False
+        self.carregador = None
+        self.etapas_prontas = set()
+        self.expansao = ExpansaoIncremental()
+        self.calculo_aba = None
+        self.metricas_exibidas = None
+        self.visualizacao_bibtex_widget = None
+        self.estatisticas_bibtex_widget = None
+        self.atualizacao_pendente = False
+
+        # Etapas da interface entram no mesmo grafo das etapas de carregamento
+        self.grafo = criar_grafo()
+        self.grafo.adicionar("tabela", GoogleSheetsViewer._etapa_tabela, depende=("dados", "indices"))
+        self.grafo.adicionar("rotulo", GoogleSheetsViewer._etapa_rotulo, depende=("resumo",))
+        self.grafo.adicionar("pesquisa", GoogleSheetsViewer._etapa_pesquisa, depende=("dados", "busca"))
+        self.grafo.adicionar("textos_metricas", GoogleSheetsViewer._etapa_textos_metricas, depende=("metricas",))
+        self.grafo.adicionar("textos_bibtex", GoogleSheetsViewer._etapa_textos_bibtex, depende=("bibtex",))
+        self.grafo.adicionar("bib", GoogleSheetsViewer._etapa_bib, depende=("dados",))
+        self.grafo.adicionar("metricas_filtro", GoogleSheetsViewer._etapa_metricas_filtro, depende=("dados", "cubo"))
+        self.grafo.adicionar("textos_filtro", GoogleSheetsViewer._etapa_textos_filtro, depende=("relatorio_filtro",))
+        # Etapas da janela sempre em dia; as das abas Métricas e Bibtex (etapas_abas)
+        # só rodam com a aba visível, e até lá a versão guardada indica que estão sujas
+        self.etapas_janela = ("tabela", "rotulo", "pesquisa", "metricas_filtro")
+        self.etapas_interface = self.etapas_janela + ("textos_metricas", "textos_filtro", "textos_bibtex", "bib")
+
         self.init_ui()
-        self.load_data()
+        # Abre na hora com a última versão salva (se houver) e revalida em segundo plano
+        self.abrir_snapshot()
         self.refresh_data()
 
-        self.visualizacao_bibtex_widget.carregar_excel()
-
-
-        self.estatisticas_bibtex_widget.reload_data()
-            
     def init_ui(self):
         # --- Widget central e layout principal ---
         self.central_widget = QWidget()
@@ -66,6 +122,11 @@ class GoogleSheetsViewer(QMainWindow):
         url_layout.addWidget(url_label_text)
         url_layout.addWidget(self.url_lineedit)
         url_layout.addWidget(self.refresh_button)
+
+        self.cancel_button = QPushButton("✖ Cancelar")
+        self.cancel_button.clicked.connect(self.cancelar_carregamento)
+        self.cancel_button.setVisible(False)
+        url_layout.addWidget(self.cancel_button)
         main_layout.addLayout(url_layout)
 
         # --- Abas principais ---
@@ -83,6 +144,26 @@ class GoogleSheetsViewer(QMainWindow):
         self.setMenuBar(menubar)
         self.region_menu = menubar.addMenu("Filtrar por Região")
         self.author_menu = menubar.addMenu("Filtrar por Autor")
+        # Marcar vários autores seguidos gera uma única filtragem
+        self.temporizador_autores = QTimer(self)
+        self.temporizador_autores.setSingleShot(True)
+        self.temporizador_autores.setInterval(300)
+        self.temporizador_autores.timeout.connect(self.aplicar_autores)
+        self.modelo_autores = ModeloAutores(self)
+        self.modelo_autores.selecao_alterada.connect(self.temporizador_autores.start)
+        self.seletor_autores = None
+        action_todos = QAction("Todos", self)
+        action_todos.triggered.connect(self.clear_autor_filters)
+        self.author_menu.addAction(action_todos)
+        self.order_by_frequency = True
+        self.action_ordem_autores = QAction("Ordenar por: Alfabética", self)
+        self.action_ordem_autores.triggered.connect(self.toggle_autor_ordering)
+        self.author_menu.addAction(self.action_ordem_autores)
+        self.author_menu.addSeparator()
+        # A lista de autores só é montada quando o menu é aberto pela primeira vez
+        self.author_menu.aboutToShow.connect(self.montar_seletor_autores)
+        self.country_menu = menubar.addMenu("Filtrar por País")
+        self.year_menu = menubar.addMenu("Filtrar por Ano")
 
         # --- Painel esquerdo do visualizador ---
         left_widget = QWidget()
@@ -90,6 +171,18 @@ class GoogleSheetsViewer(QMainWindow):
         left_layout.setContentsMargins(0, 0, 0, 0)
         left_layout.setSpacing(5)
 
+        self.busca_lineedit = QLineEdit()
+        self.busca_lineedit.setPlaceholderText(
+            '🔍 Buscar em Ref, Titulo, Abstract e IA keywords ("frase exata", prefixo*)')
+        self.busca_lineedit.setClearButtonEnabled(True)
+        self.temporizador_busca = QTimer(self)
+        self.temporizador_busca.setSingleShot(True)
+        self.temporizador_busca.setInterval(250)
+        self.temporizador_busca.timeout.connect(self.aplicar_busca)
+        self.busca_lineedit.textChanged.connect(self.temporizador_busca.start)
+        self.busca_lineedit.returnPressed.connect(self.aplicar_busca)
+        left_layout.addWidget(self.busca_lineedit)
+
         self.region_label = QLabel("Visualizando: Geral (Todas)")
         self.region_label.setContentsMargins(0, 0, 0, 0)
         left_layout.addWidget(self.region_label)
@@ -100,11 +193,13 @@ class GoogleSheetsViewer(QMainWindow):
         left_layout.addWidget(self.metrics_label)
 
         # --- Tabela de dados ---
-        self.table = QTableWidget()
+        self.modelo_tabela = ModeloPlanilha(self)
+        self.table = QTableView()
+        self.table.setModel(self.modelo_tabela)
         self.table.verticalHeader().setVisible(False)
         self.table.setAlternatingRowColors(True)
         self.table.setSortingEnabled(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectItems)
+        self.table.setSelectionBehavior(QTableView.SelectItems)
         self.table.horizontalHeader().setStretchLastSection(True)
         left_layout.addWidget(self.table)
 
@@ -141,8 +236,103 @@ class GoogleSheetsViewer(QMainWindow):
 
         self.tabs.addTab(self.visualizador_widget, "Visualizador de Planilha")
 
-        # === Aba: Métricas ===
+        # === Abas Métricas e Bibtex: construídas só quando abertas pela primeira vez ===
         self.aba_metricas = QWidget()
+        self.tabs.addTab(self.aba_metricas, " Métricas")
+        self.aba_bibtex = QWidget()
+        self.tabs.addTab(self.aba_bibtex, " Bibtex")
+        self.abas_pendentes = {
+            self.aba_metricas: self.construir_aba_metricas,
+            self.aba_bibtex: self.construir_aba_bibtex,
+        }
+        self.etapas_abas = {
+            self.aba_metricas: ("textos_metricas",),
+            self.aba_bibtex: ("textos_bibtex", "bib"),
+        }
+        self.tabs.currentChanged.connect(self.on_aba_alterada)
+    
+    def on_aba_alterada(self, indice):
+        construir = self.abas_pendentes.pop(self.tabs.widget(indice), None)
+        if construir is not None:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            try:
+                construir()
+            finally:
+                QApplication.restoreOverrideCursor()
+        self.atualizar_aba_visivel()
+        self.mostrar_filtro_atual()
+        self.atualizar_diagnostico()
+
+    def _etapas_aba_visivel(self):
+        aba = self.tabs.currentWidget()
+        if aba in self.abas_pendentes:
+            return ()
+        etapas = self.etapas_abas.get(aba, ())
+        if aba is self.aba_metricas:
+            # A subaba Filtro atual tem etapas próprias, além das da aba
+            etapas += self.etapas_abas.get(self.subtabs_metricas.currentWidget(), ())
+        return etapas
+
+    def _etapas_fundo(self):
+        # O que a aba visível precisa entra no mesmo carregamento; as outras esperam ser abertas
+        extras = [
+            dependencia for etapa in self._etapas_aba_visivel()
+            for dependencia in self.grafo.dependencias(etapa)
+            if dependencia not in self.etapas_interface]
+        return ETAPAS_FUNDO + tuple(dict.fromkeys(extras))
+
+    def atualizar_aba_visivel(self):
+        """Calcula o conteúdo da aba visível se os dados mudaram desde que ela foi mostrada."""
+        etapas = self._etapas_aba_visivel()
+        if not etapas or self.grafo.versao("dados") is None:
+            return
+        if self.carregador is not None or self.calculo_aba is not None:
+            # Chamado de novo quando o trabalho em andamento terminar
+            return
+        self._calcular_etapas(etapas)
+
+    def _calcular_etapas(self, etapas):
+        fundo = [e for e in self.grafo.desatualizadas(etapas) if e not in self.etapas_interface]
+        if not fundo:
+            self.grafo.executar(etapas, self, atualizar_origens=False)
+            return
+        # Métricas e BibTeX são calculados fora da thread da interface
+        calculo = CarregadorDados(
+            self.sheet_csv_url, self.expansao, self.grafo, self,
+            alvos=fundo, atualizar_origens=False)
+        calculo.progresso.connect(self.on_carregamento_progresso)
+        calculo.concluido.connect(self.on_calculo_aba_concluido)
+        calculo.falhou.connect(self.on_calculo_aba_falhou)
+        calculo.finished.connect(lambda c=calculo: self.on_carregador_finalizado(c))
+        self.calculo_aba = calculo
+        calculo.start()
+
+    def on_calculo_aba_concluido(self, resultado):
+        if self.sender() is not self.calculo_aba:
+            return
+        self.calculo_aba = None
+        self.statusBar().clearMessage()
+        # A tabela também, se o cálculo veio de um carregamento cancelado (on_carregamento_cancelado)
+        self.grafo.executar(self.etapas_janela, self, atualizar_origens=False)
+        self.atualizar_aba_visivel()
+
+    def on_calculo_aba_falhou(self, mensagem):
+        if self.sender() is not self.calculo_aba:
+            return
+        self.calculo_aba = None
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, "Erro", f"Ocorreu um erro ao calcular a aba:\n{mensagem}")
+
+    def _cancelar_calculo_aba(self):
+        if self.calculo_aba is not None:
+            self.calculo_aba.cancelar()
+            self.calculo_aba = None
+
+    def _etapa(self, percentual, mensagem):
+        # Progresso das etapas do grafo quando rodam na thread da interface (load_data)
+        self.statusBar().showMessage(f"{mensagem} ({percentual}%)")
+
+    def construir_aba_metricas(self):
         layout_metricas = QVBoxLayout(self.aba_metricas)
         layout_metricas.setContentsMargins(10, 10, 10, 10)
         layout_metricas.setSpacing(10)
@@ -186,12 +376,74 @@ class GoogleSheetsViewer(QMainWindow):
 
         self.subtabs_metricas.addTab(self.subaba_detalhes, " Detalhes")
         self.subtabs_metricas.addTab(self.subaba_visao_geral, " Visão Geral")
-        # Adiciona a aba Métricas (com subabas internas) no widget principal
-        self.tabs.addTab(self.aba_metricas, " Métricas")
-    
 
-        # === Aba: Bibtex com abas internas ===
-        self.aba_bibtex = QWidget()
+        # Subaba 3: métricas das linhas do filtro atual, respondidas pelo cubo
+        self.subaba_filtro = QWidget()
+        layout_filtro = QVBoxLayout(self.subaba_filtro)
+        layout_filtro.setContentsMargins(10, 10, 10, 10)
+        layout_filtro.setSpacing(10)
+
+        divisor_filtro = QSplitter(Qt.Vertical)
+        self.filtro_textedit = QTextEdit()
+        self.filtro_textedit.setReadOnly(True)
+        divisor_filtro.addWidget(self.filtro_textedit)
+        # Relatório completo das linhas filtradas, calculado em segundo plano
+        self.filtro_relatorio_textedit = QTextEdit()
+        self.filtro_relatorio_textedit.setReadOnly(True)
+        divisor_filtro.addWidget(self.filtro_relatorio_textedit)
+        layout_filtro.addWidget(divisor_filtro)
+
+        self.subtabs_metricas.addTab(self.subaba_filtro, " Filtro atual")
+        self.etapas_abas[self.subaba_filtro] = ("textos_filtro",)
+
+        # Subaba 4: Diagnóstico do cache de relatórios e das etapas
+        self.subaba_diagnostico = QWidget()
+        layout_diagnostico = QVBoxLayout(self.subaba_diagnostico)
+        layout_diagnostico.setContentsMargins(10, 10, 10, 10)
+        layout_diagnostico.setSpacing(10)
+
+        self.diagnostico_textedit = QTextEdit()
+        self.diagnostico_textedit.setReadOnly(True)
+        layout_diagnostico.addWidget(self.diagnostico_textedit)
+
+        self.btn_atualizar_diagnostico = QPushButton("🔄 Atualizar")
+        self.btn_atualizar_diagnostico.clicked.connect(self.atualizar_diagnostico)
+        layout_diagnostico.addWidget(self.btn_atualizar_diagnostico)
+
+        self.subtabs_metricas.addTab(self.subaba_diagnostico, " Diagnóstico")
+        self.subtabs_metricas.currentChanged.connect(self.on_subaba_metricas_alterada)
+
+    def on_subaba_metricas_alterada(self, indice):
+        self.mostrar_filtro_atual()
+        self.atualizar_aba_visivel()
+        self.atualizar_diagnostico()
+
+    def atualizar_diagnostico(self):
+        """Acertos e falhas do cache de relatórios e execuções de cada etapa, com a subaba visível."""
+        if self.tabs.currentWidget() is not self.aba_metricas or self.aba_metricas in self.abas_pendentes:
+            return
+        if self.subtabs_metricas.currentWidget() is not self.subaba_diagnostico:
+            return
+        estatisticas = relatorios_filtro.estatisticas()
+        linhas = [
+            "🗄️ Cache de relatórios por filtro:",
+            f" - Itens: {estatisticas['itens']} de {estatisticas['max_itens']}",
+            f" - Memória: {estatisticas['bytes'] / 1024:.0f} KB de {estatisticas['max_bytes'] / 1024 ** 2:.0f} MB",
+            f" - Acertos: {estatisticas['acertos']}",
+            f" - Falhas: {estatisticas['falhas']}",
+            f" - Descartados: {estatisticas['descartes']}",
+            f" - Taxa de acertos: {100 * estatisticas['taxa_acertos']:.1f}%",
+            "",
+            "⚙️ Execuções por etapa:",
+        ]
+        linhas.extend(f" - {nome}: {quantidade}" for nome, quantidade in self.grafo.execucoes.items())
+        self.diagnostico_textedit.setPlainText("\n".join(linhas))
+
+    def construir_aba_bibtex(self):
+        # Importado aqui: bibref carrega matplotlib, wordcloud e bibtexparser
+        from bibref import APA2BibtexWidget
+        from bibtexmetrics import BibtexViewer
+        
         layout_bibtex = QVBoxLayout(self.aba_bibtex)
         layout_bibtex.setContentsMargins(10, 10, 10, 10)
         layout_bibtex.setSpacing(10)
@@ -225,14 +477,12 @@ class GoogleSheetsViewer(QMainWindow):
         self.estatisticas_bibtex_textedit.setReadOnly(True)
         layout_estat.addWidget(self.estatisticas_bibtex_textedit)
 
-        self.tabs.addTab(self.aba_bibtex, " Bibtex")
-        
         self.tabs_bibtex_internos.addTab(self.visualizacao_bibtex_widget, "Bib")
 
         self.tabs_bibtex_internos.addTab(self.estatisticas_bibtex_widget, "Visualização Formatada")
-        # --- Carrega os dados inicialmente ---
-        self.refresh_data()
-    
+        # Os widgets acabaram de ler a versão atual; só recarregam quando ela mudar
+        self.grafo.marcar("bib")
+
     def export_authors_affiliations(self):
         if self.dataframe.empty:
             QMessageBox.warning(self, "Aviso", "Nenhum dado disponível para exportar.")
@@ -283,7 +533,7 @@ class GoogleSheetsViewer(QMainWindow):
 
     def export_full_references(self):
         try:
-            df_raw = pd.read_csv(self.sheet_csv_url)
+            df_raw = ler_planilha(self.sheet_csv_url)
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao carregar dados crus:\n{e}")
             return
@@ -345,30 +595,184 @@ class GoogleSheetsViewer(QMainWindow):
             except Exception as e:
                 QMessageBox.critical(self, "Erro ao salvar URL", f"Não foi possível atualizar config.py:\n{e}")
 
-            # Mostra cursor de carregamento e atualiza UI
-            self.setCursor(Qt.WaitCursor)
-            QApplication.processEvents()
+            self.limpar_filtros()
 
-            # Reseta filtros e seleções
-            self.selected_region = None
-            if hasattr(self, 'autor_actions'):
-                for action in self.autor_actions:
-                    action.setChecked(False)
+            carregador = self.carregador
+            if carregador is not None and carregador.url == self.sheet_csv_url:
+                # Já há um carregamento desta planilha: pedidos repetidos viram
+                # uma única nova verificação quando ele terminar
+                self.atualizacao_pendente = True
+                return
+
+            # Cancela um carregamento de outra URL e inicia outro em segundo plano
+            self.cancelar_carregamento()
+            self._cancelar_calculo_aba()
+            self.atualizacao_pendente = False
+            carregador = CarregadorDados(
+                self.sheet_csv_url, self.expansao, self.grafo, self, alvos=self._etapas_fundo())
+            self.etapas_prontas = set()
+            carregador.progresso.connect(self.on_carregamento_progresso)
+            carregador.etapa_pronta.connect(self.on_etapa_pronta)
+            carregador.parcial.connect(self.on_carregamento_parcial)
+            carregador.concluido.connect(self.on_carregamento_concluido)
+            carregador.falhou.connect(self.on_carregamento_falhou)
+            carregador.cancelado.connect(self.on_carregamento_cancelado)
+            carregador.finished.connect(lambda c=carregador: self.on_carregador_finalizado(c))
+            self.carregador = carregador
+            self.setCursor(Qt.WaitCursor)
+            self.cancel_button.setVisible(True)
+            carregador.start()
 
-            # Recarrega dados
-            self.load_data()
-            self.region_label.setText("Visualizando: Geral (Todas)")
-            self.populate_table()
-            self.update_metrics()
-            self.setCursor(Qt.ArrowCursor)
-            self.visualizacao_bibtex_widget.carregar_excel()
-            self.estatisticas_bibtex_widget.reload_data()
- 
         except Exception as e:
             self.setCursor(Qt.ArrowCursor)
             traceback.print_exc()
             QMessageBox.critical(self, "Erro", f"Ocorreu um erro ao atualizar os dados:\n{e}")
 
+    def limpar_filtros(self):
+        if not (self.modelo_autores.selecionados() or self._selecoes() or self.texto_busca):
+            return
+        self.selected_region = self.selected_country = self.selected_year = None
+        self.autores_selecionados = []
+        self.texto_busca = ""
+        self.temporizador_busca.stop()
+        self.temporizador_autores.stop()
+        self.busca_lineedit.blockSignals(True)
+        self.busca_lineedit.clear()
+        self.busca_lineedit.blockSignals(False)
+        self.modelo_autores.limpar_selecao()
+        self.populate_table()
+
+    def _finalizar_carregamento(self):
+        self.carregador = None
+        self.setCursor(Qt.ArrowCursor)
+        self.cancel_button.setVisible(False)
+        if self.atualizacao_pendente:
+            QTimer.singleShot(0, self.refresh_data)
+
+    def cancelar_carregamento(self):
+        carregador = getattr(self, "carregador", None)
+        self.atualizacao_pendente = False
+        if carregador is not None:
+            carregador.cancelar()
+            self.carregador = None
+            self.setCursor(Qt.ArrowCursor)
+            self.cancel_button.setVisible(False)
+            self.statusBar().showMessage("Carregamento cancelado.", 3000)
+
+    def on_carregamento_progresso(self, percentual, mensagem):
+        if self.sender() in (self.carregador, self.calculo_aba):
+            self.statusBar().showMessage(f"{mensagem} ({percentual}%)")
+
+    def on_carregamento_parcial(self, primeiro_bloco, totais):
+        if self.sender() is not self.carregador:
+            return
+        self.metrics_label.setText(totais)
+        # Na primeira abertura mostra as primeiras linhas antes do fim do download
+        if primeiro_bloco is not None and self.dataframe.empty:
+            self.populate_table_custom(primeiro_bloco)
+
+    def on_etapa_pronta(self, nome):
+        if self.sender() is not self.carregador:
+            return
+        self.etapas_prontas.add(nome)
+        # Atualiza cada parte da interface assim que as etapas de que ela depende terminam
+        for etapa in self._etapas_interface():
+            if all(d in self.etapas_prontas for d in self.grafo.dependencias(etapa)):
+                self.grafo.executar([etapa], self, atualizar_origens=False)
+
+    def _etapas_interface(self):
+        return self.etapas_janela + self._etapas_aba_visivel()
+
+    def on_carregamento_concluido(self, resultado):
+        # Ignora resultados de carregamentos já substituídos ou cancelados
+        if self.sender() is not self.carregador:
+            return
+        self._finalizar_carregamento()
+
+        # Cada etapa da interface só roda se a versão dos dados mudou desde a última vez
+        self.grafo.executar(self.etapas_janela, self, atualizar_origens=False)
+        self.atualizar_aba_visivel()
+        alteracoes = resultado["alteracoes"]
+        self.statusBar().showMessage(
+            f"Dados carregados: {alteracoes['adicionadas']} linhas novas, "
+            f"{alteracoes['alteradas']} alteradas, {alteracoes['removidas']} removidas.", 5000)
+
+    def _etapa_tabela(self, df, indices):
+        # Troca o dataframe e os índices dos filtros de uma só vez
+        self.dataframe = df
+        self.indices = indices
+        # O índice de busca da versão anterior não vale para o novo dataframe
+        self.busca = None
+        # O cubo da versão anterior também não
+        self.cubo = None
+        self.autores_selecionados = []
+        self.temporizador_autores.stop()
+        self.update_region_menu()
+        self.update_author_menu()
+        self.update_country_menu()
+        self.update_year_menu()
+        self.populate_table()
+
+    def _etapa_pesquisa(self, df, busca):
+        self.busca = busca
+        if self.texto_busca:
+            self.populate_table()
+
+    def _etapa_rotulo(self, resumo):
+        # Com um filtro ativo o rótulo mostra os totais do filtro (atualizar_metricas_filtro)
+        if self.linhas_filtradas is None:
+            self.metrics_label.setText(resumo)
+
+    def _etapa_metricas_filtro(self, df, cubo):
+        self.cubo = cubo
+        self.atualizar_metricas_filtro()
+
+    def _etapa_textos_filtro(self, relatorio):
+        if relatorio is None:
+            self.filtro_relatorio_textedit.setPlainText(
+                "Nenhum filtro ativo: as métricas completas estão nas subabas Detalhes e Visão Geral.")
+        else:
+            self.filtro_relatorio_textedit.setPlainText(f"{relatorio['metricas']}\n{relatorio['detalhes']}")
+
+    def _etapa_textos_metricas(self, metricas):
+        # Resultados estruturados (ou o texto do erro); as exportações usam os mesmos objetos
+        self.metricas_exibidas = metricas
+        self.metricas_textedit.setPlainText(str(metricas["metricas"]))
+        self.metricas_detalhes_textedit.setPlainText(str(metricas["detalhes"]))
+
+    def _etapa_textos_bibtex(self, bibtex):
+        for nome, texto in bibtex.items():
+            getattr(self, f"{nome}_textedit").setPlainText(texto)
+
+    def _etapa_bib(self, df):
+        self.visualizacao_bibtex_widget.carregar_excel()
+        self.estatisticas_bibtex_widget.reload_data()
+
+    def on_carregamento_falhou(self, mensagem):
+        if self.sender() is not self.carregador:
+            return
+        self._finalizar_carregamento()
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, "Erro", f"Ocorreu um erro ao atualizar os dados:\n{mensagem}")
+
+    def on_carregamento_cancelado(self):
+        # O carregamento pode ter gravado uma versão nova dos dados antes de parar:
+        # sem outro em andamento, a tabela passa a mostrar essa versão
+        if self.carregador is not None or self.calculo_aba is not None or not self.isVisible():
+            return
+        if self.grafo.versao("dados") is not None and self.grafo.desatualizadas(self.etapas_janela):
+            self._calcular_etapas(self.etapas_janela)
+        self.atualizar_aba_visivel()
+
+    def on_carregador_finalizado(self, carregador):
+        carregador.deleteLater()
+
+    def closeEvent(self, event):
+        # Aguarda threads ainda ativas antes de destruir a janela
+        self.cancelar_carregamento()
+        for carregador in self.findChildren(CarregadorDados):
+            carregador.wait()
+        super().closeEvent(event)
 
     def converter_para_link_csv(self, url):
         match = re.search(r"/d/([a-zA-Z0-9_-]+)", url)
@@ -381,148 +785,66 @@ class GoogleSheetsViewer(QMainWindow):
             return url  # retorna como está se não for reconhecido
         
 
-    def exportar_metricas_detalhepara_csv(self):
-        texto = self.metricas_textedit.toPlainText().strip()
-        if not texto:
+    def _metricas_exibidas(self, chave, tipo):
+        resultado = self.metricas_exibidas.get(chave) if self.metricas_exibidas else None
+        if not isinstance(resultado, tipo):
             QMessageBox.warning(self, "Aviso", "Não há métricas para exportar.")
+            return None
+        return resultado
+
+    def exportar_metricas_detalhepara_csv(self):
+        detalhes = self._metricas_exibidas("detalhes", MetricasDetalhadas)
+        if detalhes is None:
             return
         try:
-            exportar_metricas_texto_para_csv(texto)
-
-            desktop = QStandardPaths.writableLocation(QStandardPaths.DesktopLocation)
-
-            # Caminho para a pasta PYMT dentro da área de trabalho
-            pasta_pymt = os.path.join(desktop, "PYMT")
-
-            # Cria a pasta se ela não existir
-            os.makedirs(pasta_pymt, exist_ok=True)
-
-            # Caminho completo do arquivo a ser salvo
-            
-            file_path = os.path.join(pasta_pymt, "metricas_detalhe.csv")
-
+            file_path = exportar_metricas_detalhe_para_csv(detalhes)
             QMessageBox.information(self, "Sucesso", f"Métricas exportadas com sucesso para:\n{file_path}")
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao salvar o CSV:\n{e}")
     def exportar_metricas_para_csv(self):
-        texto = self.metricas_textedit.toPlainText().strip()
-        if not texto:
-            QMessageBox.warning(self, "Aviso", "Não há métricas para exportar.")
+        metricas = self._metricas_exibidas("metricas", Metricas)
+        if metricas is None:
             return
         try:
-            exportar_metricas_texto_para_csv(texto)
-
-            desktop = QStandardPaths.writableLocation(QStandardPaths.DesktopLocation)
-
-            # Caminho para a pasta PYMT dentro da área de trabalho
-            pasta_pymt = os.path.join(desktop, "PYMT")
-
-            # Cria a pasta se ela não existir
-            os.makedirs(pasta_pymt, exist_ok=True)
-
-            # Caminho completo do arquivo a ser salvo
-            
-            file_path = os.path.join(pasta_pymt, "metricas.csv")
-
+            file_path = exportar_metricas_para_csv(metricas)
             QMessageBox.information(self, "Sucesso", f"Métricas exportadas com sucesso para:\n{file_path}")
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao salvar o CSV:\n{e}")
+    def abrir_snapshot(self):
+        try:
+            aberto = carregar_snapshot(self.sheet_csv_url, self.expansao)
+        except Exception as e:
+            print(f"[⚠️ Aviso] Não foi possível abrir o snapshot: {e}")
+            return False
+        if aberto is None:
+            return False
+        df, meta = aberto
+        self.grafo.definir("dados", df, (self.sheet_csv_url, meta["sha256"]))
+        self.grafo.executar(["tabela", "rotulo"], self, atualizar_origens=False)
+        self.statusBar().showMessage(
+            f"Aberto da versão salva em {time.ctime(meta['salvo_em'])}; verificando atualizações...")
+        return True
     def load_data(self):
+        # Com um carregamento ou cálculo em andamento, apenas pede uma nova verificação
+        if self.carregador is not None or self.calculo_aba is not None:
+            self.refresh_data()
+            return
         try:
-            df = pd.read_csv(self.sheet_csv_url)
-            
-
-            df = self.expand_ref_column(df)
-            df = self.expand_authors_column(df)
-            df = self.expand_affiliations_column(df)
-            if "Num de Ref" in df.columns:
-                def format_num_de_ref(val):
-                    try:
-                        return str(int(float(val)))
-                    except (ValueError, TypeError):
-                        return str(val)
-                df["Num de Ref"] = df["Num de Ref"].apply(format_num_de_ref)
-            self.dataframe = df
-            self.update_region_menu()
-            self.update_author_menu()
-            self.populate_table()
-            self.update_metrics()
+            df = ler_planilha(self.sheet_csv_url)
+            # Mesma versão de _etapa_dados: o hash do conteúdo, para não refazer etapas sem mudança
+            versao = (self.sheet_csv_url, impressao_planilha(self.sheet_csv_url) or time.time())
+            if versao != self.grafo.versao("dados"):
+                self.grafo.definir("dados", self.expansao.preparar(df), versao)
+            self.grafo.executar(self.etapas_janela, self, atualizar_origens=False)
+            self.atualizar_aba_visivel()
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao carregar dados:\n{e}")  
     def expand_ref_column(self, df):
-        if "Ref" not in df.columns:
-            return df
-        new_rows = []
-        for _, row in df.iterrows():
-            ref_cell = row["Ref"]
-            if pd.isna(ref_cell):
-                new_rows.append(row)
-                continue
-            parts = str(ref_cell).split("\n\n")
-            if len(parts) == 1:
-                new_rows.append(row)
-            else:
-                first_part = parts[0].strip()
-                new_row = row.copy()
-                new_row["Ref"] = first_part
-                new_rows.append(new_row)
-                for part in parts[1:]:
-                    new_row = pd.Series(index=df.columns)
-                    for col in df.columns:
-                        new_row[col] = part.strip() if col == "Ref" else ""
-                    new_rows.append(new_row)
-        return pd.DataFrame(new_rows).reset_index(drop=True)
+        return expand_ref_column(df)
     def expand_affiliations_column(self, df):
-        if "Afiliation" not in df.columns:
-            return df
-        new_rows = []
-        for _, row in df.iterrows():
-            afil_cell = row["Afiliation"]
-            if pd.isna(afil_cell):
-                new_rows.append(row)
-                continue
-            afiliacoes = [a.strip() for a in re.split(r'\.\s*', str(afil_cell)) if a.strip()]
-            if len(afiliacoes) == 1:
-                new_rows.append(row)
-            else:
-                for afil in afiliacoes:
-                    new_row = row.copy()
-                    new_row["Afiliation"] = afil
-                    new_rows.append(new_row)
-        return pd.DataFrame(new_rows).reset_index(drop=True)
+        return expand_affiliations_column(df)
     def expand_authors_column(self, df):
-        if "Autores" not in df.columns or "Afiliation" not in df.columns:
-            return df
-        new_rows = []
-        for _, row in df.iterrows():
-            autores_cell = row["Autores"]
-            afil_cell = row["Afiliation"]
-            if pd.isna(autores_cell):
-                new_rows.append(row)
-                continue
-            autores = [a.strip() for a in re.split(r',\s*(?=[A-Z])', str(autores_cell)) if a.strip()]
-            afiliacoes = [a.strip() for a in re.split(r'\.\s+|\.$', str(afil_cell).replace("\n", " ")) if a.strip()]
-            if len(afiliacoes) == 1 and len(autores) > 1:
-                afiliacoes = afiliacoes * len(autores)
-            if len(autores) != len(afiliacoes):
-                print(f"[⚠️ Aviso] {len(autores)} autores e {len(afiliacoes)} afiliações não coincidem.")
-                print("-> Autores:", autores)
-                print("-> Afiliacoes:", afiliacoes)
-            max_len = max(len(autores), len(afiliacoes))
-            for i in range(max_len):
-                new_row = row.copy()
-                autor = autores[i] if i < len(autores) else ""
-                afil = afiliacoes[i] if i < len(afiliacoes) else ""
-                new_row["Autores"] = autor
-                new_row["Afiliation"] = afil
-                country = ""
-                if afil:
-                    match = re.search(r'[,;]\s*([^,;]+)$', afil)
-                    if match:
-                        country = match.group(1).strip()
-                new_row["country"] = country
-                new_rows.append(new_row)
-        return pd.DataFrame(new_rows).reset_index(drop=True)
+        return expand_authors_column(df)
     def update_region_menu(self):
         self.region_menu.clear()
         self.selected_region = None
@@ -536,130 +858,56 @@ class GoogleSheetsViewer(QMainWindow):
             action = QAction(regiao, self)
             action.triggered.connect(lambda checked, r=regiao: self.filtrar_por_regiao(r))
             self.region_menu.addAction(action)
-    def update_author_menu(self):
-        self.author_menu.clear()
+    def update_country_menu(self):
+        self.country_menu.clear()
+        self.selected_country = None
         action_todos = QAction("Todos", self)
-        action_todos.triggered.connect(self.clear_autor_filters)
-        self.author_menu.addAction(action_todos)
-        self.order_by_frequency = getattr(self, 'order_by_frequency', True) 
-        if self.order_by_frequency:
-            order_label = "Ordenar por: Alfabética"
-        else:
-            order_label = "Ordenar por: Aparições"
-        action_toggle_sort = QAction(order_label, self)
-        action_toggle_sort.triggered.connect(self.toggle_autor_ordering)
-        self.author_menu.addAction(action_toggle_sort)
-        self.author_menu.addSeparator()
-        if "Autores" not in self.dataframe.columns:
+        action_todos.triggered.connect(lambda: self.filtrar_por_pais(None))
+        self.country_menu.addAction(action_todos)
+        if "country" not in self.indices:
             return
-        contagem_autores = self.dataframe["Autores"].dropna().value_counts()
-        if self.order_by_frequency:
-            contagem_autores = contagem_autores  # Já está por contagem decrescente
-        else:
-            contagem_autores = contagem_autores.sort_index(key=lambda x: x.str.lower())
-        self.autor_actions = []
-        for autor, count in contagem_autores.items():
-            action = QAction(f"{autor} ({count})", self)
-            action.setCheckable(True)
-            action.toggled.connect(self.autor_selection_changed)
-            action.setData(autor)
-            self.author_menu.addAction(action)
-            self.autor_actions.append(action)
-
+        for pais, count in sorted(self.indices["country"].contagens().items(), key=lambda x: x[0].lower()):
+            action = QAction(f"{pais} ({count})", self)
+            action.triggered.connect(lambda checked, p=pais: self.filtrar_por_pais(p))
+            self.country_menu.addAction(action)
+    def update_year_menu(self):
+        self.year_menu.clear()
+        self.selected_year = None
+        action_todos = QAction("Todos", self)
+        action_todos.triggered.connect(lambda: self.filtrar_por_ano(None))
+        self.year_menu.addAction(action_todos)
+        if "Ano" not in self.indices:
+            return
+        contagem_anos = self.indices["Ano"].contagens()
+        try:
+            anos = sorted(contagem_anos)
+        except TypeError:
+            anos = sorted(contagem_anos, key=str)
+        for ano in anos:
+            action = QAction(f"{ano} ({contagem_anos[ano]})", self)
+            action.triggered.connect(lambda checked, a=ano: self.filtrar_por_ano(a))
+            self.year_menu.addAction(action)
+    def update_author_menu(self):
+        contagens = self.indices["Autores"].contagens() if "Autores" in self.indices else {}
+        if self.seletor_autores is not None:
+            self.seletor_autores.limpar_campo()
+        self.modelo_autores.definir_contagens(contagens)
 
-    def salvar_detalhes_em_csv(self):
-        texto = self.metricas_detalhes_textedit.toPlainText()
-        desktop_path = QStandardPaths.writableLocation(QStandardPaths.DesktopLocation)
-        pasta_pymt = os.path.join(desktop_path, "PYMT")
-        if not os.path.exists(pasta_pymt):
-            os.makedirs(pasta_pymt)
-        arquivo_csv = os.path.join(pasta_pymt, "detalhes_salvos.csv")
-
-        linhas = texto.splitlines()
-
-        dados = {
-            "Tipos de publicação": [],
-            "Tipos de delineamento": [],
-            "Países mais frequentes": [],
-            "Regiões mais frequentes": [],
-            "Autores mais frequentes": []
-        }
+    def montar_seletor_autores(self):
+        if self.seletor_autores is not None:
+            return
+        self.seletor_autores = SeletorAutores(self.modelo_autores, self.author_menu)
+        action_lista = QWidgetAction(self.author_menu)
+        action_lista.setDefaultWidget(self.seletor_autores)
+        self.author_menu.addAction(action_lista)
 
-        categoria_atual = None
-
-        padrao_generico = re.compile(r'-\s*(.+?):\s*(\d+)\s*\(([\d\.]+)%\)')
-        padrao_pais = re.compile(r'-\s*(.+?):\s*(\d+)\s*referências\s*\(([\d\.]+)%\)')
-        padrao_regiao = re.compile(r'-\s*(.+?):\s*(\d+)')
-        padrao_autor = re.compile(r'-\s*(.+?):\s*(\d+)\s*aparições')
-
-        for linha in linhas:
-            linha = linha.strip()
-            if linha.startswith("📚"):
-                categoria_atual = "Tipos de publicação"
-            elif linha.startswith("🧪"):
-                categoria_atual = "Tipos de delineamento"
-            elif linha.startswith("🌍"):
-                categoria_atual = "Países mais frequentes"
-            elif linha.startswith("🗺️"):
-                categoria_atual = "Regiões mais frequentes"
-            elif linha.startswith("👤"):
-                categoria_atual = "Autores mais frequentes"
-            elif linha.startswith("-") and categoria_atual:
-                if categoria_atual in ("Tipos de publicação", "Tipos de delineamento"):
-                    m = padrao_generico.match(linha)
-                    if m:
-                        nome, valor, perc = m.groups()
-                        dados[categoria_atual].append([nome, int(valor), float(perc)])
-                elif categoria_atual == "Países mais frequentes":
-                    m = padrao_pais.match(linha)
-                    if m:
-                        nome, valor, perc = m.groups()
-                        dados[categoria_atual].append([nome, int(valor), float(perc)])
-                elif categoria_atual == "Regiões mais frequentes":
-                    m = padrao_regiao.match(linha)
-                    if m:
-                        nome, valor = m.groups()
-                        dados[categoria_atual].append([nome, int(valor), 0.0])
-                elif categoria_atual == "Autores mais frequentes":
-                    m = padrao_autor.match(linha)
-                    if m:
-                        nome, valor = m.groups()
-                        dados[categoria_atual].append([nome, int(valor), 0.0])
-
-        # Calcular % para Regiões
-        regioes = dados["Regiões mais frequentes"]
-        total_regioes = sum(item[1] for item in regioes)
-        if total_regioes > 0:
-            for item in regioes:
-                item[2] = round(item[1] / total_regioes * 100, 1)
-
-        # Ajustar strings para CSV
-        for categoria in dados:
-            for i, item in enumerate(dados[categoria]):
-                nome, valor, perc = item
-                perc_str = f"{perc}%" if perc > 0 else ""
-                dados[categoria][i] = [nome, str(valor), perc_str]
-
-        # Alinhar colunas
-        max_len = max(len(lst) for lst in dados.values())
-        for key in dados:
-            while len(dados[key]) < max_len:
-                dados[key].append(["", "", ""])
 
+    def salvar_detalhes_em_csv(self):
+        detalhes = self._metricas_exibidas("detalhes", MetricasDetalhadas)
+        if detalhes is None:
+            return
         try:
-            with open(arquivo_csv, mode='w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                header = []
-                for categoria in dados.keys():
-                    header.extend([f"{categoria}", "Valor", "% do total"])
-                writer.writerow(header)
-
-                for i in range(max_len):
-                    row = []
-                    for categoria in dados.keys():
-                        row.extend(dados[categoria][i])
-                    writer.writerow(row)
-
+            arquivo_csv = exportar_metricas_detalhe_para_csv(detalhes, nome="detalhes_salvos.csv")
             QMessageBox.information(self, "Sucesso", f"Arquivo salvo em:\n{arquivo_csv}")
         except Exception as e:
             QMessageBox.critical(self, "Erro ao salvar", f"Erro: {str(e)}")
@@ -668,208 +916,136 @@ class GoogleSheetsViewer(QMainWindow):
 
     def toggle_autor_ordering(self):
         self.order_by_frequency = not self.order_by_frequency
-        self.update_author_menu()
+        self.action_ordem_autores.setText(
+            "Ordenar por: Alfabética" if self.order_by_frequency else "Ordenar por: Aparições")
+        self.modelo_autores.ordenar(self.order_by_frequency)
     def clear_autor_filters(self):
-        for action in getattr(self, "autor_actions", []):
-            action.setChecked(False)
+        self.temporizador_autores.stop()
+        self.modelo_autores.limpar_selecao()
         self.filtrar_por_autores([])
-    def autor_selection_changed(self, checked):
-        autores_selecionados = [
-            action.data() for action in getattr(self, "autor_actions", [])
-            if action.isChecked()]
-        self.filtrar_por_autores(autores_selecionados)
+    def aplicar_autores(self):
+        self.temporizador_autores.stop()
+        autores_selecionados = self.modelo_autores.selecionados()
+        if autores_selecionados != self.autores_selecionados:
+            self.filtrar_por_autores(autores_selecionados)
     def filtrar_por_autores(self, autores):
-        if not autores:
-            self.region_label.setText("Visualizando: Geral (Todas)")
-            self.populate_table()
-         
-            return
-        df = self.dataframe.copy()
-        df_filtrado = df[df["Autores"].isin(autores)]
-        self.region_label.setText(f"Visualizando: Autor(es) - {', '.join(autores)}")
-        self.populate_table_custom(df_filtrado)
-       
+        self.autores_selecionados = list(autores)
+        self.populate_table()
 
     def filtrar_por_regiao(self, regiao):
         self.selected_region = regiao
-        self.region_label.setText(f"Visualizando: {regiao if regiao else 'Geral (Todas)'}")
         self.populate_table()
-       
-    def populate_table(self):
-        df = self.dataframe
+
+    def filtrar_por_pais(self, pais):
+        self.selected_country = pais
+        self.populate_table()
+
+    def filtrar_por_ano(self, ano):
+        self.selected_year = ano
+        self.populate_table()
+
+    def aplicar_busca(self):
+        self.temporizador_busca.stop()
+        texto = self.busca_lineedit.text().strip()
+        if texto != self.texto_busca:
+            self.texto_busca = texto
+            self.populate_table()
+
+    def _selecoes(self):
+        # Filtros ativos, combinados por interseção; autores entre si por união
+        selecoes = {}
         if self.selected_region:
-            df = df[df["Region"] == self.selected_region]
-        self.populate_table_custom(df)
-    def populate_table_custom(self, df):
-        self.table.clear()
-        self.table.setRowCount(len(df))
-        self.table.setColumnCount(len(df.columns))
-        self.table.setHorizontalHeaderLabels(df.columns)
-        font_bold = QFont()
-        font_bold.setBold(True)
-        region_colors = {
-            "Africa": QColor(240, 230, 140),
-            "Asia": QColor(173, 216, 230),
-            "Australia and New Zeland": QColor(255, 235, 205),
-            "Canada and EUA": QColor(200, 200, 255),
-            "Europe": QColor(221, 160, 221),
-            "Latin America": QColor(152, 251, 152),
-            "Eastern Mediterranean": QColor(255, 182, 193),
-        }
-        for row in range(len(df)):
-            region = df.iloc[row].get("Region", "").strip() if "Region" in df.columns else ""
-            bg_color = region_colors.get(region, QColor(255, 255, 255))
-            for col, column_name in enumerate(df.columns):
-                value = str(df.iat[row, col])
-                item = QTableWidgetItem(value)
-                item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                if value.strip() == "":
-                    item.setBackground(QColor(220, 220, 220))
-                    item.setForeground(QColor(0, 0, 0))
-                    item.setTextAlignment(Qt.AlignCenter)
-                else:
-                    item.setBackground(bg_color)
-                    item.setForeground(QColor(0, 0, 0))
-
-                if column_name.lower() == "num":
-                    item.setFont(font_bold)
-                    item.setTextAlignment(Qt.AlignCenter)
-                self.table.setItem(row, col, item)
-        self.clear_duplicate_cells([
-    "Num", "Region", "country", "Autores", "Titulo", "Ref", "Afiliation",
-    "Abstract", "Num de Ref", "IA abstract 100 palavras", "IA keywords"
-])
-        self.update_spans()
-        self.color_region_blocks()
-        self.update_metrics()
-    def clear_duplicate_cells(self, columns):
-        header_labels = [self.table.horizontalHeaderItem(i).text() for i in range(self.table.columnCount())]
-        col_indices = [header_labels.index(col) for col in columns if col in header_labels]
-        for col in col_indices:
-            last_value = None
-            for row in range(self.table.rowCount()):
-                item = self.table.item(row, col)
-                if item:
-                    current_value = item.text().strip()
-                    if current_value == last_value:
-                        item.setText("")
-                    else:
-                        last_value = current_value
-    def update_spans(self):
-        self.clear_spans()
-        header_labels = [self.table.horizontalHeaderItem(i).text() for i in range(self.table.columnCount())]
-        columns_conditional_merge = [
-            "Num", "Region", "country", "Autores", "Titulo", "Ref", "Afiliation", "Abstract",
-            "Num de Ref", "IA abstract 100 palavras", "IA keywords"]
-        for col_name in columns_conditional_merge:
-            if col_name not in header_labels:
-                continue
-            col = header_labels.index(col_name)
-            row = 0
-            while row < self.table.rowCount():
-                item = self.table.item(row, col)
-                if item is None or item.text().strip() == "":
-                    row += 1
-                    continue
-                start_row = row
-                span_count = 1
-                next_row = row + 1
-                while next_row < self.table.rowCount():
-                    next_item = self.table.item(next_row, col)
-                    if next_item and next_item.text().strip() == "":
-                        span_count += 1
-                        next_row += 1
-                    else:
-                        break
-                if span_count > 1:
-                    self.table.setSpan(start_row, col, span_count, 1)
-                row = next_row
-    def clear_spans(self):
-        for r in range(self.table.rowCount()):
-            for c in range(self.table.columnCount()):
-                if self.table.rowSpan(r, c) > 1 or self.table.columnSpan(r, c) > 1:
-                    self.table.setSpan(r, c, 1, 1)
-    def color_region_blocks(self):
-        try:
-            region_col_index = self.dataframe.columns.get_loc("Region")
-        except KeyError:
-            return
-        block_color_1 = QColor(255, 255, 255)
-        block_color_2 = QColor(245, 245, 245)
-        last_value = None
-        block_num = 0
-        for row in range(self.table.rowCount()):
-            item = self.table.item(row, region_col_index)
-            if item is None:
-                continue
-            current_value = item.text().strip()
-            if current_value != last_value:
-                block_num += 1
-                last_value = current_value
-            block_color = block_color_1 if (block_num % 2) == 1 else block_color_2
-            for col in range(self.table.columnCount()):
-                cell = self.table.item(row, col)
-                if cell:
-                    bg = cell.background().color()
-                    blended = QColor(
-                        (bg.red() + block_color.red()) // 2,
-                        (bg.green() + block_color.green()) // 2,
-                        (bg.blue() + block_color.blue()) // 2,)
-                    cell.setBackground(blended)                
-    def update_metrics(self):
-        try:
-            # Usa a função que calcula métricas + estatísticas numéricas detalhadas
-            metricas_str = calcular_metricas(self.dataframe)
-            self.metricas_textedit.setPlainText(metricas_str)
-            self.update_detalhes()
-            self.update_entrada_bibtex()
-            self.update_visualizacao_bibtex()
-            self.update_estatisticas_bibtex()
+            selecoes["Region"] = [self.selected_region]
+        if self.autores_selecionados:
+            selecoes["Autores"] = self.autores_selecionados
+        if self.selected_country:
+            selecoes["country"] = [self.selected_country]
+        if self.selected_year is not None:
+            selecoes["Ano"] = [self.selected_year]
+        return selecoes
+
+    def _atualizar_rotulo(self):
+        partes = []
+        if self.selected_region:
+            partes.append(str(self.selected_region))
+        if self.autores_selecionados:
+            partes.append(f"Autor(es) - {', '.join(map(str, self.autores_selecionados))}")
+        if self.selected_country:
+            partes.append(f"País - {self.selected_country}")
+        if self.selected_year is not None:
+            partes.append(f"Ano - {self.selected_year}")
+        if self.texto_busca:
+            partes.append(f"Busca - {self.texto_busca}")
+        self.region_label.setText(f"Visualizando: {' | '.join(partes) if partes else 'Geral (Todas)'}")
 
-        except Exception as e:
-            self.metrics_label.setText("Erro ao calcular métricas.")
-            self.metricas_textedit.setPlainText(f"Erro ao calcular métricas:\n{e}")
-    def update_detalhes(self):
-        try:
-            detalhes_str = calcular_metricas_detalhadas(self.dataframe)
-            self.metricas_detalhes_textedit.setPlainText(detalhes_str)
-        except Exception as e:
-            self.metricas_detalhes_textedit.setPlainText(f"Erro ao calcular métricas detalhadas:\n{e}")
+    def populate_table(self):
+        self._atualizar_rotulo()
+        linhas = self.indices.filtrar(self._selecoes())
+        if self.texto_busca:
+            if self.busca is None:
+                self.statusBar().showMessage("Índice de busca ainda em construção; a busca será aplicada em seguida.", 3000)
+            else:
+                encontradas = self.busca.linhas(self.texto_busca)
+                if encontradas is not None:
+                    linhas = encontradas if linhas is None else np.intersect1d(
+                        linhas, encontradas, assume_unique=True)
+        self.linhas_filtradas = linhas
+        self.exibir_linhas(linhas)
+        self.atualizar_metricas_filtro()
+        # O relatório completo do filtro só é calculado com a subaba Filtro atual visível
+        selecoes = self._selecoes()
+        chave = chave_filtro(selecoes, self.texto_busca)
+        if chave != self.grafo.versao("filtro"):
+            self.grafo.definir("filtro", (selecoes, self.texto_busca), chave)
+            self.atualizar_aba_visivel()
+
+    def atualizar_metricas_filtro(self):
+        """Totais das linhas filtradas no rótulo e na subaba Filtro atual, a partir do cubo."""
+        if self.cubo is None:
+            return
+        linhas = self.linhas_filtradas
+        if linhas is None:
+            self.metrics_label.setText(self.grafo.valor("resumo", ""))
+        else:
+            self.metrics_label.setText(
+                f"📊 {self.cubo.referencias(linhas)} de {self.cubo.referencias()} "
+                "referências únicas (Num) no filtro atual")
+        self.filtro_pendente = True
+        self.mostrar_filtro_atual()
+
+    def mostrar_filtro_atual(self):
+        # O relatório completo só é montado com a subaba Filtro atual visível
+        if not self.filtro_pendente or self.cubo is None:
+            return
+        if self.tabs.currentWidget() is not self.aba_metricas or self.aba_metricas in self.abas_pendentes:
+            return
+        if self.subtabs_metricas.currentWidget() is not self.subaba_filtro:
+            return
+        self.filtro_textedit.setPlainText(self.cubo.texto(self.linhas_filtradas))
+        self.filtro_pendente = False
 
-    def update_entrada_bibtex(self):
-        try:
-            texto = processar_entrada_bibtex(self.dataframe)
-            self.entrada_bibtex_textedit.setPlainText(texto)
-        except Exception as e:
-            self.entrada_bibtex_textedit.setPlainText(f"Erro ao atualizar Entrada Bibtex:\n{e}")
+    def exibir_linhas(self, linhas):
+        # Filtros só trocam as posições exibidas; o dataframe do modelo é o mesmo
+        if self.modelo_tabela.dataframe is not self.dataframe:
+            self.modelo_tabela.definir_dados(self.dataframe, linhas)
+        else:
+            self.modelo_tabela.filtrar(linhas)
+        self.update_spans()
 
-    def update_visualizacao_bibtex(self):
-        try:
-            texto_formatado = processar_visualizacao_formatada(self.dataframe)
-            self.visualizacao_bibtex_textedit.setPlainText(texto_formatado)
-        except Exception as e:
-            self.visualizacao_bibtex_textedit.setPlainText(f"Erro ao atualizar Visualização Formatada:\n{e}")
+    def populate_table_custom(self, df):
+        self.modelo_tabela.definir_dados(df)
+        self.update_spans()
 
-    def update_estatisticas_bibtex(self):
-        try:
-            estatisticas = processar_estatisticas_bibtex(self.dataframe)
-            self.estatisticas_bibtex_textedit.setPlainText(estatisticas)
-        except Exception as e:
-            self.estatisticas_bibtex_textedit.setPlainText(f"Erro ao atualizar Estatísticas Bibtex:\n{e}")
+    def update_spans(self):
+        self.table.clearSpans()
+        for linha, coluna, quantidade in self.modelo_tabela.spans:
+            self.table.setSpan(linha, coluna, quantidade, 1)
 
     def export_to_csv(self):
-        headers = [self.table.horizontalHeaderItem(i).text() for i in range(self.table.columnCount())]
-        if not headers:
+        df_export = self.modelo_tabela.tabela_exibida()
+        if df_export.columns.empty:
             QMessageBox.warning(self, "Aviso", "Nada para exportar.")
             return
-        rows = []
-        for row in range(self.table.rowCount()):
-            row_data = []
-            for col in range(self.table.columnCount()):
-                item = self.table.item(row, col)
-                row_data.append(item.text() if item else "")
-            rows.append(row_data)
-        df_export = pd.DataFrame(rows, columns=headers)
         desktop = QStandardPaths.writableLocation(QStandardPaths.DesktopLocation)
 
         # Caminho para a pasta PYMT dentro da área de trabalho
@@ -892,5 +1068,7 @@ class GoogleSheetsViewer(QMainWindow):
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = GoogleSheetsViewer()
+    if "--tempo-inicio" in sys.argv:
+        MedidorPrimeiraPintura(window)
     window.show()
     sys.exit(app.exec_())
@@ -0,0 +1,126 @@
+# sheetex.py
+"""Linha de comando do SheeTeX: baixa a planilha, expande, gera BibTeX e métricas sem abrir a interface.
+
+Exemplo (em um cron, por exemplo):
+
+    python sheetex.py --saida ~/Desktop/PYMT
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+from cache_planilha import impressao_planilha, ler_planilha_em_blocos
+from pipeline_dados import ExpansaoIncremental, concatenar
+from processador_referencias import juntar_referencias, separar_referencias, gerar_bibtex
+from metricas import (
+    XLSX_DISPONIVEL, calcular_metricas, calcular_metricas_detalhadas, pasta_exportacao,
+    exportar_metricas_para_csv, exportar_metricas_detalhe_para_csv, exportar_metricas_para_xlsx)
+from snapshot import carregar_snapshot, ler_meta, salvar_snapshot
+
+TAMANHO_BLOCO = 2000
+
+
+def _url_padrao():
+    try:
+        from config import sheet_csv_url
+        return sheet_csv_url
+    except ImportError:
+        return None
+
+
+def processar(url, pasta, usar_snapshot=True):
+    """Executa download → expansão → BibTeX → métricas e grava as exportações em pasta.
+
+    Retorna um dicionário com o caminho de cada arquivo gerado.
+    """
+    expansao = ExpansaoIncremental()
+    if usar_snapshot:
+        carregar_snapshot(url, expansao)
+
+    refs = []
+
+    def blocos():
+        for bloco in ler_planilha_em_blocos(url, TAMANHO_BLOCO):
+            if "Ref" in bloco.columns:
+                refs.extend(bloco["Ref"])
+            yield bloco
+
+    df = concatenar(list(expansao.preparar_em_blocos(blocos())))
+    if usar_snapshot:
+        sha256 = impressao_planilha(url)
+        meta = ler_meta(url)
+        if meta is None or sha256 is None or meta["sha256"] != sha256:
+            salvar_snapshot(url, sha256, expansao)
+
+    os.makedirs(pasta, exist_ok=True)
+    arquivos = {}
+
+    arquivos["dados"] = os.path.join(pasta, "dados_expandidos.csv")
+    df.to_csv(arquivos["dados"], index=False)
+
+    bibtex, _ = gerar_bibtex(separar_referencias(juntar_referencias(refs)))
+    arquivos["bibtex"] = os.path.join(pasta, "references.bib")
+    with open(arquivos["bibtex"], "w", encoding="utf-8") as f:
+        f.write(bibtex)
+
+    metricas = calcular_metricas(df)
+    detalhes = calcular_metricas_detalhadas(df)
+    for nome, resultado in (("metricas.txt", metricas), ("metricas_detalhadas.txt", detalhes)):
+        with open(os.path.join(pasta, nome), "w", encoding="utf-8") as f:
+            f.write(resultado.texto())
+    arquivos["metricas"] = os.path.join(pasta, "metricas.txt")
+    arquivos["detalhes"] = os.path.join(pasta, "metricas_detalhadas.txt")
+
+    arquivos["metricas_csv"] = exportar_metricas_para_csv(metricas, pasta)
+    arquivos["detalhes_csv"] = exportar_metricas_detalhe_para_csv(detalhes, pasta)
+    if XLSX_DISPONIVEL:
+        arquivos["metricas_xlsx"] = exportar_metricas_para_xlsx(metricas, detalhes, pasta)
+
+    arquivos["resumo"] = metricas.resumo
+    return arquivos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="sheetex",
+        description="Gera BibTeX, métricas e a planilha expandida sem abrir a interface gráfica.")
+    parser.add_argument(
+        "url", nargs="?", default=_url_padrao(),
+        help="link CSV da planilha ou caminho de um arquivo local (padrão: config.py)")
+    parser.add_argument(
+        "-o", "--saida", default=None,
+        help="pasta onde os arquivos são gravados (padrão: PYMT na área de trabalho)")
+    parser.add_argument(
+        "--sem-snapshot", action="store_true",
+        help="não reaproveita nem grava o snapshot da última execução")
+    parser.add_argument(
+        "-q", "--silencioso", action="store_true",
+        help="não mostra avisos de expansão nem o resumo")
+    args = parser.parse_args(argv)
+
+    if not args.url:
+        parser.error("informe a URL da planilha (config.py não encontrado)")
+
+    inicio = time.time()
+    saida = io.StringIO() if args.silencioso else sys.stdout
+    try:
+        with contextlib.redirect_stdout(saida):
+            arquivos = processar(args.url, args.saida or pasta_exportacao(), not args.sem_snapshot)
+    except Exception as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+    if not args.silencioso:
+        print(arquivos.pop("resumo"))
+        for caminho in arquivos.values():
+            print(f" - {caminho}")
+        print(f"Concluído em {time.time() - inicio:.2f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# snapshot.py
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from cache_planilha import PASTA_CACHE
+from processador_referencias import extrair_campos_apa, registrar_campos_apa
+
+try:
+    import pyarrow  # noqa: F401  (necessário para to_feather/read_feather)
+    FORMATO = "feather"
+except ImportError:
+    FORMATO = "pickle"
+
+VERSAO = 3
+
+
+def _pasta(url):
+    return PASTA_CACHE / "snapshots" / hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _gravar_tabela(df, pasta, nome):
+    """Grava em Feather quando possível; senão em pickle, com colunas de texto categóricas."""
+    if FORMATO == "feather":
+        try:
+            df.to_feather(pasta / f"{nome}.feather")
+            return f"{nome}.feather"
+        except (TypeError, ValueError, ImportError):
+            # Colunas com tipos misturados não cabem no Arrow
+            pass
+    compacto = df.copy()
+    for coluna in compacto.columns:
+        if compacto[coluna].dtype == object and compacto[coluna].nunique() < len(compacto) // 2:
+            compacto[coluna] = compacto[coluna].astype("category")
+    compacto.to_pickle(pasta / f"{nome}.pkl")
+    return f"{nome}.pkl"
+
+
+def _ler_tabela(pasta, arquivo, tipos):
+    if arquivo.endswith(".feather"):
+        df = pd.read_feather(pasta / arquivo)
+    else:
+        df = pd.read_pickle(pasta / arquivo)
+    # Desfaz a compactação, devolvendo os mesmos tipos do dataframe original
+    return df.astype({c: t for c, t in tipos.items() if str(df[c].dtype) != t})
+
+
+def _referencias(df):
+    if "Ref" not in df.columns:
+        return []
+    entrada = "\n\n".join(df["Ref"].dropna().astype(str)).strip()
+    return re.split(r'\n{2,}', entrada) if entrada else []
+
+
+def ler_meta(url):
+    try:
+        with open(_pasta(url) / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("versao") == VERSAO and meta.get("url") == url else None
+
+
+def salvar_snapshot(url, sha256, expansao):
+    """Grava o dataframe expandido, os campos APA já analisados e o estado incremental."""
+    estado = expansao.estado()
+    df = estado["expandido"]
+    if df is None:
+        return
+
+    final = _pasta(url)
+    pasta = final.with_name(final.name + ".tmp")
+    shutil.rmtree(pasta, ignore_errors=True)
+    pasta.mkdir(parents=True)
+
+    campos = pd.DataFrame(
+        [{"texto": texto, **extrair_campos_apa(texto)} for texto in dict.fromkeys(_referencias(df))])
+    linhas = pd.DataFrame({"chave": estado["chaves"], "impressao": estado["impressoes"]})
+    origem = pd.DataFrame({"origem": estado["origem"]})
+
+    meta = {
+        "versao": VERSAO,
+        "url": url,
+        "sha256": sha256,
+        "salvo_em": time.time(),
+        "colunas": estado["colunas"],
+        "tipos": {c: str(t) for c, t in df.dtypes.items()},
+        "arquivos": {
+            "dados": _gravar_tabela(df, pasta, "dados"),
+            "campos": _gravar_tabela(campos, pasta, "campos"),
+            "linhas": _gravar_tabela(linhas, pasta, "linhas"),
+            "origem": _gravar_tabela(origem, pasta, "origem"),
+        },
+    }
+    with open(pasta / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    # Troca o snapshot anterior pelo novo de uma vez
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(pasta, final)
+
+
+def carregar_snapshot(url, expansao):
+    """Abre o último snapshot da URL, restaurando o estado incremental e os campos APA.
+
+    Retorna (dataframe, meta), ou None se não houver snapshot válido.
+    """
+    meta = ler_meta(url)
+    if meta is None:
+        return None
+    pasta = _pasta(url)
+    arquivos = meta["arquivos"]
+    try:
+        df = _ler_tabela(pasta, arquivos["dados"], meta["tipos"])
+        campos = _ler_tabela(pasta, arquivos["campos"], {})
+        linhas = _ler_tabela(pasta, arquivos["linhas"], {})
+        origem = _ler_tabela(pasta, arquivos["origem"], {})
+    except Exception as e:
+        print(f"[⚠️ Aviso] Snapshot ignorado ({e}).")
+        return None
+
+    if not campos.empty:
+        campos = campos.astype(object)
+        registrar_campos_apa(
+            {linha.pop("texto"): linha for linha in campos.to_dict("records")})
+    expansao.restaurar({
+        "colunas": meta["colunas"],
+        "chaves": linhas["chave"].to_numpy(dtype=object),
+        "impressoes": linhas["impressao"].to_numpy(dtype=np.uint64),
+        "expandido": df,
+        "origem": origem["origem"].to_numpy(dtype=object),
+    })
+    return df, meta
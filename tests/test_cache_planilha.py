@@ -0,0 +1,91 @@
+# test_cache_planilha.py
+
+import http.server
+import io
+import threading
+
+import pandas as pd
+import pytest
+
+import cache_planilha
+
+CSV = b"Num,Titulo\n1,Primeiro\n2,Segundo\n3,Terceiro\n"
+ETAG = '"v1"'
+
+
+class _Servidor(http.server.BaseHTTPRequestHandler):
+    completos = 0
+    nao_modificados = 0
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == ETAG:
+            type(self).nao_modificados += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        type(self).completos += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(CSV)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        self.wfile.write(CSV)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor(tmp_path, monkeypatch):
+    monkeypatch.setenv("SHEETEX_CACHE", str(tmp_path))
+    monkeypatch.setattr(cache_planilha, "PASTA_CACHE", tmp_path)
+    monkeypatch.setattr(cache_planilha, "_memoria", {})
+    monkeypatch.setattr(cache_planilha, "_sessao", {})
+    _Servidor.completos = _Servidor.nao_modificados = 0
+    http_server = http.server.HTTPServer(("127.0.0.1", 0), _Servidor)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    yield http_server, f"http://127.0.0.1:{http_server.server_address[1]}/planilha.csv"
+    http_server.shutdown()
+    http_server.server_close()
+
+
+def _nova_sessao():
+    cache_planilha._memoria.clear()
+    cache_planilha._sessao.clear()
+
+
+def test_revalidacao_sem_novo_download(servidor):
+    _, url = servidor
+    esperado = cache_planilha.ler_planilha(url)
+
+    _nova_sessao()
+    obtido = cache_planilha.ler_planilha(url)
+
+    assert (_Servidor.completos, _Servidor.nao_modificados) == (1, 1)
+    pd.testing.assert_frame_equal(obtido, esperado)
+
+
+def test_sem_conexao_usa_copia_local(servidor, capsys):
+    http_server, url = servidor
+    esperado = cache_planilha.ler_planilha(url)
+    http_server.shutdown()
+    http_server.server_close()
+
+    _nova_sessao()
+    obtido = cache_planilha.ler_planilha(url)
+
+    pd.testing.assert_frame_equal(obtido, esperado)
+    assert "Sem conexão" in capsys.readouterr().out
+
+
+def test_blocos_pulam_conteudo_ja_lido(servidor):
+    _, url = servidor
+    blocos = list(cache_planilha.ler_planilha_em_blocos(url, tamanho_bloco=2))
+    pd.testing.assert_frame_equal(pd.concat(blocos, ignore_index=True), pd.read_csv(io.BytesIO(CSV)))
+    ja_lido = cache_planilha.impressao_planilha(url)
+
+    _nova_sessao()
+    assert list(cache_planilha.ler_planilha_em_blocos(url, ja_lido=ja_lido)) == []
+    assert (_Servidor.completos, _Servidor.nao_modificados) == (1, 1)
+    assert cache_planilha.impressao_planilha(url) == ja_lido
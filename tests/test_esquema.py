@@ -0,0 +1,33 @@
+# test_esquema.py
+
+import numpy as np
+import pandas as pd
+
+from pipeline_dados import aplicar_esquema
+
+
+def test_num_com_texto_mantem_ausentes():
+    df = pd.DataFrame({"Num": ["1", "2.0", "abc", "", None, " 3 ", np.nan]})
+    num = aplicar_esquema(df)["Num"]
+
+    assert num.isna().tolist() == [False, False, False, True, True, False, True]
+    assert num.dropna().tolist() == ["1", "2", "abc", "3"]
+    assert num.nunique() == 4
+
+
+def test_inteiros_exatos_viram_int64():
+    df = pd.DataFrame({"Num": [1.0, np.nan, 3.0], "Num de Ref": ["10", " ", "12.0"]})
+    resultado = aplicar_esquema(df)
+
+    pd.testing.assert_series_equal(resultado["Num"], pd.Series([1, pd.NA, 3], dtype="Int64", name="Num"))
+    pd.testing.assert_series_equal(
+        resultado["Num de Ref"], pd.Series([10, pd.NA, 12], dtype="Int64", name="Num de Ref"))
+
+
+def test_decimais_deixam_a_coluna_como_esta():
+    df = pd.DataFrame({"Num de Ref": [1.5, 2.0, np.nan], "Num": ["1,5", "2", "x"]})
+    original = df.copy()
+    resultado = aplicar_esquema(df)
+
+    pd.testing.assert_series_equal(resultado["Num de Ref"], original["Num de Ref"])
+    assert resultado["Num"].tolist() == ["1,5", "2", "x"]
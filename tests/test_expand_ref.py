@@ -0,0 +1,70 @@
+# test_expand_ref.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline_dados import expand_ref_column
+
+
+def expand_ref_column_iterrows(df):
+    """Implementação anterior (linha a linha), usada como referência."""
+    if "Ref" not in df.columns:
+        return df
+    new_rows = []
+    for _, row in df.iterrows():
+        ref_cell = row["Ref"]
+        if pd.isna(ref_cell):
+            new_rows.append(row)
+            continue
+        parts = str(ref_cell).split("\n\n")
+        if len(parts) == 1:
+            new_rows.append(row)
+        else:
+            first_part = parts[0].strip()
+            new_row = row.copy()
+            new_row["Ref"] = first_part
+            new_rows.append(new_row)
+            for part in parts[1:]:
+                new_row = pd.Series(index=df.columns, dtype=object)
+                for col in df.columns:
+                    new_row[col] = part.strip() if col == "Ref" else ""
+                new_rows.append(new_row)
+    return pd.DataFrame(new_rows).reset_index(drop=True)
+
+
+def _comparar(df):
+    esperado = expand_ref_column_iterrows(df.copy())
+    obtido = expand_ref_column(df.copy())
+    pd.testing.assert_frame_equal(obtido, esperado)
+
+
+CASOS = {
+    "ref ausente": [np.nan, "A (2000). T."],
+    "referência única": ["A (2000). T.", "B (2001). U."],
+    "várias referências": ["A (2000). T.\n\nB (2001). U.\n\nC (2002). V.", "D (2003). W."],
+    "separador no fim": ["A (2000). T.\n\n", "B (2001). U."],
+    "separador no começo": ["\n\nA (2000). T.", np.nan],
+    "separadores seguidos": ["A (2000). T.\n\n\n\nB (2001). U.", "C (2002). V."],
+    "espaços ao redor": ["  A (2000). T.  \n\n  B (2001). U.\n", "  C (2002). V.  "],
+}
+
+
+@pytest.mark.parametrize("refs", CASOS.values(), ids=CASOS.keys())
+def test_igual_a_implementacao_iterrows(refs):
+    df = pd.DataFrame({
+        "Num": range(1, len(refs) + 1),
+        "Ref": refs,
+        "Titulo": [f"Título {i}" for i in range(len(refs))],
+    })
+    _comparar(df)
+
+
+def test_indice_nao_sequencial():
+    df = pd.DataFrame({"Ref": ["A.\n\nB.", "C."], "Ano": [2000, 2001]}, index=[10, 3])
+    _comparar(df)
+
+
+def test_sem_coluna_ref():
+    df = pd.DataFrame({"Titulo": ["x"]})
+    assert expand_ref_column(df) is df
@@ -0,0 +1,54 @@
+# test_expansao_incremental.py
+
+import contextlib
+import io
+
+import pandas as pd
+
+from pipeline_dados import ExpansaoIncremental, preparar_dataframe
+
+
+def _planilha(linhas=300):
+    return pd.DataFrame({
+        "Num": range(1, linhas + 1),
+        "Autores": [f"Autor {i % 7}; Autor {i % 11}" for i in range(linhas)],
+        "Afiliation": [f"Universidade {i % 5}, Brasil" for i in range(linhas)],
+        "Ref": [f"Ref {i}.; Ref {i + 1}." for i in range(linhas)],
+        "Ano": [2000 + i % 20 for i in range(linhas)],
+    })
+
+
+def _silencioso(funcao, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return funcao(*args)
+
+
+def test_atualizacao_sem_blocos_mantem_estado():
+    expansao = ExpansaoIncremental()
+    df = _planilha()
+    _silencioso(expansao.preparar, df)
+
+    # Planilha igual à já lida: o leitor não gera nenhum bloco
+    assert _silencioso(lambda: list(expansao.preparar_em_blocos(iter([])))) == []
+    assert expansao.alteracoes == {"adicionadas": 0, "alteradas": 0, "removidas": 0}
+
+    editada = df.copy()
+    editada.loc[10, "Ano"] = 1999
+    obtido = _silencioso(expansao.preparar, editada)
+
+    assert expansao.alteracoes == {"adicionadas": 0, "alteradas": 1, "removidas": 0}
+    pd.testing.assert_frame_equal(obtido, _silencioso(preparar_dataframe, editada))
+
+
+def test_sem_autores_apos_edicao_nao_mantem_country():
+    expansao = ExpansaoIncremental()
+    df = _planilha(4)
+    df["Autores"] = ["Autor A", None, None, None]
+    _silencioso(expansao.preparar, df)
+
+    editada = df.copy()
+    editada.loc[0, "Autores"] = None
+    obtido = _silencioso(expansao.preparar, editada)
+
+    assert expansao.alteracoes == {"adicionadas": 0, "alteradas": 1, "removidas": 0}
+    pd.testing.assert_frame_equal(obtido, _silencioso(preparar_dataframe, editada))
@@ -0,0 +1,38 @@
+# test_orquestrador.py
+
+import pytest
+
+from orquestrador import GrafoEtapas
+
+
+class _Cancelado(Exception):
+    pass
+
+
+def _grafo(fonte):
+    grafo = GrafoEtapas()
+    grafo.adicionar("dados", lambda contexto: (fonte["valor"], fonte["valor"]))
+    grafo.adicionar("dobro", lambda contexto, dados: dados * 2, depende=("dados",))
+    return grafo
+
+
+@pytest.mark.parametrize("etapa_cancelada", ["dados", "dobro"])
+def test_antes_de_gravar_descarta_resultado(etapa_cancelada):
+    fonte = {"valor": 1}
+    grafo = _grafo(fonte)
+    grafo.executar(["dobro"], None)
+
+    def cancelar(nome):
+        if nome == etapa_cancelada:
+            raise _Cancelado()
+
+    fonte["valor"] = 5
+    with pytest.raises(_Cancelado):
+        grafo.executar(["dobro"], None, antes_de_gravar=cancelar)
+
+    # A etapa cancelada e as seguintes continuam com a versão anterior ou ficam desatualizadas
+    assert grafo.valor("dobro") == 2
+    if etapa_cancelada == "dados":
+        assert grafo.versao("dados") == 1
+    else:
+        assert grafo.desatualizadas(["dobro"]) == ["dobro"]
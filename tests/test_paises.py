@@ -0,0 +1,48 @@
+# test_paises.py
+
+import pandas as pd
+import pytest
+
+from paises import canonico, normalizar_paises, pais_da_afiliacao, paises_das_afiliacoes
+
+
+@pytest.mark.parametrize("sigla", ["CA", "PA", "GA", "IN", "MA", "DE", "CO"])
+def test_sigla_de_estado_nao_vira_pais(sigla):
+    assert canonico(sigla) is None
+    assert normalizar_paises(sigla) == [sigla]
+
+
+@pytest.mark.parametrize("nome, esperado", [
+    ("BRA", "Brazil"),
+    ("DEU", "Germany"),
+    ("USA", "USA"),
+    ("US", "USA"),
+    ("UK", "United Kingdom"),
+    ("Germany", "Germany"),
+    ("can", None),
+])
+def test_canonico(nome, esperado):
+    assert canonico(nome) == esperado
+
+
+@pytest.mark.parametrize("afiliacao, esperado", [
+    ("Georgia State University, Atlanta, GA", "USA"),
+    ("University of Georgia, Athens, GA 30602", "USA"),
+    ("University of New Mexico", "USA"),
+    ("Rutgers University, New Jersey", "USA"),
+    ("Dartmouth College, Lebanon, NH", "USA"),
+    ("Michael Jordan Lab, Boston", "USA"),
+    ("Tbilisi State University, Georgia", "Georgia"),
+    ("University of Jordan", "Jordan"),
+    ("American University of Beirut, Lebanon", "Lebanon"),
+    ("UNAM, Mexico City, Mexico", "Mexico"),
+    ("Universidade Federal do Pará, Belém, PA", ""),
+    ("McGill University, Montreal, Canada", "Canada"),
+])
+def test_pais_da_afiliacao(afiliacao, esperado):
+    assert pais_da_afiliacao(afiliacao) == esperado
+
+
+def test_sigla_de_estado_nao_atravessa_afiliacoes():
+    afiliacoes = pd.Series(["Some Institute,", "NY, Music Lab", "Lebanon, NH 03766"])
+    assert paises_das_afiliacoes(afiliacoes).tolist() == ["", "", "USA"]